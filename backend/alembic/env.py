@@ -21,6 +21,9 @@ from app.models import (
     interface,
     metric,
     alert,
+    dhcp,
+    address,
+    topology,
     ai
 )
 
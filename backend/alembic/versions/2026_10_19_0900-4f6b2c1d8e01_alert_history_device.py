@@ -0,0 +1,37 @@
+"""Track triggering device on alert history
+
+Revision ID: 4f6b2c1d8e01
+Revises: 9c9f43461d83
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f6b2c1d8e01'
+down_revision = '9c9f43461d83'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('alert_history', sa.Column('device_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'alert_history_device_id_fkey', 'alert_history', 'devices',
+        ['device_id'], ['id'], ondelete='CASCADE'
+    )
+    op.create_index(op.f('ix_alert_history_device_id'), 'alert_history', ['device_id'], unique=False)
+    # Open incidents are looked up by (alert, device) when the evaluator starts
+    op.create_index(
+        'ix_alert_history_open', 'alert_history', ['alert_id', 'device_id'],
+        unique=False, postgresql_where=sa.text('resolved_at IS NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alert_history_open', table_name='alert_history')
+    op.drop_index(op.f('ix_alert_history_device_id'), table_name='alert_history')
+    op.drop_constraint('alert_history_device_id_fkey', 'alert_history', type_='foreignkey')
+    op.drop_column('alert_history', 'device_id')
@@ -0,0 +1,32 @@
+"""Alert hysteresis and coalesced incident counters
+
+Revision ID: 7a3e9d5b2c14
+Revises: 4f6b2c1d8e01
+Create Date: 2026-10-19 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3e9d5b2c14'
+down_revision = '4f6b2c1d8e01'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('alerts', sa.Column('clear_threshold', sa.Float(), nullable=True))
+    op.add_column('alert_history', sa.Column('occurrence_count', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('alert_history', sa.Column('last_value', sa.Float(), nullable=True))
+    op.add_column('alert_history', sa.Column('last_seen_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('alert_history', sa.Column('is_flapping', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('alert_history', 'is_flapping')
+    op.drop_column('alert_history', 'last_seen_at')
+    op.drop_column('alert_history', 'last_value')
+    op.drop_column('alert_history', 'occurrence_count')
+    op.drop_column('alerts', 'clear_threshold')
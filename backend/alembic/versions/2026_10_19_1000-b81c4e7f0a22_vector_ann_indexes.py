@@ -0,0 +1,47 @@
+"""HNSW indexes on AI embedding columns
+
+Revision ID: b81c4e7f0a22
+Revises: 7a3e9d5b2c14
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b81c4e7f0a22'
+down_revision = '7a3e9d5b2c14'
+branch_labels = None
+depends_on = None
+
+# OpenAI-style embeddings are unit length, so cosine distance is the natural metric
+HNSW_INDEXES = [
+    ('ix_ai_insights_embedding_hnsw', 'ai_insights'),
+    ('ix_ai_queries_embedding_hnsw', 'ai_queries'),
+    ('ix_metric_embeddings_embedding_hnsw', 'metric_embeddings'),
+]
+
+
+def upgrade() -> None:
+    for name, table in HNSW_INDEXES:
+        op.create_index(
+            name, table, ['embedding'], unique=False,
+            postgresql_using='hnsw',
+            postgresql_with={'m': 16, 'ef_construction': 64},
+            postgresql_ops={'embedding': 'vector_cosine_ops'},
+        )
+
+    # Tenant pre-filters for exact search on small candidate sets
+    op.create_index('ix_ai_insights_org_site', 'ai_insights', ['organization_id', 'site_id'], unique=False)
+    op.create_index(
+        'ix_metric_embeddings_device_period', 'metric_embeddings',
+        ['device_id', 'time_period_start'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_metric_embeddings_device_period', table_name='metric_embeddings')
+    op.drop_index('ix_ai_insights_org_site', table_name='ai_insights')
+    for name, table in reversed(HNSW_INDEXES):
+        op.drop_index(name, table_name=table)
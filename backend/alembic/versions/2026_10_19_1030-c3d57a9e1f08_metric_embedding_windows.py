@@ -0,0 +1,35 @@
+"""Unique metric embedding windows and per-device metric time index
+
+Revision ID: c3d57a9e1f08
+Revises: b81c4e7f0a22
+Create Date: 2026-10-19 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3d57a9e1f08'
+down_revision = 'b81c4e7f0a22'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # One embedding per device window; lets the pipeline insert with ON CONFLICT DO NOTHING
+    op.drop_index('ix_metric_embeddings_device_period', table_name='metric_embeddings')
+    op.create_index(
+        'uq_metric_embeddings_device_period', 'metric_embeddings',
+        ['device_id', 'time_period_start'], unique=True
+    )
+    op.create_index('ix_device_metrics_device_timestamp', 'device_metrics', ['device_id', 'timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_device_metrics_device_timestamp', table_name='device_metrics')
+    op.drop_index('uq_metric_embeddings_device_period', table_name='metric_embeddings')
+    op.create_index(
+        'ix_metric_embeddings_device_period', 'metric_embeddings',
+        ['device_id', 'time_period_start'], unique=False
+    )
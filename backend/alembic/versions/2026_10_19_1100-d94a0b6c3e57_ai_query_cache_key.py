@@ -0,0 +1,26 @@
+"""Semantic cache key on AI queries
+
+Revision ID: d94a0b6c3e57
+Revises: c3d57a9e1f08
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd94a0b6c3e57'
+down_revision = 'c3d57a9e1f08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('ai_queries', sa.Column('cache_key', sa.String(length=64), nullable=True))
+    op.create_index('ix_ai_queries_cache_key_created_at', 'ai_queries', ['cache_key', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ai_queries_cache_key_created_at', table_name='ai_queries')
+    op.drop_column('ai_queries', 'cache_key')
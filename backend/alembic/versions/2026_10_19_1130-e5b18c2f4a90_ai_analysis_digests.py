@@ -0,0 +1,42 @@
+"""AI analysis per-site digests (job checkpoints)
+
+Revision ID: e5b18c2f4a90
+Revises: d94a0b6c3e57
+Create Date: 2026-10-19 11:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b18c2f4a90'
+down_revision = 'd94a0b6c3e57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('ai_analysis_digests',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('run_date', sa.Date(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('site_id', sa.Integer(), nullable=False),
+    sa.Column('digest_json', sa.JSON(), nullable=False),
+    sa.Column('insight_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['insight_id'], ['ai_insights.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['site_id'], ['sites.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ai_analysis_digests_id'), 'ai_analysis_digests', ['id'], unique=False)
+    op.create_index('uq_ai_analysis_digests_run_site', 'ai_analysis_digests', ['run_date', 'site_id'], unique=True)
+    op.create_index('ix_ai_analysis_digests_run_org', 'ai_analysis_digests', ['run_date', 'organization_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ai_analysis_digests_run_org', table_name='ai_analysis_digests')
+    op.drop_index('uq_ai_analysis_digests_run_site', table_name='ai_analysis_digests')
+    op.drop_index(op.f('ix_ai_analysis_digests_id'), table_name='ai_analysis_digests')
+    op.drop_table('ai_analysis_digests')
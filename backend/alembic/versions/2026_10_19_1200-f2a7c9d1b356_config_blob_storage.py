@@ -0,0 +1,104 @@
+"""Content-addressed config blob storage
+
+Revision ID: f2a7c9d1b356
+Revises: e5b18c2f4a90
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+import hashlib
+import re
+
+from alembic import op
+import sqlalchemy as sa
+import zstandard
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a7c9d1b356'
+down_revision = 'e5b18c2f4a90'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+# Frozen copy of app.services.config_store normalization as of this revision
+_EXPORT_TIMESTAMP = re.compile(r"^#\s*\S+\s+\d{1,2}:\d{2}:\d{2}\s+by RouterOS\b.*$")
+
+
+def _normalize_export(export: str) -> str:
+    lines = [line.rstrip() for line in export.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+    if lines and _EXPORT_TIMESTAMP.match(lines[0]):
+        lines = lines[1:]
+    while lines and not lines[-1]:
+        lines.pop()
+    return "\n".join(lines) + "\n"
+
+
+def upgrade() -> None:
+    op.create_table('config_blobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('compressed_size_bytes', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sha256')
+    )
+    op.create_index(op.f('ix_config_blobs_id'), 'config_blobs', ['id'], unique=False)
+    op.add_column('device_configs', sa.Column('blob_id', sa.Integer(), nullable=True))
+    op.add_column('device_configs', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+    # Move existing exports into blobs
+    conn = op.get_bind()
+    compressor = zstandard.ZstdCompressor(level=10)
+    last_id = 0
+    while True:
+        rows = conn.execute(sa.text(
+            "SELECT id, config_data FROM device_configs WHERE id > :last_id ORDER BY id LIMIT :limit"
+        ), {"last_id": last_id, "limit": BATCH_SIZE}).all()
+        if not rows:
+            break
+        for config_id, config_data in rows:
+            raw = _normalize_export(config_data).encode()
+            digest = hashlib.sha256(raw).hexdigest()
+            data = compressor.compress(raw)
+            blob_id = conn.execute(sa.text(
+                "INSERT INTO config_blobs (sha256, data, size_bytes, compressed_size_bytes) "
+                "VALUES (:sha256, :data, :size, :compressed) "
+                "ON CONFLICT (sha256) DO UPDATE SET sha256 = EXCLUDED.sha256 RETURNING id"
+            ), {"sha256": digest, "data": data, "size": len(raw), "compressed": len(data)}).scalar()
+            conn.execute(sa.text(
+                "UPDATE device_configs SET blob_id = :blob_id, content_hash = :digest WHERE id = :id"
+            ), {"blob_id": blob_id, "digest": digest, "id": config_id})
+        last_id = rows[-1][0]
+
+    op.alter_column('device_configs', 'blob_id', nullable=False)
+    op.alter_column('device_configs', 'content_hash', nullable=False)
+    op.create_foreign_key(
+        'device_configs_blob_id_fkey', 'device_configs', 'config_blobs', ['blob_id'], ['id'], ondelete='RESTRICT'
+    )
+    op.create_index(op.f('ix_device_configs_blob_id'), 'device_configs', ['blob_id'], unique=False)
+    op.create_index('ix_device_configs_device_created_at', 'device_configs', ['device_id', 'created_at'], unique=False)
+    op.drop_column('device_configs', 'config_data')
+
+
+def downgrade() -> None:
+    op.add_column('device_configs', sa.Column('config_data', sa.Text(), nullable=True))
+    conn = op.get_bind()
+    decompressor = zstandard.ZstdDecompressor()
+    for blob_id, data in conn.execute(sa.text(
+        "SELECT id, data FROM config_blobs WHERE id IN (SELECT DISTINCT blob_id FROM device_configs)"
+    )):
+        conn.execute(sa.text("UPDATE device_configs SET config_data = :text WHERE blob_id = :blob_id"), {
+            # Backups streamed since this revision have no content size in the frame header
+            "text": decompressor.decompressobj().decompress(data).decode(), "blob_id": blob_id,
+        })
+    op.alter_column('device_configs', 'config_data', nullable=False)
+    op.drop_index('ix_device_configs_device_created_at', table_name='device_configs')
+    op.drop_index(op.f('ix_device_configs_blob_id'), table_name='device_configs')
+    op.drop_constraint('device_configs_blob_id_fkey', 'device_configs', type_='foreignkey')
+    op.drop_column('device_configs', 'content_hash')
+    op.drop_column('device_configs', 'blob_id')
+    op.drop_index(op.f('ix_config_blobs_id'), table_name='config_blobs')
+    op.drop_table('config_blobs')
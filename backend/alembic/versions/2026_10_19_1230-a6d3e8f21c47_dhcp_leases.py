@@ -0,0 +1,63 @@
+"""Fleet-wide DHCP lease index
+
+Revision ID: a6d3e8f21c47
+Revises: f2a7c9d1b356
+Create Date: 2026-10-19 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d3e8f21c47'
+down_revision = 'f2a7c9d1b356'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('dhcp_leases',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('device_id', sa.Integer(), nullable=False),
+    sa.Column('site_id', sa.Integer(), nullable=False),
+    sa.Column('ros_id', sa.String(length=32), nullable=False),
+    sa.Column('mac_address', sa.String(length=17), nullable=True),
+    sa.Column('ip_address', sa.String(length=45), nullable=True),
+    sa.Column('host_name', sa.String(length=255), nullable=True),
+    sa.Column('status', sa.String(length=32), nullable=True),
+    sa.Column('server', sa.String(length=100), nullable=True),
+    sa.Column('is_dynamic', sa.Boolean(), nullable=True),
+    sa.Column('comment', sa.Text(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('fingerprint', sa.String(length=16), nullable=False),
+    sa.Column('first_seen_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['device_id'], ['devices.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['site_id'], ['sites.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_dhcp_leases_id'), 'dhcp_leases', ['id'], unique=False)
+    op.create_index(op.f('ix_dhcp_leases_site_id'), 'dhcp_leases', ['site_id'], unique=False)
+    op.create_index('uq_dhcp_leases_device_ros_id', 'dhcp_leases', ['device_id', 'ros_id'], unique=True)
+    op.create_index(
+        'ix_dhcp_leases_mac_prefix', 'dhcp_leases', ['mac_address'], unique=False,
+        postgresql_ops={'mac_address': 'varchar_pattern_ops'}
+    )
+    op.create_index(
+        'ix_dhcp_leases_ip_prefix', 'dhcp_leases', ['ip_address'], unique=False,
+        postgresql_ops={'ip_address': 'varchar_pattern_ops'}
+    )
+    op.create_index(
+        'ix_dhcp_leases_host_name_prefix', 'dhcp_leases', [sa.text('lower(host_name) varchar_pattern_ops')], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_dhcp_leases_host_name_prefix', table_name='dhcp_leases')
+    op.drop_index('ix_dhcp_leases_ip_prefix', table_name='dhcp_leases')
+    op.drop_index('ix_dhcp_leases_mac_prefix', table_name='dhcp_leases')
+    op.drop_index('uq_dhcp_leases_device_ros_id', table_name='dhcp_leases')
+    op.drop_index(op.f('ix_dhcp_leases_site_id'), table_name='dhcp_leases')
+    op.drop_index(op.f('ix_dhcp_leases_id'), table_name='dhcp_leases')
+    op.drop_table('dhcp_leases')
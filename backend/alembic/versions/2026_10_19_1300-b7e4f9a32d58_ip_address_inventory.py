@@ -0,0 +1,47 @@
+"""Fleet-wide IP address inventory
+
+Revision ID: b7e4f9a32d58
+Revises: a6d3e8f21c47
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e4f9a32d58'
+down_revision = 'a6d3e8f21c47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('ip_addresses',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('device_id', sa.Integer(), nullable=False),
+    sa.Column('site_id', sa.Integer(), nullable=False),
+    sa.Column('ros_id', sa.String(length=32), nullable=False),
+    sa.Column('address', sa.String(length=49), nullable=False),
+    sa.Column('network', sa.String(length=49), nullable=False),
+    sa.Column('interface', sa.String(length=100), nullable=True),
+    sa.Column('is_dynamic', sa.Boolean(), nullable=True),
+    sa.Column('is_disabled', sa.Boolean(), nullable=True),
+    sa.Column('is_invalid', sa.Boolean(), nullable=True),
+    sa.Column('comment', sa.Text(), nullable=True),
+    sa.Column('first_seen_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['device_id'], ['devices.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['site_id'], ['sites.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ip_addresses_id'), 'ip_addresses', ['id'], unique=False)
+    op.create_index(op.f('ix_ip_addresses_site_id'), 'ip_addresses', ['site_id'], unique=False)
+    op.create_index('uq_ip_addresses_device_ros_id', 'ip_addresses', ['device_id', 'ros_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_ip_addresses_device_ros_id', table_name='ip_addresses')
+    op.drop_index(op.f('ix_ip_addresses_site_id'), table_name='ip_addresses')
+    op.drop_index(op.f('ix_ip_addresses_id'), table_name='ip_addresses')
+    op.drop_table('ip_addresses')
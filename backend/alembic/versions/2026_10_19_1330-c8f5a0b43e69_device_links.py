@@ -0,0 +1,58 @@
+"""Device links from neighbor discovery
+
+Revision ID: c8f5a0b43e69
+Revises: b7e4f9a32d58
+Create Date: 2026-10-19 13:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8f5a0b43e69'
+down_revision = 'b7e4f9a32d58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('device_links',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('device_id', sa.Integer(), nullable=False),
+    sa.Column('site_id', sa.Integer(), nullable=False),
+    sa.Column('source', sa.String(length=20), nullable=False),
+    sa.Column('interface_id', sa.Integer(), nullable=True),
+    sa.Column('interface_name', sa.String(length=255), nullable=False),
+    sa.Column('neighbor_mac', sa.String(length=17), nullable=False),
+    sa.Column('neighbor_address', sa.String(length=45), nullable=True),
+    sa.Column('neighbor_identity', sa.String(length=255), nullable=True),
+    sa.Column('neighbor_platform', sa.String(length=100), nullable=True),
+    sa.Column('neighbor_board', sa.String(length=100), nullable=True),
+    sa.Column('neighbor_interface_name', sa.String(length=255), nullable=True),
+    sa.Column('neighbor_device_id', sa.Integer(), nullable=True),
+    sa.Column('neighbor_interface_id', sa.Integer(), nullable=True),
+    sa.Column('first_seen_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['device_id'], ['devices.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['site_id'], ['sites.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['interface_id'], ['interfaces.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['neighbor_device_id'], ['devices.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['neighbor_interface_id'], ['interfaces.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_device_links_id'), 'device_links', ['id'], unique=False)
+    op.create_index(op.f('ix_device_links_site_id'), 'device_links', ['site_id'], unique=False)
+    op.create_index(op.f('ix_device_links_neighbor_device_id'), 'device_links', ['neighbor_device_id'], unique=False)
+    op.create_index(
+        'uq_device_links_device_neighbor', 'device_links',
+        ['device_id', 'interface_name', 'neighbor_mac', 'source'], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_device_links_device_neighbor', table_name='device_links')
+    op.drop_index(op.f('ix_device_links_neighbor_device_id'), table_name='device_links')
+    op.drop_index(op.f('ix_device_links_site_id'), table_name='device_links')
+    op.drop_index(op.f('ix_device_links_id'), table_name='device_links')
+    op.drop_table('device_links')
@@ -0,0 +1,129 @@
+"""
+IP address inventory API endpoints
+Answered from the in-memory prefix tree; no router calls. The tree is
+fetched in a threadpool because an expired one is rebuilt from the
+database on the way.
+"""
+from typing import Optional
+import ipaddress
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.core.database import get_read_db
+from app.schemas.address import (
+    AddressLookupResponse,
+    AddressOwner,
+    PrefixQueryResponse,
+    SubnetOverlap,
+    SubnetOverlapResponse
+)
+from app.services.ip_inventory import ip_inventory_cache
+
+router = APIRouter(prefix="/api/v1/addresses", tags=["addresses"])
+
+
+def _in_tenant(entry, organization_id: Optional[int], client_id: Optional[int]) -> bool:
+    if organization_id is not None and entry.organization_id != organization_id:
+        return False
+    if client_id is not None and entry.client_id != client_id:
+        return False
+    return True
+
+
+@router.get("/lookup", response_model=AddressLookupResponse)
+async def lookup_address(
+    ip: str = Query(..., description="IPv4 or IPv6 address, e.g. 10.20.4.17"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Which device and interface own an address
+    
+    - **ip**: Address to look up
+    
+    Returns interfaces configured with exactly this address, and the
+    interfaces attached to the most specific network containing it.
+    """
+    inventory = await run_in_threadpool(ip_inventory_cache.get, db)
+    try:
+        owners, network_owners = inventory.lookup(ip)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid IP address: {ip}")
+    return AddressLookupResponse(
+        ip=ip,
+        owners=[AddressOwner(**entry.to_dict()) for entry in owners],
+        network=network_owners[0].network.with_prefixlen if network_owners else None,
+        network_owners=[AddressOwner(**entry.to_dict()) for entry in network_owners]
+    )
+
+
+@router.get("/prefixes", response_model=PrefixQueryResponse)
+async def query_prefix(
+    prefix: str = Query(..., description="Network, e.g. 10.20.0.0/16"),
+    relation: str = Query("overlapping", pattern="^(within|containing|overlapping)$"),
+    organization_id: Optional[int] = None,
+    client_id: Optional[int] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Inventory addresses whose networks relate to a prefix
+    
+    - **prefix**: Network to test
+    - **relation**: within (subnets of prefix), containing (supernets) or overlapping (either)
+    - **organization_id** / **client_id**: Narrow to a tenant
+    - **limit**: Maximum addresses returned
+    """
+    try:
+        network = ipaddress.ip_network(prefix, strict=False)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid prefix: {prefix}")
+
+    tree = (await run_in_threadpool(ip_inventory_cache.get, db)).tree
+    if relation == "within":
+        entries = tree.subnets(network)
+    elif relation == "containing":
+        entries = tree.supernets(network)
+    else:
+        entries = tree.overlapping(network)
+
+    addresses = []
+    for entry in entries:
+        if _in_tenant(entry, organization_id, client_id):
+            addresses.append(AddressOwner(**entry.to_dict()))
+            if len(addresses) >= limit:
+                break
+    return PrefixQueryResponse(prefix=network.with_prefixlen, relation=relation, addresses=addresses)
+
+
+@router.get("/overlaps", response_model=SubnetOverlapResponse)
+async def list_overlaps(
+    organization_id: Optional[int] = None,
+    client_id: Optional[int] = None,
+    limit: int = Query(500, ge=1, le=10000),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Subnets that overlap across clients
+    
+    - **organization_id** / **client_id**: Only overlaps involving this tenant
+    - **limit**: Maximum overlaps returned
+    
+    Each overlap lists the network together with the addresses in it and in
+    every network enclosing it, so both sides of the collision are shown.
+    """
+    inventory = await run_in_threadpool(ip_inventory_cache.get, db)
+    overlaps = []
+    total = 0
+    for network, entries in inventory.tree.conflicts():
+        if not any(_in_tenant(entry, organization_id, client_id) for entry in entries):
+            continue
+        total += 1
+        if len(overlaps) < limit:
+            overlaps.append(SubnetOverlap(
+                network=network.with_prefixlen,
+                client_ids=sorted({entry.client_id for entry in entries}),
+                addresses=[AddressOwner(**entry.to_dict()) for entry in entries]
+            ))
+    return SubnetOverlapResponse(total=total, overlaps=overlaps)
@@ -0,0 +1,52 @@
+"""
+Operational admin API endpoints
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+import hmac
+
+from app.core.config import settings
+from app.core.profiler import profile_event_loop, profile_lock
+
+router = APIRouter(prefix="/api/v1/admin", tags=["admin"])
+
+
+def require_admin(request: Request):
+    """Allow the request only with ``Authorization: Bearer <ADMIN_API_TOKEN>``"""
+    if not settings.ADMIN_API_TOKEN:
+        # Admin endpoints do not exist until a token is configured
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.ADMIN_API_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Admin token required", headers={"WWW-Authenticate": "Bearer"})
+
+
+@router.post("/profile", dependencies=[Depends(require_admin)])
+async def profile_worker(
+    seconds: float = Query(10, gt=0),
+    interval_ms: float = Query(10, ge=1, le=1000),
+    format: str = Query("json", pattern="^(json|collapsed)$"),
+):
+    """
+    Profile the worker process handling this request
+
+    Samples every thread's stack for **seconds** and attributes event loop
+    time to coroutines. With several workers, each request profiles
+    whichever worker accepted it.
+
+    - **interval_ms**: Sampling interval (10ms is about 100 samples/s)
+    - **format**: ``json`` (collapsed stacks plus event loop breakdown) or
+      ``collapsed`` (plain text for flamegraph.pl, inferno or speedscope)
+    """
+    if seconds > settings.PROFILER_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be at most {settings.PROFILER_MAX_SECONDS}")
+    if not profile_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A profile is already running in this worker")
+    try:
+        profiler = await profile_event_loop(seconds, interval_ms / 1000)
+    finally:
+        profile_lock.release()
+
+    if format == "collapsed":
+        return PlainTextResponse(profiler.collapsed())
+    return profiler.result()
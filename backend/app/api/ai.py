@@ -0,0 +1,190 @@
+"""
+AI API endpoints
+"""
+import json
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal, get_db, get_read_db
+from app.models.ai import AIInsight, AIQuery, MetricEmbedding
+from app.models.user import User
+from app.schemas.ai import AskRequest, SemanticSearchRequest, SemanticSearchResponse, SemanticSearchHit
+from app.services.ai_cache import semantic_cache
+from app.services.embeddings import EmbeddingError, get_embedder
+from app.services.llm import LLMError, llm_gateway
+from app.services.vector_search import VectorSearchError, search
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/v1/ai", tags=["ai"])
+
+ASSISTANT_PROMPT = (
+    "You are a network operations assistant for a fleet of MikroTik routers. "
+    "Answer concisely and concretely; say so when the data needed is not available."
+)
+
+# Ends an /ask stream that failed after the answer had started
+STREAM_ERROR_MARKER = "\n[error] "
+
+
+def _to_hit(row, distance: float) -> SemanticSearchHit:
+    """Map a search result row to its response shape"""
+    if isinstance(row, AIInsight):
+        return SemanticSearchHit(
+            id=row.id, distance=distance, text=row.summary,
+            organization_id=row.organization_id, site_id=row.site_id, created_at=row.created_at
+        )
+    if isinstance(row, AIQuery):
+        return SemanticSearchHit(
+            id=row.id, distance=distance, text=row.query_text, created_at=row.created_at
+        )
+    return SemanticSearchHit(
+        id=row.id, distance=distance, text=row.summary_text,
+        device_id=row.device_id, created_at=row.time_period_start
+    )
+
+
+@router.post("/search", response_model=SemanticSearchResponse)
+async def semantic_search(
+    request: SemanticSearchRequest,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Semantic k-NN search over AI insights, past queries or metric summaries
+    
+    - **target**: insights, queries or metrics
+    - **query_text**: Text to embed with the configured embedder, or
+    - **embedding**: Query vector (1536 dimensions)
+    - **organization_id** / **site_id** / **device_id**: Tenant filters applied before ranking
+    - **ef_search** / **probes**: Index recall/latency trade-off
+    - **exact**: Force exact or approximate search (default: chosen by candidate count)
+    """
+    embedding = request.embedding
+    if embedding is None:
+        if not request.query_text:
+            raise HTTPException(status_code=400, detail="Provide query_text or embedding")
+        try:
+            # OpenAIEmbedder is a blocking HTTP call; keep it off the event loop
+            embedding = await run_in_threadpool(get_embedder().embed_one, request.query_text)
+        except EmbeddingError as e:
+            raise HTTPException(status_code=502, detail=str(e))
+
+    try:
+        results = search(
+            db,
+            request.target.value,
+            embedding,
+            k=request.k,
+            organization_id=request.organization_id,
+            site_id=request.site_id,
+            device_id=request.device_id,
+            ef_search=request.ef_search,
+            probes=request.probes,
+            exact=request.exact,
+        )
+    except VectorSearchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return SemanticSearchResponse(
+        target=request.target,
+        results=[_to_hit(row, distance) for row, distance in results]
+    )
+
+
+def _record_answer(request: AskRequest, completion, embedding, key):
+    """Store a streamed answer with its usage so similar questions can reuse it"""
+    db = SessionLocal()
+    try:
+        semantic_cache.record(
+            db, request.user_id, request.question, completion.text, embedding, key, request.context,
+            ai_provider=completion.provider,
+            ai_model=completion.model,
+            tokens_used=completion.tokens_used,
+            response_time_ms=completion.response_time_ms,
+        )
+    finally:
+        db.close()
+
+
+@router.post("/ask")
+async def ask(
+    request: AskRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Ask the AI assistant a question; the answer is streamed as plain text
+    
+    - **user_id**: Asking user
+    - **question**: Question text
+    - **context**: Optional context (site_id, device_ids, ...) sent to the model and used as cache partition
+    - **provider** / **model**: Optional LLM override
+    
+    Answers to sufficiently similar recent questions are served from the
+    semantic cache (response header X-AI-Cache: hit).
+
+    Provider errors before the first token are returned as 502/503. If the
+    model fails after the answer has started, the stream ends with a line
+    starting with ``[error]``.
+    """
+    user = db.get(User, request.user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    try:
+        cached, embedding, key = await run_in_threadpool(
+            semantic_cache.lookup, db, user.organization_id, request.question, request.context
+        )
+    except EmbeddingError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+    if cached:
+        return StreamingResponse(
+            iter([cached.response_text]),
+            media_type="text/plain; charset=utf-8",
+            headers={"X-AI-Cache": "hit", "X-AI-Cache-Query-Id": str(cached.query_id)},
+        )
+
+    system = ASSISTANT_PROMPT
+    if request.context:
+        system += f"\n\nContext: {json.dumps(request.context, default=str)}"
+    try:
+        completion = llm_gateway.stream(
+            [{"role": "user", "content": request.question}],
+            provider=request.provider,
+            model=request.model,
+            system=system,
+        )
+    except LLMError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    # Wait for the first delta so upstream HTTP errors and connection
+    # failures are still reported with a status code
+    deltas = completion.__aiter__()
+    try:
+        first = await deltas.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except LLMError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+    async def body():
+        try:
+            if first is not None:
+                yield first
+                async for delta in deltas:
+                    yield delta
+        except LLMError as e:
+            # Headers are already sent: mark the answer as cut short and keep it out of the cache
+            logger.error(f"AI answer stream failed: {str(e)}")
+            yield f"{STREAM_ERROR_MARKER}{str(e)}\n"
+            return
+        finally:
+            await deltas.aclose()
+        if completion.text:
+            await run_in_threadpool(_record_answer, request, completion, embedding, key)
+
+    return StreamingResponse(body(), media_type="text/plain; charset=utf-8", headers={"X-AI-Cache": "miss"})
@@ -0,0 +1,124 @@
+"""
+Configuration backup diff API endpoints
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core.database import get_read_db
+from app.models.device import Device, DeviceConfig
+from app.schemas.config import (
+    ConfigChangesResponse,
+    ConfigCompareRequest,
+    ConfigCompareResponse,
+    DeviceConfigComparison,
+    SectionDiffResponse
+)
+from app.services.config_diff import config_diff_engine
+from app.services.tenancy import tenant_scope
+
+router = APIRouter(prefix="/api/v1/configs", tags=["configs"])
+
+
+@router.get("/devices/{device_id}/changes", response_model=ConfigChangesResponse)
+async def get_config_changes(
+    device_id: int,
+    hours: int = Query(24, ge=1, le=24 * 365, description="Compare against the backup from this many hours ago"),
+    section: Optional[list[str]] = Query(None, description="Limit to sections with these prefixes"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    What changed in a device's configuration over a period
+    
+    - **device_id**: Device ID
+    - **hours**: Baseline is the last backup at or before now minus this many hours
+    - **section**: Optional section prefix filter (repeatable)
+    """
+    if not db.get(Device, device_id):
+        raise HTTPException(status_code=404, detail="Device not found")
+
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    result = config_diff_engine.changes_since(db, device_id, since, tuple(section) if section else None)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Device has no configuration backups")
+
+    baseline, latest, diff = result
+    return ConfigChangesResponse(
+        device_id=device_id,
+        baseline_config_id=baseline.id,
+        baseline_created_at=baseline.created_at,
+        latest_config_id=latest.id,
+        latest_created_at=latest.created_at,
+        identical=diff.identical,
+        lines_added=diff.lines_added,
+        lines_removed=diff.lines_removed,
+        sections=[SectionDiffResponse(**s.to_dict()) for s in diff.sections]
+    )
+
+
+@router.post("/compare", response_model=ConfigCompareResponse)
+async def compare_configs(
+    request: ConfigCompareRequest,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Compare a golden template against many devices' latest backups
+    
+    - **template_config_id** or **template_text**: The template
+    - **device_ids**, or **organization_id** / **client_id** / **site_id**: Devices to compare
+    - **sections**: Optional section prefix filter
+    - **include_lines**: Include changed lines per device (template -> device)
+    """
+    if request.template_config_id is not None:
+        config = db.get(DeviceConfig, request.template_config_id)
+        if not config:
+            raise HTTPException(status_code=404, detail="Template config not found")
+        template = config_diff_engine.parsed(db, [config.content_hash])[config.content_hash]
+    elif request.template_text:
+        template = config_diff_engine.parse_text(request.template_text)
+    else:
+        raise HTTPException(status_code=400, detail="Provide template_config_id or template_text")
+
+    if request.device_ids is not None:
+        device_ids = request.device_ids
+    elif request.organization_id is not None or request.client_id is not None or request.site_id is not None:
+        device_ids = list(tenant_scope(
+            db,
+            organization_id=request.organization_id,
+            client_id=request.client_id,
+            site_id=request.site_id
+        ).device_ids)
+    else:
+        raise HTTPException(status_code=400, detail="Provide device_ids or an organization, client or site")
+
+    sections = tuple(request.sections) if request.sections else None
+    diffs = config_diff_engine.compare_fleet(db, template, device_ids, sections)
+
+    results = []
+    for device_id in device_ids:
+        diff = diffs[device_id]
+        if diff is None:
+            results.append(DeviceConfigComparison(device_id=device_id, has_backup=False))
+            continue
+        results.append(DeviceConfigComparison(
+            device_id=device_id,
+            has_backup=True,
+            identical=diff.identical,
+            lines_added=diff.lines_added,
+            lines_removed=diff.lines_removed,
+            changed_sections=[s.section for s in diff.sections],
+            sections=[SectionDiffResponse(**s.to_dict()) for s in diff.sections] if request.include_lines else None
+        ))
+
+    identical = sum(1 for r in results if r.identical)
+    without_backup = sum(1 for r in results if not r.has_backup)
+    return ConfigCompareResponse(
+        template_hash=template.sha256,
+        devices=len(results),
+        identical=identical,
+        different=len(results) - identical - without_backup,
+        without_backup=without_backup,
+        results=results
+    )
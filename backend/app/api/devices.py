@@ -1,15 +1,28 @@
 """
 Device management API endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import Optional
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import asyncio
+import csv
+import io
+import json
 
-from app.core.database import get_db
+from app.core import tracing
+from app.core.config import settings
+from app.core.database import SessionLocal, get_db, get_read_db
 from app.models.device import Device
+from app.models.site import Site
 from app.schemas.device import (
+    DeviceBulkCreate,
     DeviceCreate,
     DeviceUpdate,
     DeviceResponse,
@@ -17,24 +30,51 @@ from app.schemas.device import (
     DeviceTestConnectionResponse
 )
 from app.services.mikrotik import MikroTikService, MikroTikConnectionError
+from app.services.tenancy import tenant_scope
 from cryptography.fernet import Fernet
 import os
 
 router = APIRouter(prefix="/api/v1/devices", tags=["devices"])
 
-# Encryption key for device passwords (should be in env var in production)
-ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY", Fernet.generate_key())
-cipher = Fernet(ENCRYPTION_KEY)
+
+@lru_cache(maxsize=None)
+def get_cipher() -> Fernet:
+    """
+    Fernet cipher for device passwords, built on first use
+
+    The key comes from ENCRYPTION_KEY (required in production); without
+    it a random per-process key is generated.
+    """
+    return Fernet(os.getenv("ENCRYPTION_KEY") or Fernet.generate_key())
 
 
 def encrypt_password(password: str) -> str:
     """Encrypt device password"""
-    return cipher.encrypt(password.encode()).decode()
+    return get_cipher().encrypt(password.encode()).decode()
 
 
 def decrypt_password(encrypted: str) -> str:
     """Decrypt device password"""
-    return cipher.decrypt(encrypted.encode()).decode()
+    with tracing.span("decrypt_password"):
+        return get_cipher().decrypt(encrypted.encode()).decode()
+
+
+def device_from_probe(device_data: DeviceCreate, connection_result: dict) -> Device:
+    """Build a Device record from create data and a successful connection test"""
+    return Device(
+        name=device_data.name,
+        ip_address=device_data.ip_address,
+        port=device_data.port,
+        username=device_data.username,
+        encrypted_password=encrypt_password(device_data.password),
+        device_type=device_data.device_type.value,
+        model=device_data.model or connection_result.get('platform'),
+        serial_number=None,  # TODO: Extract from device
+        firmware_version=connection_result.get('version'),
+        is_online=True,
+        last_seen_at=datetime.utcnow(),
+        site_id=device_data.site_id
+    )
 
 
 @router.post("", response_model=DeviceResponse, status_code=201)
@@ -68,7 +108,7 @@ async def create_device(
             port=device_data.port,
             use_ssl=device_data.use_ssl
         )
-        connection_result = mt_service.test_connection()
+        connection_result = await run_in_threadpool(mt_service.test_connection)
         
         if not connection_result['success']:
             raise HTTPException(
@@ -77,20 +117,7 @@ async def create_device(
             )
         
         # Create device record with info from MikroTik
-        device = Device(
-            name=device_data.name,
-            ip_address=device_data.ip_address,
-            port=device_data.port,
-            username=device_data.username,
-            encrypted_password=encrypt_password(device_data.password),
-            device_type=device_data.device_type.value,
-            model=device_data.model or connection_result.get('platform'),
-            serial_number=None,  # TODO: Extract from device
-            firmware_version=connection_result.get('version'),
-            is_online=True,
-            last_seen_at=datetime.utcnow(),
-            site_id=device_data.site_id
-        )
+        device = device_from_probe(device_data, connection_result)
         
         db.add(device)
         db.commit()
@@ -104,18 +131,179 @@ async def create_device(
         raise HTTPException(status_code=500, detail=f"Failed to create device: {str(e)}")
 
 
+def _parse_bulk_body(content_type: str, body: bytes, default_site_id: Optional[int]) -> list[dict]:
+    """Device rows from a JSON ({"devices": [...]}) or CSV (header row) body"""
+    if content_type.startswith("text/csv"):
+        try:
+            text = body.decode("utf-8-sig")
+        except UnicodeDecodeError as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"CSV must be UTF-8 encoded (invalid byte at offset {e.start}); re-save it as 'CSV UTF-8'",
+            )
+        rows = []
+        try:
+            for row in csv.DictReader(io.StringIO(text)):
+                row = {key.strip(): value.strip() for key, value in row.items() if key and value not in (None, "")}
+                if default_site_id is not None:
+                    row.setdefault("site_id", default_site_id)
+                rows.append(row)
+        except csv.Error as e:
+            raise HTTPException(status_code=400, detail=f"Malformed CSV: {str(e)}")
+        return rows
+    try:
+        devices = DeviceBulkCreate.model_validate_json(body).devices
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    rows = []
+    for device in devices:
+        row = {key: value for key, value in device.items() if value is not None}
+        if default_site_id is not None:
+            row.setdefault("site_id", default_site_id)
+        rows.append(row)
+    return rows
+
+
+def _insert_devices(devices: list[Device]) -> list[int]:
+    """Insert devices in one transaction and return their IDs"""
+    db = SessionLocal()
+    try:
+        db.add_all(devices)
+        db.flush()
+        ids = [device.id for device in devices]
+        db.commit()
+        return ids
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@router.post("/bulk")
+async def bulk_create_devices(
+    request: Request,
+    site_id: Optional[int] = Query(None, description="Site for rows that do not specify one"),
+    concurrency: int = Query(settings.DEVICE_PROBE_CONCURRENCY, ge=1, le=256, description="Devices probed at once"),
+    db: Session = Depends(get_db)
+):
+    """
+    Onboard many devices at once
+    
+    Accepts `application/json` (`{"devices": [...]}`, same fields as single create)
+    or `text/csv` with a header row of the same field names. Every device is
+    connection-tested concurrently; successes are inserted in one transaction.
+    
+    Results stream back as NDJSON: one line per device as its probe finishes
+    (status `ok`, `failed`, `invalid` or `duplicate`), then a final `summary`
+    line with the created device IDs.
+    
+    - **site_id**: Default site for rows without one
+    - **concurrency**: Maximum simultaneous connection tests
+    """
+    rows = _parse_bulk_body(request.headers.get("content-type", ""), await request.body(), site_id)
+    if not rows:
+        raise HTTPException(status_code=400, detail="No devices provided")
+    if len(rows) > settings.DEVICE_BULK_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {settings.DEVICE_BULK_MAX} devices per request")
+
+    # Validate everything up front so only real candidates are probed
+    results: list[dict] = []
+    candidates: list[tuple[int, DeviceCreate]] = []
+    for index, row in enumerate(rows):
+        try:
+            candidates.append((index, DeviceCreate.model_validate(row)))
+        except ValidationError as e:
+            results.append({
+                "index": index, "ip_address": row.get("ip_address"), "status": "invalid",
+                "error": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            })
+
+    ips = {device.ip_address for _, device in candidates}
+    existing_ips = {ip for (ip,) in db.query(Device.ip_address).filter(Device.ip_address.in_(ips))}
+    site_ids = {device.site_id for _, device in candidates}
+    known_sites = {site for (site,) in db.query(Site.id).filter(Site.id.in_(site_ids))}
+    seen = set()
+    probes: list[tuple[int, DeviceCreate]] = []
+    for index, device in candidates:
+        if device.ip_address in existing_ips or device.ip_address in seen:
+            results.append({"index": index, "ip_address": device.ip_address, "status": "duplicate",
+                            "error": f"Device with IP {device.ip_address} already exists"})
+        elif device.site_id not in known_sites:
+            results.append({"index": index, "ip_address": device.ip_address, "status": "invalid",
+                            "error": f"Site {device.site_id} not found"})
+        else:
+            seen.add(device.ip_address)
+            probes.append((index, device))
+
+    async def stream():
+        for result in results:
+            yield json.dumps(result) + "\n"
+
+        # Router logins block, so probes run on a pool sized to the requested concurrency
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=min(concurrency, max(len(probes), 1)), thread_name_prefix="probe")
+
+        async def probe(index: int, device_data: DeviceCreate):
+            service = MikroTikService(
+                host=device_data.ip_address,
+                username=device_data.username,
+                password=device_data.password,
+                port=device_data.port,
+                use_ssl=device_data.use_ssl
+            )
+            return index, device_data, await loop.run_in_executor(executor, service.test_connection)
+
+        created: list[tuple[int, Device]] = []
+        failed = 0
+        try:
+            for future in asyncio.as_completed([probe(index, device) for index, device in probes]):
+                index, device_data, result = await future
+                line = {"index": index, "ip_address": device_data.ip_address, "name": device_data.name}
+                if result["success"]:
+                    created.append((index, device_from_probe(device_data, result)))
+                    line.update(status="ok", identity=result.get("identity"), version=result.get("version"),
+                                platform=result.get("platform"))
+                else:
+                    failed += 1
+                    line.update(status="failed", error=result.get("error", "Unknown error"))
+                yield json.dumps(line) + "\n"
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        summary = {"type": "summary", "requested": len(rows), "probed": len(probes), "failed": failed,
+                   "skipped": len(results), "created": 0, "devices": []}
+        if created:
+            try:
+                ids = await run_in_threadpool(_insert_devices, [device for _, device in created])
+                summary["created"] = len(ids)
+                summary["devices"] = [
+                    {"index": index, "id": device_id, "ip_address": device.ip_address}
+                    for (index, device), device_id in zip(created, ids)
+                ]
+            except Exception as e:
+                summary["error"] = f"Failed to create devices: {str(e)}"
+        yield json.dumps(summary) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @router.get("", response_model=DeviceListResponse)
 async def list_devices(
+    organization_id: Optional[int] = Query(None, description="Filter by organization ID"),
+    client_id: Optional[int] = Query(None, description="Filter by client ID"),
     site_id: Optional[int] = Query(None, description="Filter by site ID"),
     device_type: Optional[str] = Query(None, description="Filter by device type"),
     is_online: Optional[bool] = Query(None, description="Filter by online status"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(50, ge=1, le=100, description="Items per page"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     List all devices with optional filtering and pagination
     
+    - **organization_id**: Filter devices by organization
+    - **client_id**: Filter devices by client
     - **site_id**: Filter devices by site
     - **device_type**: Filter by device type
     - **is_online**: Filter by online status
@@ -125,6 +313,10 @@ async def list_devices(
     query = db.query(Device)
     
     # Apply filters
+    if organization_id is not None or client_id is not None:
+        # Resolved from the cached tenant hierarchy: one indexed site_id = ANY(...) filter
+        scope = tenant_scope(db, organization_id=organization_id, client_id=client_id)
+        query = query.filter(scope.site_filter(Device.site_id))
     if site_id is not None:
         query = query.filter(Device.site_id == site_id)
     if device_type:
@@ -150,7 +342,7 @@ async def list_devices(
 @router.get("/{device_id}", response_model=DeviceResponse)
 async def get_device(
     device_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get a specific device by ID"""
     device = db.query(Device).filter(Device.id == device_id).first()
@@ -230,6 +422,7 @@ async def test_device_connection(
     device = db.query(Device).filter(Device.id == device_id).first()
     if not device:
         raise HTTPException(status_code=404, detail=f"Device {device_id} not found")
+    tracing.set_attributes({"device.id": device.id, "site.id": device.site_id})
     
     try:
         # Decrypt password
@@ -276,7 +469,7 @@ async def test_device_connection(
 @router.get("/{device_id}/status")
 async def get_device_status(
     device_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get quick device status (online/offline, last seen, uptime)
@@ -0,0 +1,51 @@
+"""
+Network discovery API endpoints
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.admin import require_admin
+from app.core.database import get_read_db
+from app.models.device import Device
+from app.schemas.discovery import DiscoveryCandidate, DiscoveryScanRequest, DiscoveryScanResponse
+from app.services.discovery import DiscoveryError, DiscoveryScanner
+
+router = APIRouter(prefix="/api/v1/discovery", tags=["discovery"])
+
+
+@router.post("/scan", response_model=DiscoveryScanResponse, dependencies=[Depends(require_admin)])
+async def scan_network(
+    request: DiscoveryScanRequest,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Sweep IPv4 ranges for RouterOS devices that are not yet managed
+    
+    - **cidrs**: Ranges to sweep (up to a /16 in total)
+    - **ports** / **tls_ports**: API ports to probe (default 8728 and 8729)
+    - **mndp_seconds**: Also listen for MNDP neighbor announcements
+    - **timeout** / **concurrency**: Probe timeout and socket bound
+    - **include_known**: Include devices that already exist
+    
+    Responders are fingerprinted without logging in. Requires the admin
+    token (``Authorization: Bearer <ADMIN_API_TOKEN>``), since it makes the
+    server probe arbitrary networks.
+    """
+    scanner = DiscoveryScanner(
+        concurrency=request.concurrency,
+        timeout=request.timeout,
+        tls_ports=request.tls_ports
+    )
+    try:
+        candidates, stats = await scanner.discover(request.cidrs, request.ports, request.mndp_seconds)
+    except DiscoveryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    ips = [c.ip_address for c in candidates]
+    known = {ip for (ip,) in db.query(Device.ip_address).filter(Device.ip_address.in_(ips))} if ips else set()
+    results = [
+        DiscoveryCandidate(**c.to_dict(), known=c.ip_address in known)
+        for c in candidates
+        if request.include_known or c.ip_address not in known
+    ]
+    return DiscoveryScanResponse(**stats, candidates=results)
@@ -0,0 +1,44 @@
+"""
+DHCP lease lookup API endpoints
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.core.database import get_read_db
+from app.schemas.lease import LeaseResponse
+from app.services.leases import search_leases
+from app.services.tenancy import tenant_scope
+
+router = APIRouter(prefix="/api/v1/leases", tags=["leases"])
+
+
+@router.get("", response_model=list[LeaseResponse])
+async def find_leases(
+    mac: Optional[str] = Query(None, min_length=2, description="MAC address or prefix (any separator)"),
+    ip: Optional[str] = Query(None, min_length=2, description="IP address or prefix, e.g. 10.1.2."),
+    hostname: Optional[str] = Query(None, min_length=1, description="Hostname prefix (case-insensitive)"),
+    organization_id: Optional[int] = None,
+    client_id: Optional[int] = None,
+    site_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=1000),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Find DHCP leases across the whole fleet
+    
+    - **mac**: Full MAC (exact match) or prefix such as an OUI
+    - **ip**: Full address (exact match) or prefix
+    - **hostname**: Hostname prefix
+    - **organization_id** / **client_id** / **site_id**: Narrow to a tenant
+    - **limit**: Maximum leases returned (most recently changed first)
+    
+    Exactly one of mac, ip or hostname is required.
+    """
+    if sum(value is not None for value in (mac, ip, hostname)) != 1:
+        raise HTTPException(status_code=400, detail="Provide exactly one of mac, ip or hostname")
+
+    scope = None
+    if organization_id is not None or client_id is not None or site_id is not None:
+        scope = tenant_scope(db, organization_id=organization_id, client_id=client_id, site_id=site_id)
+    return search_leases(db, mac=mac, ip=ip, hostname=hostname, scope=scope, limit=limit)
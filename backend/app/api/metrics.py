@@ -2,23 +2,27 @@
 Metrics and monitoring API endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from datetime import datetime
 from typing import Optional
 
-from app.core.database import get_db
+from app.core import tracing
+from app.core.database import get_read_db
 from app.models.device import Device
-from app.schemas.device import DeviceMetricsResponse, SystemMetrics, InterfaceStats
+from app.schemas.device import DeviceMetricsResponse
+from app.services.alerting import alert_evaluator
 from app.services.mikrotik import MikroTikService
+from app.services.routeros_records import interface_records, system_record
 from app.api.devices import decrypt_password
 
-router = APIRouter(prefix="/api/v1/metrics", tags=["metrics"])
+router = APIRouter(prefix="/api/v1/metrics", tags=["metrics"], default_response_class=ORJSONResponse)
 
 
 @router.get("/devices/{device_id}/current", response_model=DeviceMetricsResponse)
 async def get_current_metrics(
     device_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get current real-time metrics from a device
@@ -30,6 +34,7 @@ async def get_current_metrics(
     device = db.query(Device).filter(Device.id == device_id).first()
     if not device:
         raise HTTPException(status_code=404, detail=f"Device {device_id} not found")
+    tracing.set_attributes({"device.id": device.id, "site.id": device.site_id})
     
     try:
         # Decrypt password and connect
@@ -41,49 +46,21 @@ async def get_current_metrics(
             password=password,
             port=device.port
         ) as mt:
-            # Get system resources
             resources = mt.get_system_resources()
-            
-            # Parse memory values
-            free_memory = int(resources.get('free-memory', 0))
-            total_memory = int(resources.get('total-memory', 0))
-            memory_used = total_memory - free_memory
-            
-            system_metrics = SystemMetrics(
-                cpu_load=int(resources.get('cpu-load', 0)),
-                memory_used=memory_used,
-                memory_total=total_memory,
-                uptime=resources.get('uptime', 'Unknown'),
-                version=resources.get('version', 'Unknown'),
-                board_name=resources.get('board-name', 'Unknown')
-            )
-            
-            # Get interface statistics
-            interfaces_data = mt.get_interfaces()
-            interface_stats = []
-            
-            for iface in interfaces_data:
-                # Get detailed stats for each interface
-                stats = InterfaceStats(
-                    name=iface.get('name', 'unknown'),
-                    rx_bytes=int(iface.get('rx-byte', 0)),
-                    tx_bytes=int(iface.get('tx-byte', 0)),
-                    rx_packets=int(iface.get('rx-packet', 0)),
-                    tx_packets=int(iface.get('tx-packet', 0)),
-                    rx_errors=int(iface.get('rx-error', 0)),
-                    tx_errors=int(iface.get('tx-error', 0)),
-                    rx_drops=int(iface.get('rx-drop', 0)),
-                    tx_drops=int(iface.get('tx-drop', 0))
-                )
-                interface_stats.append(stats)
-            
-            return DeviceMetricsResponse(
-                device_id=device.id,
-                device_name=device.name,
-                system=system_metrics,
-                interfaces=interface_stats,
-                timestamp=datetime.utcnow()
-            )
+            interfaces = mt.get_interfaces()
+        
+        system = system_record(resources)
+        alert_evaluator.evaluate_system(device.id, system)
+        
+        # Records come straight from the RouterOS reply with the schema's
+        # fields, so skip re-validating them through DeviceMetricsResponse
+        return ORJSONResponse({
+            "device_id": device.id,
+            "device_name": device.name,
+            "system": system,
+            "interfaces": interface_records(interfaces),
+            "timestamp": datetime.utcnow(),
+        })
             
     except Exception as e:
         raise HTTPException(
@@ -95,12 +72,13 @@ async def get_current_metrics(
 @router.get("/devices/{device_id}/interfaces")
 async def get_device_interfaces(
     device_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get list of all interfaces on a device"""
     device = db.query(Device).filter(Device.id == device_id).first()
     if not device:
         raise HTTPException(status_code=404, detail=f"Device {device_id} not found")
+    tracing.set_attributes({"device.id": device.id, "site.id": device.site_id})
     
     try:
         password = decrypt_password(device.encrypted_password)
@@ -139,12 +117,13 @@ async def get_device_interfaces(
 @router.get("/devices/{device_id}/dhcp-leases")
 async def get_dhcp_leases(
     device_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get DHCP leases from a device"""
     device = db.query(Device).filter(Device.id == device_id).first()
     if not device:
         raise HTTPException(status_code=404, detail=f"Device {device_id} not found")
+    tracing.set_attributes({"device.id": device.id, "site.id": device.site_id})
     
     try:
         password = decrypt_password(device.encrypted_password)
@@ -183,12 +162,13 @@ async def get_dhcp_leases(
 @router.get("/devices/{device_id}/ip-addresses")
 async def get_ip_addresses(
     device_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get configured IP addresses on a device"""
     device = db.query(Device).filter(Device.id == device_id).first()
     if not device:
         raise HTTPException(status_code=404, detail=f"Device {device_id} not found")
+    tracing.set_attributes({"device.id": device.id, "site.id": device.site_id})
     
     try:
         password = decrypt_password(device.encrypted_password)
@@ -228,12 +208,13 @@ async def get_ip_addresses(
 @router.get("/devices/{device_id}/system-identity")
 async def get_system_identity(
     device_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get device system identity/hostname"""
     device = db.query(Device).filter(Device.id == device_id).first()
     if not device:
         raise HTTPException(status_code=404, detail=f"Device {device_id} not found")
+    tracing.set_attributes({"device.id": device.id, "site.id": device.site_id})
     
     try:
         password = decrypt_password(device.encrypted_password)
@@ -0,0 +1,147 @@
+"""
+Network topology API endpoints
+Answered from the cached per-site graphs; no router calls. The graphs are
+fetched in a threadpool because a changed site is rebuilt on the way.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.core.database import get_read_db
+from app.schemas.topology import (
+    BlastRadiusResponse,
+    TopologyEdge,
+    TopologyGraphResponse,
+    TopologyHop,
+    TopologyNode,
+    TopologyPathResponse,
+    TopologyPort,
+    UpstreamResponse
+)
+from app.services.tenancy import tenant_cache
+from app.services.topology import SiteTopology, topology_cache
+
+router = APIRouter(prefix="/api/v1/topology", tags=["topology"])
+
+
+def _node(topology: SiteTopology, device_id: int) -> TopologyNode:
+    info = topology.nodes[device_id]
+    return TopologyNode(device_id=device_id, depth=topology.depth.get(device_id), **info)
+
+
+def _ports(topology: SiteTopology, a: int, b: int) -> list[TopologyPort]:
+    return [TopologyPort(a_interface=x, b_interface=y) for x, y in topology.ports(a, b)]
+
+
+async def _device_topology(db: Session, device_id: int) -> SiteTopology:
+    site_id = tenant_cache.get(db).device_site.get(device_id)
+    if site_id is None:
+        raise HTTPException(status_code=404, detail="Device not found")
+    return await run_in_threadpool(topology_cache.get, db, site_id)
+
+
+@router.get("/sites/{site_id}", response_model=TopologyGraphResponse)
+async def get_site_topology(
+    site_id: int,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Adjacency graph of a site
+    
+    - **site_id**: Site ID
+    
+    Includes managed devices in other sites that this site's devices link to.
+    """
+    if site_id not in tenant_cache.get(db).site_client:
+        raise HTTPException(status_code=404, detail="Site not found")
+    topology = await run_in_threadpool(topology_cache.get, db, site_id)
+    edges = [
+        TopologyEdge(a=a, b=b, ports=_ports(topology, a, b))
+        for a, neighbors in sorted(topology.adjacency.items())
+        for b in sorted(neighbors)
+        if a < b
+    ]
+    return TopologyGraphResponse(
+        site_id=site_id,
+        roots=topology.roots,
+        nodes=[_node(topology, device_id) for device_id in sorted(topology.nodes)],
+        edges=edges,
+        unreachable=topology.unreachable()
+    )
+
+
+@router.get("/sites/{site_id}/path", response_model=TopologyPathResponse)
+async def get_path(
+    site_id: int,
+    source: int = Query(..., description="Source device ID"),
+    target: int = Query(..., description="Target device ID"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Fewest-hop path between two devices of a site
+    
+    - **site_id**: Site ID
+    - **source** / **target**: Device IDs
+    """
+    if site_id not in tenant_cache.get(db).site_client:
+        raise HTTPException(status_code=404, detail="Site not found")
+    topology = await run_in_threadpool(topology_cache.get, db, site_id)
+    if source not in topology.nodes or target not in topology.nodes:
+        raise HTTPException(status_code=404, detail="Device not in this site's topology")
+    path = topology.path(source, target)
+    if path is None:
+        raise HTTPException(status_code=404, detail="No path between these devices")
+    hops = [
+        TopologyHop(
+            device=_node(topology, device_id),
+            ports=_ports(topology, device_id, path[i + 1]) if i + 1 < len(path) else []
+        )
+        for i, device_id in enumerate(path)
+    ]
+    return TopologyPathResponse(source=source, target=target, hops=hops)
+
+
+@router.get("/devices/{device_id}/upstream", response_model=UpstreamResponse)
+async def get_upstream(
+    device_id: int,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Upstream devices of a device
+    
+    - **device_id**: Device ID
+    
+    Returns the shortest path toward the site's routers, and the devices
+    that every such path must cross (single points of failure).
+    """
+    topology = await _device_topology(db, device_id)
+    path, critical = topology.upstream(device_id)
+    return UpstreamResponse(
+        device_id=device_id,
+        site_id=topology.site_id,
+        path=[_node(topology, n) for n in path],
+        critical=[_node(topology, n) for n in critical]
+    )
+
+
+@router.get("/devices/{device_id}/blast-radius", response_model=BlastRadiusResponse)
+async def get_blast_radius(
+    device_id: int,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Devices that lose their path to the site's routers if a device fails
+    
+    - **device_id**: Device ID
+    
+    Redundant links are taken into account: a device reachable around the
+    failed one is not affected.
+    """
+    topology = await _device_topology(db, device_id)
+    affected = topology.blast_radius(device_id)
+    return BlastRadiusResponse(
+        device_id=device_id,
+        site_id=topology.site_id,
+        count=len(affected),
+        affected=[_node(topology, n) for n in affected]
+    )
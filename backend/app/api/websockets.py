@@ -3,18 +3,55 @@ WebSocket endpoints for real-time metrics streaming
 """
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
 from sqlalchemy.orm import Session
+import orjson
 from typing import Dict, Set
 import asyncio
 import json
+import time
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.database import get_read_db
+from app.core.metrics import (
+    DEVICE_POLL_LAG_SECONDS,
+    DEVICE_POLL_SECONDS,
+    WEBSOCKET_SEND_QUEUE_DEPTH,
+    WEBSOCKET_SEND_SECONDS,
+    CollectedGauge,
+)
 from app.models.device import Device
+from app.services.alerting import alert_evaluator
 from app.services.mikrotik import MikroTikService
+from app.services.routeros_records import interface_records, system_record
 from app.api.devices import decrypt_password
 
 router = APIRouter(tags=["websockets"])
 
+LIVE_INTERVAL_SECONDS = 3
+
+_POLL_SECONDS = DEVICE_POLL_SECONDS.labels("live")
+_POLL_LAG_SECONDS = DEVICE_POLL_LAG_SECONDS.labels("live")
+_SEND_SECONDS = {stream: WEBSOCKET_SEND_SECONDS.labels(stream) for stream in ("live", "dashboard")}
+_SEND_QUEUE_DEPTH = {stream: WEBSOCKET_SEND_QUEUE_DEPTH.labels(stream) for stream in ("live", "dashboard")}
+
+
+async def send_message(websocket: WebSocket, message: dict, stream: str):
+    """Send ``message`` as JSON, timed and counted while it waits on the transport"""
+    depth = _SEND_QUEUE_DEPTH[stream]
+    depth.inc()
+    started = time.perf_counter()
+    try:
+        await websocket.send_text(orjson.dumps(message).decode())
+    finally:
+        depth.dec()
+        _SEND_SECONDS[stream].observe(time.perf_counter() - started)
+
+
+async def wait_for_next_poll():
+    """Sleep one live interval, recording how late the loop wakes up"""
+    expected = time.perf_counter() + LIVE_INTERVAL_SECONDS
+    await asyncio.sleep(LIVE_INTERVAL_SECONDS)
+    _POLL_LAG_SECONDS.observe(max(0.0, time.perf_counter() - expected))
+
 
 class ConnectionManager:
     """Manages WebSocket connections for real-time metrics"""
@@ -42,7 +79,7 @@ class ConnectionManager:
             dead_connections = set()
             for connection in self.active_connections[device_id]:
                 try:
-                    await connection.send_json(message)
+                    await send_message(connection, message, "live")
                 except:
                     dead_connections.add(connection)
             
@@ -53,6 +90,13 @@ class ConnectionManager:
 
 manager = ConnectionManager()
 
+CollectedGauge(
+    "mtcloud_websocket_subscribers",
+    "Live metric stream subscribers per device",
+    ["device_id"],
+    lambda: [((device_id,), len(connections)) for device_id, connections in list(manager.active_connections.items())],
+)
+
 
 async def fetch_device_metrics(device: Device):
     """Fetch current metrics from a device"""
@@ -67,35 +111,20 @@ async def fetch_device_metrics(device: Device):
         ) as mt:
             resources = mt.get_system_resources()
             interfaces = mt.get_interfaces()
-            
-            # Parse system metrics
-            free_memory = int(resources.get('free-memory', 0))
-            total_memory = int(resources.get('total-memory', 0))
-            
-            return {
-                "timestamp": datetime.utcnow().isoformat(),
-                "device_id": device.id,
-                "device_name": device.name,
-                "system": {
-                    "cpu_load": int(resources.get('cpu-load', 0)),
-                    "memory_used": total_memory - free_memory,
-                    "memory_total": total_memory,
-                    "memory_percent": round((total_memory - free_memory) / total_memory * 100, 1) if total_memory > 0 else 0,
-                    "uptime": resources.get('uptime', 'Unknown'),
-                    "version": resources.get('version', 'Unknown')
-                },
-                "interfaces": [
-                    {
-                        "name": iface.get('name'),
-                        "rx_bytes": int(iface.get('rx-byte', 0)),
-                        "tx_bytes": int(iface.get('tx-byte', 0)),
-                        "rx_packets": int(iface.get('rx-packet', 0)),
-                        "tx_packets": int(iface.get('tx-packet', 0))
-                    }
-                    for iface in interfaces[:10]  # Limit to first 10 interfaces
-                ],
-                "status": "online"
-            }
+        
+        system = system_record(resources)
+        alert_evaluator.evaluate_system(device.id, system)
+        system["memory_percent"] = (
+            round(system["memory_used"] / system["memory_total"] * 100, 1) if system["memory_total"] > 0 else 0
+        )
+        return {
+            "timestamp": datetime.utcnow().isoformat(),
+            "device_id": device.id,
+            "device_name": device.name,
+            "system": system,
+            "interfaces": interface_records(interfaces[:10]),  # Limit to first 10 interfaces
+            "status": "online"
+        }
     except Exception as e:
         return {
             "timestamp": datetime.utcnow().isoformat(),
@@ -117,7 +146,7 @@ async def websocket_device_metrics(
     Sends metrics every 3 seconds for the specified device
     """
     # Get database session
-    db = next(get_db())
+    db = next(get_read_db())
     
     try:
         # Check if device exists
@@ -130,38 +159,40 @@ async def websocket_device_metrics(
         await manager.connect(device_id, websocket)
         
         # Send initial message
-        await websocket.send_json({
+        await send_message(websocket, {
             "type": "connected",
             "device_id": device_id,
             "device_name": device.name,
             "message": "Connected to device metrics stream"
-        })
+        }, "live")
         
         # Stream metrics loop
         while True:
             try:
                 # Fetch current metrics
+                started = time.perf_counter()
                 metrics = await fetch_device_metrics(device)
+                _POLL_SECONDS.observe(time.perf_counter() - started)
                 
                 # Send to client
-                await websocket.send_json({
+                await send_message(websocket, {
                     "type": "metrics",
                     **metrics
-                })
+                }, "live")
                 
                 # Wait 3 seconds before next update
-                await asyncio.sleep(3)
+                await wait_for_next_poll()
                 
             except WebSocketDisconnect:
                 break
             except Exception as e:
                 # Send error but continue
-                await websocket.send_json({
+                await send_message(websocket, {
                     "type": "error",
                     "message": str(e),
                     "timestamp": datetime.utcnow().isoformat()
-                })
-                await asyncio.sleep(3)
+                }, "live")
+                await wait_for_next_poll()
     
     finally:
         manager.disconnect(device_id, websocket)
@@ -175,15 +206,15 @@ async def websocket_dashboard(websocket: WebSocket):
     
     Streams summary metrics for all devices
     """
-    db = next(get_db())
+    db = next(get_read_db())
     
     try:
         await websocket.accept()
         
-        await websocket.send_json({
+        await send_message(websocket, {
             "type": "connected",
             "message": "Connected to dashboard stream"
-        })
+        }, "dashboard")
         
         while True:
             try:
@@ -211,7 +242,7 @@ async def websocket_dashboard(websocket: WebSocket):
                     ]
                 }
                 
-                await websocket.send_json(summary)
+                await send_message(websocket, summary, "dashboard")
                 
                 # Update every 5 seconds
                 await asyncio.sleep(5)
@@ -219,10 +250,10 @@ async def websocket_dashboard(websocket: WebSocket):
             except WebSocketDisconnect:
                 break
             except Exception as e:
-                await websocket.send_json({
+                await send_message(websocket, {
                     "type": "error",
                     "message": str(e)
-                })
+                }, "dashboard")
                 await asyncio.sleep(5)
     
     finally:
@@ -21,7 +21,14 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
-    
+    DATABASE_REPLICA_URLS: str = ""  # Comma-separated read replica URLs
+    REPLICA_MAX_LAG_SECONDS: float = 5.0  # Fall back to primary above this lag
+    REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 2.0
+
+    @property
+    def database_replica_urls_list(self) -> List[str]:
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     
@@ -43,6 +50,30 @@ class Settings(BaseSettings):
     ANTHROPIC_API_KEY: str | None = None
     XAI_API_KEY: str | None = None
     LOCAL_LLM_URL: str | None = None
+
+    # LLM gateway
+    LLM_DEFAULT_PROVIDER: str = "openai"  # openai, anthropic, xai, local
+    LLM_MAX_TOKENS: int = 1024
+    LLM_MAX_CONCURRENCY: int = 8  # In-flight requests per provider
+    LLM_TOKENS_PER_MINUTE: int = 200000  # Token budget per provider
+    LLM_TIMEOUT_SECONDS: float = 120.0
+
+    # Embeddings
+    EMBEDDING_PROVIDER: str = "local"  # local (deterministic, offline) or openai
+    EMBEDDING_MODEL: str = "text-embedding-3-small"
+    EMBEDDING_BATCH_SIZE: int = 256
+    METRIC_EMBEDDING_WINDOW_MINUTES: int = 60
+    METRIC_EMBEDDING_BACKFILL_DAYS: int = 7  # Lookback for devices with no embeddings yet
+
+    # Semantic response cache for AI queries
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_SIMILARITY_THRESHOLD: float = 0.92  # Cosine similarity required for a hit
+    AI_CACHE_TTL_SECONDS: int = 3600
+
+    # Vector search
+    VECTOR_EF_SEARCH: int = 40  # hnsw.ef_search default; raise for recall, lower for latency
+    VECTOR_EXACT_SEARCH_MAX_ROWS: int = 20000  # Filtered sets up to this size are searched exactly
+    VECTOR_ITERATIVE_SCAN: bool = False  # pgvector >= 0.8: keep scanning HNSW until filters are satisfied
     
     # Email
     SMTP_HOST: str | None = None
@@ -50,14 +81,73 @@ class Settings(BaseSettings):
     SMTP_USER: str | None = None
     SMTP_PASSWORD: str | None = None
     SMTP_FROM: str = "noreply@mtcloud.local"
+    SMTP_USE_TLS: bool = True  # STARTTLS on SMTP_PORT
+    SMTP_POOL_SIZE: int = 2
+
+    # Alert evaluation
+    ALERT_FLUSH_INTERVAL_SECONDS: float = 5.0
+    ALERT_FLAP_WINDOW_SECONDS: int = 600  # Window for counting clear transitions
+    ALERT_FLAP_TRANSITIONS: int = 3  # Clears within the window that mark an incident as flapping
+    ALERT_FLAP_SUPPRESS_SECONDS: int = 900  # Quiet period required before a flapping incident resolves
+
+    # Alert notifications
+    NOTIFY_DIGEST_WINDOW_SECONDS: float = 2.0  # Coalesce alerts per target within this window
+    NOTIFY_MAX_BATCH_SIZE: int = 100
+    NOTIFY_MAX_CONCURRENCY_PER_TARGET: int = 2  # Per webhook host / recipient domain
+    NOTIFY_MAX_CONNECTIONS: int = 20
+    NOTIFY_MAX_RETRIES: int = 5
     
     # Application Settings
     MAX_DEVICES_PER_ORG: int = 100
+    DEVICE_PROBE_CONCURRENCY: int = 32  # Default simultaneous connection tests for bulk onboarding
+    DEVICE_BULK_MAX: int = 2000  # Devices per bulk onboarding request
+    DISCOVERY_CONCURRENCY: int = 2048  # Sockets open at once during a network sweep
+    DISCOVERY_TIMEOUT_SECONDS: float = 0.5  # Connect timeout per probe
     POLLING_INTERVAL_SECONDS: int = 60
+    TENANT_CACHE_TTL_SECONDS: int = 300  # Bounds staleness across worker processes
+    CONFIG_ZSTD_LEVEL: int = 10  # Compression level for stored config exports
+    CONFIG_BACKUP_MAX_CONCURRENCY: int = 64  # Devices exported at once, fleet-wide
+    CONFIG_BACKUP_MAX_PER_SITE: int = 4  # Devices exported at once per site (protects site uplinks)
+    DHCP_SYNC_CONCURRENCY: int = 32  # Devices harvested at once
+    IP_INVENTORY_SYNC_CONCURRENCY: int = 32  # Devices harvested at once
+    IP_INVENTORY_CACHE_TTL_SECONDS: int = 60  # Prefix tree rebuild interval per worker process
+    TOPOLOGY_SYNC_CONCURRENCY: int = 32  # Devices polled for neighbors at once
+    TOPOLOGY_CACHE_CHECK_SECONDS: int = 30  # How often a cached site graph checks for link changes
     AI_ANALYSIS_CRON: str = "0 8 * * *"  # Daily at 8 AM
+    AI_ANALYSIS_TIME_BUDGET_SECONDS: int = 1800  # Wall-clock budget per run; unfinished work resumes next run
+    AI_ANALYSIS_WORKERS: int = 8  # Concurrent per-site aggregation queries
     
     # Logging
     LOG_LEVEL: str = "INFO"
 
+    # Admin endpoints (/api/v1/admin, discovery scans); disabled unless a token is set
+    ADMIN_API_TOKEN: str | None = None  # Sent as "Authorization: Bearer <token>"
+
+    # Sampling profiler
+    PROFILER_MAX_SECONDS: int = 60  # Longest profile the admin endpoint will run
+    PROFILER_SIGNAL_SECONDS: int = 30  # Profile length when a task process receives SIGUSR2
+    PROFILER_OUTPUT_DIR: str = "/tmp"  # Where SIGUSR2 profiles are written
+
+    # Tracing (OTLP/JSON spans for requests, SQL statements and RouterOS commands)
+    TRACING_ENABLED: bool = False
+    TRACE_SAMPLE_RATE: float = 0.01  # Fraction of requests traced when no route rate matches
+    TRACE_ROUTE_SAMPLE_RATES: str = ""  # e.g. "/api/v1/metrics=0.1,/api/v1/ai=1"; longest path prefix wins
+    TRACE_SERVICE_NAME: str = "mtcloud-api"
+    TRACE_EXPORT_URL: str | None = None  # OTLP/HTTP endpoint, e.g. http://localhost:4318/v1/traces
+    TRACE_EXPORT_FILE: str | None = None  # Or append one OTLP JSON export request per line
+    TRACE_EXPORT_BATCH_SIZE: int = 512
+    TRACE_EXPORT_INTERVAL_SECONDS: float = 5.0
+    TRACE_MAX_QUEUED_SPANS: int = 8192  # Finished spans beyond this are dropped, never blocking requests
+
+    @property
+    def trace_route_sample_rates(self) -> List[tuple]:
+        """(path prefix, rate) pairs, longest prefix first"""
+        rates = []
+        for item in self.TRACE_ROUTE_SAMPLE_RATES.split(","):
+            prefix, _, rate = item.strip().rpartition("=")
+            if prefix:
+                rates.append((prefix.strip(), float(rate)))
+        return sorted(rates, key=lambda pair: len(pair[0]), reverse=True)
+
 
 settings = Settings()
@@ -1,18 +1,232 @@
-from sqlalchemy import create_engine
+from contextvars import ContextVar
+from typing import List, Optional
+import itertools
+import logging
+import threading
+import time
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql import Select
 from .config import settings
+from .metrics import DB_POOL_CHECKOUT_WAIT_SECONDS, CollectedGauge
+from .tracing import CLIENT, start_span
+
+logger = logging.getLogger(__name__)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    checkout_wait = DB_POOL_CHECKOUT_WAIT_SECONDS.labels("primary")
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.checkout_wait.observe(time.perf_counter() - started)
+
+
+class ReplicaQueuePool(TimedQueuePool):
+    # A class attribute rather than per instance: recreate() after dispose builds a new pool of the same class
+    checkout_wait = DB_POOL_CHECKOUT_WAIT_SECONDS.labels("replica")
+
 
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
+    poolclass=TimedQueuePool,
     pool_pre_ping=True,
     pool_size=10,
     max_overflow=20
 )
 
-# Create session factory
+# Read replica engines (empty when no replicas are configured)
+replica_engines = [
+    create_engine(url, poolclass=ReplicaQueuePool, pool_pre_ping=True, pool_size=10, max_overflow=20)
+    for url in settings.database_replica_urls_list
+]
+
+CollectedGauge(
+    "mtcloud_db_pool_checked_out",
+    "Database connections currently checked out of the pool",
+    ["pool"],
+    lambda: [
+        (("primary",), engine.pool.checkedout()),
+        (("replica",), sum(replica.pool.checkedout() for replica in replica_engines)),
+    ],
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement_span(conn, cursor, statement, parameters, context, executemany):
+    span = start_span(statement.split(None, 1)[0].upper() if statement else "SQL", CLIENT, {
+        "db.system": conn.dialect.name,
+        "db.statement": statement[:2000],
+    })
+    if span is not None:
+        if executemany:
+            span.attributes["db.batch_size"] = len(parameters)
+        conn.info.setdefault("trace_spans", []).append(span)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_statement_span(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("trace_spans")
+    if spans:
+        spans.pop().end()
+
+
+@event.listens_for(Engine, "handle_error")
+def _fail_statement_span(exception_context):
+    conn = exception_context.connection
+    spans = conn.info.get("trace_spans") if conn is not None else None
+    if spans:
+        spans.pop().end(exception_context.original_exception)
+
+
+class RequestDbState:
+    """Routing state shared by every session opened while handling one request"""
+
+    __slots__ = ("wrote",)
+
+    def __init__(self):
+        self.wrote = False
+
+
+_request_state: ContextVar[Optional[RequestDbState]] = ContextVar("db_request_state", default=None)
+
+
+def request_has_written() -> bool:
+    """True once the current request has flushed a write to the primary"""
+    state = _request_state.get()
+    return state is not None and state.wrote
+
+
+class ReplicaRouter:
+    """
+    Picks a read replica round-robin, skipping replicas whose replay lag
+    exceeds the configured limit. Lag is sampled at most once per interval
+    per replica so routing stays cheap on the hot path.
+    """
+
+    LAG_QUERY = text(
+        "SELECT CASE "
+        "WHEN NOT pg_is_in_recovery() THEN 0 "
+        "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+        "END"
+    )
+
+    def __init__(self, replicas: List[Engine], max_lag_seconds: float, check_interval_seconds: float):
+        self.replicas = replicas
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self._lag = [float("inf")] * len(replicas)
+        self._checked_at = [float("-inf")] * len(replicas)
+        self._locks = [threading.Lock() for _ in replicas]
+        self._cycle = itertools.cycle(range(len(replicas)))
+
+    def replica_lag(self, index: int) -> float:
+        """Return the cached lag for a replica, refreshing it when stale"""
+        if time.monotonic() - self._checked_at[index] < self.check_interval_seconds:
+            return self._lag[index]
+
+        # Only one caller refreshes; everyone else keeps using the cached value
+        lock = self._locks[index]
+        if not lock.acquire(blocking=False):
+            return self._lag[index]
+        try:
+            try:
+                with self.replicas[index].connect() as conn:
+                    lag = float(conn.execute(self.LAG_QUERY).scalar() or 0)
+            except Exception as e:
+                logger.warning(f"Replica {index} lag check failed: {str(e)}")
+                lag = float("inf")
+            self._lag[index] = lag
+            self._checked_at[index] = time.monotonic()
+            return lag
+        finally:
+            lock.release()
+
+    def pick(self) -> Optional[Engine]:
+        """Return a replica within the lag limit, or None to use the primary"""
+        for _ in range(len(self.replicas)):
+            index = next(self._cycle)
+            if self.replica_lag(index) <= self.max_lag_seconds:
+                return self.replicas[index]
+        return None
+
+
+replica_router = ReplicaRouter(
+    replica_engines,
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval_seconds=settings.REPLICA_LAG_CHECK_INTERVAL_SECONDS,
+)
+
+
+class RoutingSession(Session):
+    """
+    Session for read-mostly dependencies
+
+    Plain SELECTs go to a healthy replica. Writes, locking reads, flushes and
+    any statement issued after the request (or this session) has written are
+    sent to the primary so callers always read their own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            self._flushing
+            or not isinstance(clause, Select)
+            or clause._for_update_arg is not None
+            or self.info.get("wrote")
+            or request_has_written()
+        ):
+            return engine
+        return replica_router.pick() or engine
+
+
+@event.listens_for(Session, "after_flush")
+def _pin_after_flush(session, flush_context):
+    session.info["wrote"] = True
+    state = _request_state.get()
+    if state is not None:
+        state.wrote = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _pin_after_bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware that scopes replica pinning to a single request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        token = _request_state.set(RequestDbState())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_state.reset(token)
+
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
 
 # Base class for models
 Base = declarative_base()
@@ -27,3 +241,17 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """
+    Dependency for read-only endpoints
+
+    Routes queries to a read replica when one is configured and within the
+    allowed lag; falls back to the primary otherwise.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
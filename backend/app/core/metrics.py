@@ -0,0 +1,298 @@
+"""
+Prometheus instrumentation
+Process-local counters, gauges and histograms rendered in the text
+exposition format by GET /metrics. Label sets are resolved once, at import
+time, by the modules that record them (``labels()`` returns the same child
+every time), and recording a sample is a bisect plus a couple of in-place
+increments under the child's lock, so the hot paths stay instrumented in
+production.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+import math
+import threading
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class GaugeChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class HistogramChild:
+    """Per-bucket (non-cumulative) counts; cumulated only when rendered"""
+
+    __slots__ = ("upper_bounds", "counts", "sum", "_lock")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * len(upper_bounds)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Metric:
+    """A metric family: one child per label set"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: "Registry" = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+        (registry or REGISTRY).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values) -> object:
+        """
+        Child for one label set
+
+        Resolve children once and keep them; this is the only call that
+        allocates.
+        """
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """(suffix, rendered labels, value) for every series"""
+        raise NotImplementedError
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for suffix, labels, value in self.samples():
+            yield f"{self.name}{suffix}{labels} {_number(value)}"
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            yield "_total", _labels(self.labelnames, key), child.value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> GaugeChild:
+        return GaugeChild()
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._default.dec(amount)
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            yield "", _labels(self.labelnames, key), child.value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = (), registry: "Registry" = None):
+        bounds = sorted(float(bound) for bound in buckets)
+        if not bounds or bounds[-1] != math.inf:
+            bounds.append(math.inf)
+        self.upper_bounds = tuple(bounds)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def samples(self):
+        bucket_names = self.labelnames + ("le",)
+        bucket_values = [_number(bound) for bound in self.upper_bounds]
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts = list(child.counts)
+                total = child.sum
+            cumulative = 0
+            for le, count in zip(bucket_values, counts):
+                cumulative += count
+                yield "_bucket", _labels(bucket_names, key + (le,)), cumulative
+            labels = _labels(self.labelnames, key)
+            yield "_count", labels, cumulative
+            yield "_sum", labels, total
+
+
+class CollectedGauge(Metric):
+    """
+    Gauge read from live state at scrape time
+
+    ``collect`` returns (label values, value) pairs, so series with
+    unbounded label sets (one per device) cost nothing between scrapes.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 collect: Callable[[], Iterable[Tuple[LabelValues, float]]], registry: "Registry" = None):
+        self.collect = collect
+        super().__init__(name, documentation, labelnames, registry)
+
+    def samples(self):
+        for key, value in self.collect():
+            yield "", _labels(self.labelnames, tuple(str(v) for v in key)), value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._names = set()
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric):
+        with self._lock:
+            if metric.name in self._names:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._names.add(metric.name)
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics):
+            lines.extend(metric.render())
+        lines.append("")
+        return "\n".join(lines)
+
+
+REGISTRY = Registry()
+
+# ---------------------------------------------------------------------------
+# Application metrics
+# ---------------------------------------------------------------------------
+
+ROUTEROS_COMMAND_SECONDS = Histogram(
+    "mtcloud_routeros_command_seconds",
+    "RouterOS API command round trip by command path",
+    ["path"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+DEVICE_POLL_SECONDS = Histogram(
+    "mtcloud_device_poll_seconds",
+    "Time to poll one device",
+    ["kind"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+DEVICE_POLL_LAG_SECONDS = Histogram(
+    "mtcloud_device_poll_lag_seconds",
+    "How late a device poll started relative to its schedule",
+    ["kind"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+DB_POOL_CHECKOUT_WAIT_SECONDS = Histogram(
+    "mtcloud_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a database connection from the pool",
+    ["pool"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+
+WEBSOCKET_SEND_SECONDS = Histogram(
+    "mtcloud_websocket_send_seconds",
+    "Time to hand one WebSocket message to the transport",
+    ["stream"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+)
+
+WEBSOCKET_SEND_QUEUE_DEPTH = Gauge(
+    "mtcloud_websocket_send_queue_depth",
+    "WebSocket messages waiting on a slow transport",
+    ["stream"],
+)
+
+INGESTION_FLUSH_ROWS = Histogram(
+    "mtcloud_ingestion_flush_rows",
+    "Rows written per ingestion flush",
+    ["sink"],
+    buckets=(1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 50000),
+)
+
+STARTUP_SECONDS = Gauge(
+    "mtcloud_startup_seconds",
+    "Time this worker spent in each startup phase",
+    ["phase"],
+)
@@ -0,0 +1,275 @@
+"""
+Statistical sampling profiler
+Samples every thread's Python stack from a background thread at a fixed
+interval, so a live worker can be profiled for a few seconds without a
+restart or an external tool. Stacks are aggregated by code object and
+formatted only once at the end, as collapsed stacks
+(``thread;module:function;... count``) that flamegraph.pl, inferno and
+speedscope read directly.
+
+When given the event loop, it also attributes loop time to coroutines:
+``running`` is time a coroutine held the loop (including blocking calls
+made from it), ``awaiting`` is time it sat suspended in an await.
+
+The API exposes it at POST /api/v1/admin/profile; task processes call
+``install_signal_hook()`` and write a profile when sent SIGUSR2.
+"""
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import asyncio
+import inspect
+import logging
+import os
+import re
+import signal
+import sys
+import threading
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_BACKEND_ROOT = str(Path(__file__).resolve().parent.parent.parent) + os.sep
+_ASYNCIO_DIR = os.path.dirname(asyncio.__file__) + os.sep
+_THREAD_SUFFIX = re.compile(r"[_-]\d+(_\d+)?$")
+
+# Sample the (much larger) set of suspended tasks on every Nth tick only
+TASK_SAMPLE_EVERY = 10
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_BACKEND_ROOT):
+        module = filename[len(_BACKEND_ROOT):]
+    elif "site-packages" + os.sep in filename:
+        module = filename.split("site-packages" + os.sep, 1)[1]
+    else:
+        module = os.sep.join(filename.split(os.sep)[-2:])
+    if module.endswith(".py"):
+        module = module[:-3]
+    return f"{module.replace(os.sep, '.')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _thread_label(name: str) -> str:
+    """Fold numbered pool threads (dhcp-sync_12, AnyIO worker thread) into one root"""
+    return _THREAD_SUFFIX.sub("", name).replace(" ", "_")
+
+
+class SamplingProfiler:
+    """
+    One profiling run; ``start()`` it, then ``stop()`` and read ``result()``
+
+    Construct it on the loop's thread when passing ``loop``.
+    """
+
+    def __init__(self, interval_seconds: float = 0.01, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.interval_seconds = interval_seconds
+        self.loop = loop
+        self.loop_thread_id = threading.get_ident() if loop is not None else None
+        self.loop_driver = self._loop_driver() if loop is not None else None
+        self.samples = 0
+        self.stacks: Counter = Counter()  # (thread label, code objects leaf-first) -> samples
+        self.loop_samples = 0
+        self.loop_idle = 0
+        self.running: Counter = Counter()  # coroutine code -> samples holding the loop
+        self.awaiting: Counter = Counter()  # coroutine code -> task samples suspended in it
+        self.task_ticks = 0
+        self.started_at = 0.0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started_at
+
+    def _run(self):
+        own = threading.get_ident()
+        interval = self.interval_seconds
+        tick = 0
+        next_at = time.perf_counter()
+        while not self._stop.is_set():
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                self.stacks[(names.get(ident, str(ident)), tuple(codes))] += 1
+                if ident == self.loop_thread_id:
+                    self._sample_loop(codes)
+            self.samples += 1
+            if self.loop is not None and tick % TASK_SAMPLE_EVERY == 0:
+                self._sample_tasks()
+            tick += 1
+
+            next_at += interval
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                # Fell behind (large stacks or a busy GIL); skip rather than burst
+                next_at = time.perf_counter()
+
+    @staticmethod
+    def _loop_driver():
+        """
+        Code of the frame that resumes the outermost coroutine
+
+        asyncio waits in selectors.py, but uvloop waits in C: a uvloop
+        thread whose innermost Python frame is this driver is idle.
+        """
+        driver = None
+        frame = sys._getframe()
+        while frame is not None:
+            if frame.f_code.co_flags & inspect.CO_COROUTINE and frame.f_back is not None:
+                driver = frame.f_back.f_code
+            frame = frame.f_back
+        return driver
+
+    def _sample_loop(self, codes: list):
+        self.loop_samples += 1
+        leaf = codes[0]
+        if leaf is self.loop_driver or (
+            leaf.co_name in ("select", "poll", "control") and leaf.co_filename.endswith("selectors.py")
+        ):
+            self.loop_idle += 1
+            return
+        for code in codes:
+            if code.co_flags & inspect.CO_COROUTINE and not code.co_filename.startswith(_ASYNCIO_DIR):
+                self.running[code] += 1
+                return
+
+    def _sample_tasks(self):
+        try:
+            tasks = asyncio.all_tasks(self.loop)
+        except RuntimeError:
+            return
+        self.task_ticks += 1
+        for task in tasks:
+            # Follow the await chain to the innermost application coroutine
+            coro = task.get_coro()
+            innermost = None
+            while coro is not None and hasattr(coro, "cr_code"):
+                if not coro.cr_code.co_filename.startswith(_ASYNCIO_DIR):
+                    innermost = coro.cr_code
+                coro = coro.cr_await
+            if innermost is not None and coro is not None:
+                self.awaiting[innermost] += 1
+
+    def collapsed(self) -> str:
+        """Brendan Gregg collapsed-stack text, one ``stack count`` per line"""
+        labels: Dict[object, str] = {}
+        merged: Counter = Counter()
+        for (thread_name, codes), count in self.stacks.items():
+            frames = [_thread_label(thread_name)]
+            for code in reversed(codes):
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _frame_label(code)
+                frames.append(label)
+            merged[";".join(frames)] += count
+        return "".join(f"{stack} {count}\n" for stack, count in merged.most_common())
+
+    def _ms_per(self, ticks: int) -> float:
+        """Wall time one tick stood for; sampling may run slower than the interval"""
+        return self.elapsed * 1000 / ticks if ticks else 0.0
+
+    def coroutines(self, limit: int = 50) -> List[dict]:
+        sample_ms = self._ms_per(self.samples)
+        task_ms = self._ms_per(self.task_ticks)
+        rows = [
+            {
+                "coroutine": _frame_label(code),
+                "running_ms": round(self.running[code] * sample_ms, 1),
+                "awaiting_ms": round(self.awaiting[code] * task_ms, 1),
+            }
+            for code in set(self.running) | set(self.awaiting)
+        ]
+        rows.sort(key=lambda row: (row["running_ms"], row["awaiting_ms"]), reverse=True)
+        return rows[:limit]
+
+    def result(self) -> dict:
+        sample_ms = self._ms_per(self.samples)
+        result = {
+            "seconds": round(self.elapsed, 2),
+            "interval_ms": self.interval_seconds * 1000,
+            "samples": self.samples,
+            "collapsed": self.collapsed(),
+        }
+        if self.loop is not None:
+            result["event_loop"] = {
+                "samples": self.loop_samples,
+                "busy_ms": round((self.loop_samples - self.loop_idle) * sample_ms, 1),
+                "idle_ms": round(self.loop_idle * sample_ms, 1),
+                "coroutines": self.coroutines(),
+            }
+        return result
+
+
+# One run per process at a time; profiles of overlapping runs would double the overhead
+profile_lock = threading.Lock()
+
+
+async def profile_event_loop(seconds: float, interval_seconds: float) -> SamplingProfiler:
+    """Profile this process for ``seconds`` without blocking the running loop"""
+    profiler = SamplingProfiler(interval_seconds, loop=asyncio.get_running_loop())
+    profiler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        await asyncio.to_thread(profiler.stop)
+    return profiler
+
+
+def _profile_to_file(seconds: float, interval_seconds: float):
+    if not profile_lock.acquire(blocking=False):
+        logger.warning("Profile requested while another is running; ignored")
+        return
+    try:
+        profiler = SamplingProfiler(interval_seconds)
+        profiler.start()
+        time.sleep(seconds)
+        profiler.stop()
+        path = Path(settings.PROFILER_OUTPUT_DIR) / f"profile-{os.getpid()}-{datetime.now():%Y%m%d-%H%M%S}.txt"
+        path.write_text(profiler.collapsed())
+        logger.info(f"Wrote {profiler.samples} profile samples to {path}")
+    except Exception as e:
+        logger.error(f"Profiling failed: {str(e)}")
+    finally:
+        profile_lock.release()
+
+
+def install_signal_hook(seconds: Optional[float] = None, interval_seconds: float = 0.01) -> bool:
+    """
+    Profile this process for ``seconds`` whenever it receives SIGUSR2
+
+    The collapsed stacks are written to PROFILER_OUTPUT_DIR as
+    profile-<pid>-<timestamp>.txt. Call from the main thread.
+
+    Returns:
+        False where SIGUSR2 does not exist (Windows)
+    """
+    if not hasattr(signal, "SIGUSR2"):
+        return False
+    seconds = seconds or settings.PROFILER_SIGNAL_SECONDS
+
+    def handler(signum, frame):
+        threading.Thread(
+            target=_profile_to_file, args=(seconds, interval_seconds), name="profile-on-signal", daemon=True
+        ).start()
+
+    signal.signal(signal.SIGUSR2, handler)
+    return True
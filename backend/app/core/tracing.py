@@ -0,0 +1,304 @@
+"""
+Request tracing
+Spans for each sampled HTTP request, the SQL statements and RouterOS
+commands it issues, and other marked sections (password decryption).
+Finished spans are batched by a background thread and exported as OTLP/JSON,
+either POSTed to a collector's OTLP/HTTP receiver or appended to a file
+(one ExportTraceServiceRequest per line, the collector's otlpjsonfile format).
+
+Sampling is decided once per request from the W3C ``traceparent`` header
+or the per-route rates; unsampled requests carry no span, so the
+instrumentation below them costs one context-variable lookup.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+import json
+import logging
+import queue
+import random
+import re
+import threading
+import time
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# OTLP SpanKind
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+
+# OTLP StatusCode
+STATUS_ERROR = 2
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+def _trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def _span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, kind: int = INTERNAL,
+                 attributes: Optional[dict] = None):
+        self.trace_id = trace_id
+        self.span_id = _span_id()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+        self.end_ns = 0
+        self.start_ns = time.time_ns()
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None):
+        self.end_ns = time.time_ns()
+        if error is not None and self.error is None:
+            self.error = f"{type(error).__name__}: {error}"
+        tracer.submit(self)
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_attribute(key, value) for key, value in self.attributes.items()],
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.error is not None:
+            span["status"] = {"code": STATUS_ERROR, "message": self.error}
+        return span
+
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_span(name: str, kind: int = INTERNAL, attributes: Optional[dict] = None) -> Optional[Span]:
+    """
+    Child of the current span, or None when the caller is not inside a
+    sampled trace. The span is not made current; use ``span()`` for that.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return None
+    return Span(parent.trace_id, parent.span_id, name, kind, attributes)
+
+
+@contextmanager
+def span(name: str, kind: int = INTERNAL, attributes: Optional[dict] = None) -> Iterator[Optional[Span]]:
+    """Trace a block as a child of the current span (no-op outside a trace)"""
+    child = start_span(name, kind, attributes)
+    if child is None:
+        yield None
+        return
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.end(e)
+        raise
+    else:
+        child.end()
+    finally:
+        _current_span.reset(token)
+
+
+def set_attributes(attributes: dict):
+    """Add attributes to the current span, if any"""
+    current = _current_span.get()
+    if current is not None:
+        current.attributes.update(attributes)
+
+
+class Tracer:
+    """
+    Sampling and export
+
+    ``submit`` never blocks: finished spans go onto a bounded queue that a
+    daemon thread drains in batches, and spans that do not fit are counted
+    and dropped.
+    """
+
+    def __init__(self):
+        self.enabled = settings.TRACING_ENABLED and bool(settings.TRACE_EXPORT_URL or settings.TRACE_EXPORT_FILE)
+        self.default_rate = settings.TRACE_SAMPLE_RATE
+        self.route_rates = settings.trace_route_sample_rates
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=settings.TRACE_MAX_QUEUED_SPANS)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._resource = {
+            "attributes": [
+                _attribute("service.name", settings.TRACE_SERVICE_NAME),
+                _attribute("service.version", settings.VERSION),
+                _attribute("deployment.environment", settings.ENVIRONMENT),
+            ]
+        }
+        if settings.TRACING_ENABLED and not self.enabled:
+            logger.warning("TRACING_ENABLED is set but neither TRACE_EXPORT_URL nor TRACE_EXPORT_FILE is; tracing is off")
+
+    def rate_for(self, path: str) -> float:
+        for prefix, rate in self.route_rates:
+            if path.startswith(prefix):
+                return rate
+        return self.default_rate
+
+    def start_request(self, path: str, name: str, traceparent: Optional[str]) -> Optional[Span]:
+        """Root (server) span for a request, or None when it is not sampled"""
+        parent_id = None
+        match = _TRACEPARENT.match(traceparent) if traceparent else None
+        if match:
+            # Respect the caller's sampling decision so traces stay whole across services
+            if not int(match.group(3), 16) & 1:
+                return None
+            trace_id, parent_id = match.group(1), match.group(2)
+        else:
+            rate = self.rate_for(path)
+            if rate <= 0 or (rate < 1 and random.random() >= rate):
+                return None
+            trace_id = _trace_id()
+        return Span(trace_id, parent_id, name, SERVER)
+
+    def submit(self, span: Span):
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+                self._thread.start()
+
+    def shutdown(self, timeout: float = 5.0):
+        """Export whatever is queued and stop the export thread"""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def _run(self):
+        client = httpx.Client(timeout=10.0) if settings.TRACE_EXPORT_URL else None
+        batch_size = settings.TRACE_EXPORT_BATCH_SIZE
+        interval = settings.TRACE_EXPORT_INTERVAL_SECONDS
+        stopping = False
+        while not stopping:
+            batch: List[Span] = []
+            deadline = time.monotonic() + interval
+            while len(batch) < batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            if batch:
+                try:
+                    self._export(client, batch)
+                except Exception as e:
+                    logger.warning(f"Trace export of {len(batch)} spans failed: {str(e)}")
+        if client is not None:
+            client.close()
+
+    def _export(self, client: Optional[httpx.Client], batch: List[Span]):
+        request = {
+            "resourceSpans": [{
+                "resource": self._resource,
+                "scopeSpans": [{"scope": {"name": "mtcloud"}, "spans": [span.to_otlp() for span in batch]}],
+            }]
+        }
+        if client is not None:
+            response = client.post(settings.TRACE_EXPORT_URL, json=request)
+            response.raise_for_status()
+        else:
+            with open(settings.TRACE_EXPORT_FILE, "a") as f:
+                f.write(json.dumps(request, separators=(",", ":")) + "\n")
+
+
+tracer = Tracer()
+
+
+class TracingMiddleware:
+    """ASGI middleware that opens the root span for each sampled HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not tracer.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+        root = tracer.start_request(scope["path"], f"{scope['method']} {scope['path']}", traceparent)
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        root.attributes.update({"http.method": scope["method"], "http.target": scope["path"]})
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                if message["status"] >= 500:
+                    root.error = f"HTTP {message['status']}"
+            await send(message)
+
+        token = _current_span.set(root)
+        error = None
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current_span.reset(token)
+            # Name by route template so spans group per endpoint
+            route = scope.get("route")
+            if route is not None:
+                root.name = f"{scope['method']} {route.path}"
+                root.attributes["http.route"] = route.path
+            root.end(error)
@@ -1,6 +1,25 @@
-from fastapi import FastAPI
+import time
+
+# Cold-start clock: everything below, up to readiness, is reported at startup
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, Response
+import asyncio
+import importlib
+import logging
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.database import ReadYourWritesMiddleware
+from app.core.metrics import CONTENT_TYPE, REGISTRY, STARTUP_SECONDS
+from app.core.tracing import TracingMiddleware, tracer
+from app.services.alerting import alert_evaluator
+from app.services.llm import llm_gateway
+from app.services.notifications import notification_dispatcher
+
+logging.basicConfig(level=settings.LOG_LEVEL)
+logger = logging.getLogger(__name__)
+
+_core_imported = time.perf_counter()
 
 # Create FastAPI app
 app = FastAPI(
@@ -20,6 +39,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Route reads to replicas, pinned to the primary after a write in the same request
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Outermost, so request spans cover every other middleware
+app.add_middleware(TracingMiddleware)
+
 
 @app.get("/")
 async def root():
@@ -42,14 +67,44 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """
+    Prometheus scrape endpoint
+    """
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 @app.on_event("startup")
 async def startup_event():
     """
-    Run on application startup
+    Run on application startup, then report how long this worker took to become ready
     """
-    print(f"🚀 {settings.PROJECT_NAME} v{settings.VERSION} starting up...")
-    print(f"📊 Environment: {settings.ENVIRONMENT}")
-    print(f"🌐 API Docs: http://localhost:8000{settings.API_V1_STR}/docs")
+    started = time.perf_counter()
+
+    # Persist alert transitions produced by the in-memory evaluator and notify
+    await notification_dispatcher.start()
+    app.state.alert_flusher = asyncio.create_task(alert_evaluator.run())
+
+    ready = time.perf_counter()
+    timings = {
+        "core_imports_ms": round((_core_imported - _import_started) * 1000, 1),
+        "routers_ms": round((_routers_imported - _core_imported) * 1000, 1),
+        "startup_hooks_ms": round((ready - started) * 1000, 1),
+        "ready_ms": round((ready - _import_started) * 1000, 1),
+        "router_imports_ms": router_import_ms,
+    }
+    app.state.startup_timings = timings
+    for phase in ("core_imports", "routers", "startup_hooks", "ready"):
+        STARTUP_SECONDS.labels(phase).set(timings[f"{phase}_ms"] / 1000)
+
+    slowest = sorted(router_import_ms.items(), key=lambda item: item[1], reverse=True)[:3]
+    logger.info(
+        f"{settings.PROJECT_NAME} v{settings.VERSION} ({settings.ENVIRONMENT}) ready in {timings['ready_ms']:.0f}ms: "
+        f"core imports {timings['core_imports_ms']:.0f}ms, routers {timings['routers_ms']:.0f}ms "
+        f"(slowest {', '.join(f'{name} {ms:.0f}ms' for name, ms in slowest)}), "
+        f"startup hooks {timings['startup_hooks_ms']:.0f}ms"
+    )
 
 
 @app.on_event("shutdown")
@@ -57,19 +112,31 @@ async def shutdown_event():
     """
     Run on application shutdown
     """
-    print(f"👋 {settings.PROJECT_NAME} shutting down...")
+    logger.info(f"{settings.PROJECT_NAME} shutting down")
+    app.state.alert_flusher.cancel()
+    await notification_dispatcher.stop()
+    await llm_gateway.close()
+    tracer.shutdown()
 
 
-# Include API routers
-from app.api import devices, metrics, websockets
+# Include API routers, timing each import. Shared dependencies are charged
+# to the first router that imports them.
+ROUTERS = (
+    "devices", "metrics", "websockets", "ai", "configs",
+    "discovery", "leases", "addresses", "topology", "admin",
+)
+
+router_import_ms = {}
+for _name in ROUTERS:
+    _started = time.perf_counter()
+    _module = importlib.import_module(f"app.api.{_name}")
+    router_import_ms[_name] = round((time.perf_counter() - _started) * 1000, 1)
+    app.include_router(_module.router)
 
-app.include_router(devices.router)
-app.include_router(metrics.router)
-app.include_router(websockets.router)
+_routers_imported = time.perf_counter()
 
 # TODO: Add remaining routers as they're implemented
-# from app.api import organizations, clients, sites, ai
+# from app.api import organizations, clients, sites
 # app.include_router(organizations.router)
 # app.include_router(clients.router)
 # app.include_router(sites.router)
-# app.include_router(ai.router)
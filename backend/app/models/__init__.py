@@ -6,11 +6,14 @@ from .organization import Organization
 from .client import Client
 from .site import Site
 from .user import User
-from .device import Device, DeviceGroup, DeviceConfig, device_group_members
+from .device import Device, DeviceGroup, DeviceConfig, ConfigBlob, device_group_members
 from .interface import Interface, InterfaceStat
 from .metric import DeviceMetric
 from .alert import Alert, AlertHistory
-from .ai import AIInsight, AIQuery, MetricEmbedding
+from .dhcp import DhcpLease
+from .address import IpAddress
+from .topology import DeviceLink
+from .ai import AIInsight, AIQuery, MetricEmbedding, AIAnalysisDigest
 
 __all__ = [
     "Organization",
@@ -20,13 +23,18 @@ __all__ = [
     "Device",
     "DeviceGroup",
     "DeviceConfig",
+    "ConfigBlob",
     "device_group_members",
     "Interface",
     "InterfaceStat",
     "DeviceMetric",
     "Alert",
     "AlertHistory",
+    "DhcpLease",
+    "IpAddress",
+    "DeviceLink",
     "AIInsight",
     "AIQuery",
     "MetricEmbedding",
+    "AIAnalysisDigest",
 ]
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class IpAddress(Base):
+    """
+    Addresses configured on device interfaces (/ip/address), fleet-wide
+    """
+    __tablename__ = "ip_addresses"
+    __table_args__ = (
+        Index("uq_ip_addresses_device_ros_id", "device_id", "ros_id", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), nullable=False)
+    site_id = Column(Integer, ForeignKey("sites.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # Address identity on the router (/ip/address .id)
+    ros_id = Column(String(32), nullable=False)
+
+    # Address data
+    address = Column(String(49), nullable=False)  # Interface address with prefix, e.g. 10.20.4.1/24
+    network = Column(String(49), nullable=False)  # Network it belongs to, e.g. 10.20.4.0/24
+    interface = Column(String(100))
+    is_dynamic = Column(Boolean, default=False)
+    is_disabled = Column(Boolean, default=False)
+    is_invalid = Column(Boolean, default=False)
+    comment = Column(Text)
+
+    # Timestamps
+    first_seen_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # Relationships
+    device = relationship("Device")
+
+    def __repr__(self):
+        return f"<IpAddress {self.address} on device_{self.device_id} {self.interface}>"
@@ -1,15 +1,64 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, ForeignKey, JSON, Index, Float
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from pgvector.sqlalchemy import Vector
+from sqlalchemy.types import NullType, TypeDecorator
 from app.core.database import Base
 
 
+class Vector(TypeDecorator):
+    """
+    pgvector's VECTOR type, loaded on first use
+
+    pgvector.sqlalchemy imports numpy, which costs every worker 60-200ms at
+    startup; the real type is only needed once a statement touching an
+    embedding column is compiled or executed.
+    """
+
+    impl = NullType
+    cache_ok = True
+
+    class Comparator(TypeDecorator.Comparator):
+        # Same operators as pgvector.sqlalchemy.Vector
+        def l2_distance(self, other):
+            return self.op("<->", return_type=Float)(other)
+
+        def max_inner_product(self, other):
+            return self.op("<#>", return_type=Float)(other)
+
+        def cosine_distance(self, other):
+            return self.op("<=>", return_type=Float)(other)
+
+    comparator_factory = Comparator
+
+    def __init__(self, dim: int):
+        super().__init__()
+        self.dim = dim
+
+    def load_dialect_impl(self, dialect):
+        from pgvector.sqlalchemy import Vector as PgVector
+
+        return dialect.type_descriptor(PgVector(self.dim))
+
+
+def hnsw_index(name: str) -> Index:
+    """HNSW cosine index on a model's embedding column"""
+    return Index(
+        name, "embedding",
+        postgresql_using="hnsw",
+        postgresql_with={"m": 16, "ef_construction": 64},
+        postgresql_ops={"embedding": "vector_cosine_ops"},
+    )
+
+
 class AIInsight(Base):
     """
     AI-generated insights and reports with vector embeddings for semantic search
     """
     __tablename__ = "ai_insights"
+    __table_args__ = (
+        hnsw_index("ix_ai_insights_embedding_hnsw"),
+        Index("ix_ai_insights_org_site", "organization_id", "site_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     organization_id = Column(Integer, ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -48,6 +97,10 @@ class AIQuery(Base):
     User AI query history with embeddings for context
     """
     __tablename__ = "ai_queries"
+    __table_args__ = (
+        hnsw_index("ix_ai_queries_embedding_hnsw"),
+        Index("ix_ai_queries_cache_key_created_at", "cache_key", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -68,6 +121,9 @@ class AIQuery(Base):
     # Vector embedding for semantic search
     embedding = Column(Vector(1536))
     
+    # Semantic cache: hash of organization + normalized context; NULL = not reusable
+    cache_key = Column(String(64))
+    
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     
@@ -83,6 +139,10 @@ class MetricEmbedding(Base):
     Vectorized summaries of metrics for RAG-based AI analysis
     """
     __tablename__ = "metric_embeddings"
+    __table_args__ = (
+        hnsw_index("ix_metric_embeddings_embedding_hnsw"),
+        Index("uq_metric_embeddings_device_period", "device_id", "time_period_start", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -103,3 +163,34 @@ class MetricEmbedding(Base):
     
     def __repr__(self):
         return f"<MetricEmbedding device_{self.device_id} {self.time_period_start} to {self.time_period_end}>"
+
+
+class AIAnalysisDigest(Base):
+    """
+    Compact per-site daily digests produced by the AI analysis job
+
+    Each row is a checkpoint: a rerun skips sites that already have a digest
+    for the run date and organizations whose digests were already reduced.
+    """
+    __tablename__ = "ai_analysis_digests"
+    __table_args__ = (
+        Index("uq_ai_analysis_digests_run_site", "run_date", "site_id", unique=True),
+        Index("ix_ai_analysis_digests_run_org", "run_date", "organization_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_date = Column(Date, nullable=False)  # Day being analyzed (UTC)
+    organization_id = Column(Integer, ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
+    site_id = Column(Integer, ForeignKey("sites.id", ondelete="CASCADE"), nullable=False)
+    
+    # Aggregated site metrics and alert counts for the day
+    digest_json = Column(JSON, nullable=False)
+    
+    # Organization insight this digest was reduced into (NULL = not yet reduced)
+    insight_id = Column(Integer, ForeignKey("ai_insights.id", ondelete="SET NULL"))
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<AIAnalysisDigest site_{self.site_id} {self.run_date}>"
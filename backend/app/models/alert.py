@@ -23,6 +23,7 @@ class Alert(Base):
     metric_type = Column(String(100), nullable=False)  # cpu_load, memory_usage, interface_down, etc.
     condition = Column(String(50), nullable=False)  # greater_than, less_than, equals, not_equals
     threshold = Column(Float, nullable=False)
+    clear_threshold = Column(Float)  # Hysteresis: condition clears against this (defaults to threshold)
     duration_seconds = Column(Integer, default=0)  # Alert only if condition persists for X seconds
     
     # Severity
@@ -56,6 +57,7 @@ class AlertHistory(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     alert_id = Column(Integer, ForeignKey("alerts.id", ondelete="CASCADE"), nullable=False, index=True)
+    device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), index=True)  # Device that triggered a site/org-wide rule
     
     # Alert trigger details
     value = Column(Float, nullable=False)  # The value that triggered the alert
@@ -68,6 +70,12 @@ class AlertHistory(Base):
     
     resolved_at = Column(DateTime(timezone=True))
     
+    # Coalesced repeats of an open incident
+    occurrence_count = Column(Integer, default=1, nullable=False)
+    last_value = Column(Float)
+    last_seen_at = Column(DateTime(timezone=True))
+    is_flapping = Column(Boolean, default=False, nullable=False)
+    
     # Timestamps
     triggered_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     
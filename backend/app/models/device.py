@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Table, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -103,16 +103,42 @@ class DeviceGroup(Base):
         return f"<DeviceGroup {self.name}>"
 
 
+class ConfigBlob(Base):
+    """
+    Content-addressed, zstd-compressed configuration exports
+
+    Keyed by the SHA-256 of the normalized export, so identical backups
+    share one blob and cost only a DeviceConfig metadata row.
+    """
+    __tablename__ = "config_blobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), nullable=False, unique=True)
+    
+    data = Column(LargeBinary, nullable=False)  # zstd-compressed normalized export
+    size_bytes = Column(Integer, nullable=False)  # Uncompressed size
+    compressed_size_bytes = Column(Integer, nullable=False)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<ConfigBlob {self.sha256[:12]} ({self.size_bytes} bytes)>"
+
+
 class DeviceConfig(Base):
     """
     Configuration backups for devices
     """
     __tablename__ = "device_configs"
+    __table_args__ = (
+        Index("ix_device_configs_device_created_at", "device_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), nullable=False, index=True)
     
-    config_data = Column(Text, nullable=False)
+    blob_id = Column(Integer, ForeignKey("config_blobs.id", ondelete="RESTRICT"), nullable=False, index=True)
+    content_hash = Column(String(64), nullable=False)  # ConfigBlob.sha256, for cheap change detection
     backup_type = Column(String(50), default="manual")  # manual, automatic, scheduled
     file_size_bytes = Column(Integer)
     
@@ -121,6 +147,7 @@ class DeviceConfig(Base):
     
     # Relationships
     device = relationship("Device", back_populates="configs")
+    blob = relationship("ConfigBlob")
 
     def __repr__(self):
         return f"<DeviceConfig for device_{self.device_id} at {self.created_at}>"
@@ -0,0 +1,48 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Index, text
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class DhcpLease(Base):
+    """
+    DHCP leases harvested from every device, for fleet-wide MAC/IP/hostname lookup
+    """
+    __tablename__ = "dhcp_leases"
+    __table_args__ = (
+        Index("uq_dhcp_leases_device_ros_id", "device_id", "ros_id", unique=True),
+        # Prefix indexes: serve equality and LIKE 'prefix%' lookups
+        Index("ix_dhcp_leases_mac_prefix", "mac_address", postgresql_ops={"mac_address": "varchar_pattern_ops"}),
+        Index("ix_dhcp_leases_ip_prefix", "ip_address", postgresql_ops={"ip_address": "varchar_pattern_ops"}),
+        Index("ix_dhcp_leases_host_name_prefix", text("lower(host_name) varchar_pattern_ops")),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), nullable=False)
+    site_id = Column(Integer, ForeignKey("sites.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # Lease identity on the router (/ip/dhcp-server/lease .id)
+    ros_id = Column(String(32), nullable=False)
+
+    # Lease data
+    mac_address = Column(String(17))  # Upper-case, colon separated
+    ip_address = Column(String(45))
+    host_name = Column(String(255))
+    status = Column(String(32))  # bound, waiting, offered, ...
+    server = Column(String(100))
+    is_dynamic = Column(Boolean, default=True)
+    comment = Column(Text)
+    expires_at = Column(DateTime(timezone=True))  # As of the last change
+
+    # Change detection: hash of the fields above except the expiry countdown
+    fingerprint = Column(String(16), nullable=False)
+
+    # Timestamps
+    first_seen_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # Relationships
+    device = relationship("Device")
+
+    def __repr__(self):
+        return f"<DhcpLease {self.mac_address} {self.ip_address} on device_{self.device_id}>"
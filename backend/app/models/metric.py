@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -9,6 +9,9 @@ class DeviceMetric(Base):
     Time-series metrics for devices (CPU, memory, temperature, etc.)
     """
     __tablename__ = "device_metrics"
+    __table_args__ = (
+        Index("ix_device_metrics_device_timestamp", "device_id", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -0,0 +1,47 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class DeviceLink(Base):
+    """
+    Layer 2 adjacency seen from one device: an /ip/neighbor entry or a
+    bridge host entry, resolved to a known device and interface when possible
+    """
+    __tablename__ = "device_links"
+    __table_args__ = (
+        Index("uq_device_links_device_neighbor", "device_id", "interface_name", "neighbor_mac", "source", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), nullable=False)
+    site_id = Column(Integer, ForeignKey("sites.id", ondelete="CASCADE"), nullable=False, index=True)
+    source = Column(String(20), nullable=False)  # neighbor, bridge-host
+
+    # Local end
+    interface_id = Column(Integer, ForeignKey("interfaces.id", ondelete="SET NULL"))
+    interface_name = Column(String(255), nullable=False)
+
+    # Remote end, as reported
+    neighbor_mac = Column(String(17), nullable=False)
+    neighbor_address = Column(String(45))
+    neighbor_identity = Column(String(255))
+    neighbor_platform = Column(String(100))
+    neighbor_board = Column(String(100))
+    neighbor_interface_name = Column(String(255))
+
+    # Remote end, resolved (NULL for devices we don't manage)
+    neighbor_device_id = Column(Integer, ForeignKey("devices.id", ondelete="SET NULL"), index=True)
+    neighbor_interface_id = Column(Integer, ForeignKey("interfaces.id", ondelete="SET NULL"))
+
+    # Timestamps
+    first_seen_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # Relationships
+    device = relationship("Device", foreign_keys=[device_id])
+    neighbor_device = relationship("Device", foreign_keys=[neighbor_device_id])
+
+    def __repr__(self):
+        return f"<DeviceLink device_{self.device_id}:{self.interface_name} -> {self.neighbor_identity or self.neighbor_mac}>"
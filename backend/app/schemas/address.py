@@ -0,0 +1,46 @@
+"""
+Pydantic schemas for IP address inventory endpoints
+"""
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class AddressOwner(BaseModel):
+    """An interface address and the device that carries it"""
+    address: str = Field(..., description="Interface address with prefix, e.g. 10.20.4.1/24")
+    network: str
+    interface: Optional[str] = None
+    is_dynamic: Optional[bool] = None
+    device_id: int
+    device_name: str
+    site_id: int
+    client_id: int
+    organization_id: int
+
+
+class AddressLookupResponse(BaseModel):
+    """Who owns an address"""
+    ip: str
+    owners: list[AddressOwner] = Field(..., description="Interfaces configured with exactly this address")
+    network: Optional[str] = Field(None, description="Most specific inventory network containing the address")
+    network_owners: list[AddressOwner] = Field(..., description="Interfaces attached to that network")
+
+
+class PrefixQueryResponse(BaseModel):
+    """Inventory addresses related to a prefix"""
+    prefix: str
+    relation: str = Field(..., description="within, containing or overlapping")
+    addresses: list[AddressOwner]
+
+
+class SubnetOverlap(BaseModel):
+    """A network that overlaps one owned by a different client"""
+    network: str
+    client_ids: list[int]
+    addresses: list[AddressOwner] = Field(..., description="Addresses in this network and every enclosing network")
+
+
+class SubnetOverlapResponse(BaseModel):
+    """Subnets shared across clients"""
+    total: int
+    overlaps: list[SubnetOverlap]
@@ -0,0 +1,54 @@
+"""
+Pydantic schemas for AI API endpoints
+"""
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+from enum import Enum
+
+
+class SearchTarget(str, Enum):
+    """Embedding tables available to semantic search"""
+    INSIGHTS = "insights"
+    QUERIES = "queries"
+    METRICS = "metrics"
+
+
+class SemanticSearchRequest(BaseModel):
+    """Semantic search request"""
+    target: SearchTarget = Field(default=SearchTarget.INSIGHTS, description="Table to search")
+    query_text: Optional[str] = Field(None, min_length=1, description="Text to embed server-side")
+    embedding: Optional[list[float]] = Field(None, description="Query embedding (1536 dimensions)")
+    k: int = Field(default=10, ge=1, le=100, description="Number of results")
+    organization_id: Optional[int] = Field(None, description="Restrict to an organization")
+    site_id: Optional[int] = Field(None, description="Restrict to a site")
+    device_id: Optional[int] = Field(None, description="Restrict to a device (metrics only)")
+    ef_search: Optional[int] = Field(None, ge=1, le=1000, description="HNSW candidate list size")
+    probes: Optional[int] = Field(None, ge=1, le=1000, description="IVFFlat lists to probe")
+    exact: Optional[bool] = Field(None, description="Force exact (true) or approximate (false) search")
+
+
+class SemanticSearchHit(BaseModel):
+    """Single semantic search result"""
+    id: int
+    distance: float = Field(..., description="Cosine distance (0 = identical)")
+    text: str
+    organization_id: Optional[int] = None
+    site_id: Optional[int] = None
+    device_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+
+class SemanticSearchResponse(BaseModel):
+    """Semantic search response"""
+    target: SearchTarget
+    results: list[SemanticSearchHit]
+
+
+class AskRequest(BaseModel):
+    """Question for the AI assistant"""
+    user_id: int = Field(..., description="Asking user (scopes the semantic cache to their organization)")
+    question: str = Field(..., min_length=1, max_length=4000)
+    context: Optional[dict] = Field(None, description="Context, e.g. {\"site_id\": 3} or {\"device_ids\": [1, 2]}")
+    provider: Optional[str] = Field(None, description="openai, anthropic, xai or local (default from settings)")
+    model: Optional[str] = Field(None, description="Provider model override")
@@ -0,0 +1,60 @@
+"""
+Pydantic schemas for configuration backup and diff endpoints
+"""
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+class SectionDiffResponse(BaseModel):
+    """Changed lines within one config section"""
+    section: str = Field(..., description="RouterOS menu path, e.g. /ip firewall filter")
+    added: list[str] = []
+    removed: list[str] = []
+    reordered: bool = Field(default=False, description="Same lines in a different order (order-sensitive sections)")
+
+
+class ConfigChangesResponse(BaseModel):
+    """Changes between two backups of one device"""
+    device_id: int
+    baseline_config_id: int
+    baseline_created_at: datetime
+    latest_config_id: int
+    latest_created_at: datetime
+    identical: bool
+    lines_added: int
+    lines_removed: int
+    sections: list[SectionDiffResponse]
+
+
+class ConfigCompareRequest(BaseModel):
+    """Compare a template against many devices' latest backups"""
+    template_config_id: Optional[int] = Field(None, description="Use a stored backup as the template")
+    template_text: Optional[str] = Field(None, min_length=1, description="Or an ad-hoc export text")
+    device_ids: Optional[list[int]] = Field(None, max_length=5000, description="Devices to compare")
+    organization_id: Optional[int] = Field(None, description="Or every device in an organization")
+    client_id: Optional[int] = Field(None, description="Or every device of a client")
+    site_id: Optional[int] = Field(None, description="Or every device at a site")
+    sections: Optional[list[str]] = Field(None, description="Limit to sections with these prefixes, e.g. /ip firewall")
+    include_lines: bool = Field(default=False, description="Return changed lines, not just counts")
+
+
+class DeviceConfigComparison(BaseModel):
+    """One device's drift from the template"""
+    device_id: int
+    has_backup: bool
+    identical: bool = False
+    lines_added: int = 0
+    lines_removed: int = 0
+    changed_sections: list[str] = []
+    sections: Optional[list[SectionDiffResponse]] = None
+
+
+class ConfigCompareResponse(BaseModel):
+    """Fleet comparison result"""
+    template_hash: str
+    devices: int
+    identical: int
+    different: int
+    without_backup: int
+    results: list[DeviceConfigComparison]
@@ -51,6 +51,11 @@ class DeviceCreate(BaseModel):
         }
 
 
+class DeviceBulkCreate(BaseModel):
+    """Schema for onboarding many devices at once"""
+    devices: list[dict] = Field(..., min_length=1, description="Device rows (DeviceCreate fields); validated per row")
+
+
 class DeviceUpdate(BaseModel):
     """Schema for updating an existing device"""
     name: Optional[str] = Field(None, min_length=1, max_length=255)
@@ -0,0 +1,42 @@
+"""
+Pydantic schemas for network discovery endpoints
+"""
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class DiscoveryScanRequest(BaseModel):
+    """Network sweep request"""
+    cidrs: list[str] = Field(..., min_length=1, description="IPv4 ranges, e.g. 192.168.100.0/24 (at most a /16 in total)")
+    ports: list[int] = Field(default=[8728, 8729], min_length=1, max_length=8, description="API ports to probe")
+    tls_ports: list[int] = Field(default=[8729], description="Ports that speak API-SSL")
+    mndp_seconds: float = Field(default=0, ge=0, le=30, description="Also listen for MNDP announcements this long")
+    timeout: Optional[float] = Field(None, gt=0, le=10, description="Connect timeout per probe (seconds)")
+    concurrency: Optional[int] = Field(None, ge=1, le=8192, description="Maximum sockets open at once")
+    include_known: bool = Field(default=False, description="Also return devices already in the database")
+
+
+class DiscoveryCandidate(BaseModel):
+    """A RouterOS device found on the network"""
+    ip_address: str
+    ports: list[int]
+    sources: list[str] = Field(..., description="api, api-ssl and/or mndp")
+    known: bool = Field(default=False, description="Already in the devices table")
+    login: Optional[str] = Field(None, description="plaintext (RouterOS 6.43+) or challenge (older)")
+    tls_subject: Optional[str] = None
+    identity: Optional[str] = None
+    version: Optional[str] = None
+    platform: Optional[str] = None
+    board: Optional[str] = None
+    mac_address: Optional[str] = None
+    software_id: Optional[str] = None
+
+
+class DiscoveryScanResponse(BaseModel):
+    """Network sweep result"""
+    probes: int
+    open: int
+    routeros: int
+    mndp: int
+    seconds: float
+    candidates: list[DiscoveryCandidate]
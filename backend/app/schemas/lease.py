@@ -0,0 +1,25 @@
+"""
+Pydantic schemas for DHCP lease lookup endpoints
+"""
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class LeaseResponse(BaseModel):
+    """A DHCP lease seen on a managed device"""
+    id: int
+    mac_address: Optional[str] = None
+    ip_address: Optional[str] = None
+    host_name: Optional[str] = None
+    status: Optional[str] = None
+    server: Optional[str] = None
+    is_dynamic: Optional[bool] = None
+    comment: Optional[str] = None
+    expires_at: Optional[datetime] = None
+    device_id: int
+    device_name: str
+    site_id: int
+    site_name: str
+    first_seen_at: datetime
+    changed_at: datetime
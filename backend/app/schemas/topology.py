@@ -0,0 +1,65 @@
+"""
+Pydantic schemas for topology endpoints
+"""
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class TopologyNode(BaseModel):
+    """A device in a site graph"""
+    device_id: int
+    name: str
+    device_type: str
+    site_id: int
+    depth: Optional[int] = Field(None, description="Hops from the nearest root; null if unreachable")
+
+
+class TopologyPort(BaseModel):
+    """Interfaces at either end of a link"""
+    a_interface: Optional[str] = None
+    b_interface: Optional[str] = None
+
+
+class TopologyEdge(BaseModel):
+    """Link between two devices (a < b)"""
+    a: int
+    b: int
+    ports: list[TopologyPort]
+
+
+class TopologyGraphResponse(BaseModel):
+    """Adjacency graph of one site"""
+    site_id: int
+    roots: list[int] = Field(..., description="Routers the graph is measured from")
+    nodes: list[TopologyNode]
+    edges: list[TopologyEdge]
+    unreachable: list[int] = Field(..., description="Devices with no link path to a root")
+
+
+class TopologyHop(BaseModel):
+    """One device on a path, with the interfaces toward the next device"""
+    device: TopologyNode
+    ports: list[TopologyPort] = Field(default=[], description="Links to the next hop (a = this device)")
+
+
+class TopologyPathResponse(BaseModel):
+    """Fewest-hop path between two devices"""
+    source: int
+    target: int
+    hops: list[TopologyHop]
+
+
+class UpstreamResponse(BaseModel):
+    """Where a device gets its connectivity from"""
+    device_id: int
+    site_id: int
+    path: list[TopologyNode] = Field(..., description="Shortest path toward the nearest root, nearest first")
+    critical: list[TopologyNode] = Field(..., description="Devices every path to a root crosses, nearest first")
+
+
+class BlastRadiusResponse(BaseModel):
+    """What loses connectivity if a device fails"""
+    device_id: int
+    site_id: int
+    count: int
+    affected: list[TopologyNode]
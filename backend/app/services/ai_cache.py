@@ -0,0 +1,221 @@
+"""
+Semantic response cache for AI queries
+Reuses a stored AIQuery response when a new question from the same tenant,
+about the same context, is close enough in embedding space - skipping the
+LLM round trip entirely.
+
+Entries expire after a TTL and whenever the devices in the context get new
+data (a new metric summary window or a new alert), so a cached answer never
+predates what it talks about; a new daily analysis insight invalidates the
+organization's entries outright.
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import re
+import threading
+
+from sqlalchemy import Integer, any_, func, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.ai import AIQuery, MetricEmbedding
+from app.models.alert import AlertHistory
+from app.models.user import User
+from app.services.embeddings import Embedder, get_embedder
+from app.services.tenancy import tenant_scope
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class CachedAnswer:
+    """A stored response that matched an incoming question"""
+
+    __slots__ = ("query_id", "query_text", "response_text", "similarity", "ai_provider", "ai_model", "created_at")
+
+    def __init__(self, query_id: int, query_text: str, response_text: str, similarity: float,
+                 ai_provider: Optional[str], ai_model: Optional[str], created_at: datetime):
+        self.query_id = query_id
+        self.query_text = query_text
+        self.response_text = response_text
+        self.similarity = similarity
+        self.ai_provider = ai_provider
+        self.ai_model = ai_model
+        self.created_at = created_at
+
+
+def normalize_context(context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Canonical form of a query context: sorted id lists, everything else as-is"""
+    normalized = {}
+    for key, value in sorted((context or {}).items()):
+        if isinstance(value, (list, tuple, set)):
+            value = sorted(set(value), key=str)
+        normalized[key] = value
+    return normalized
+
+
+def context_key(organization_id: int, context: Optional[Dict[str, Any]]) -> str:
+    """Cache partition key: same organization and same context window"""
+    payload = {"organization_id": organization_id, "context": normalize_context(context)}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class SemanticCache:
+    """Embedding-similarity cache over the ai_queries table"""
+
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        similarity_threshold: float = settings.AI_CACHE_SIMILARITY_THRESHOLD,
+        ttl_seconds: int = settings.AI_CACHE_TTL_SECONDS,
+        embedding_cache_size: int = 1024,
+    ):
+        self._embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.embedding_cache_size = embedding_cache_size
+        self._embeddings: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def embedder(self) -> Embedder:
+        return self._embedder or get_embedder()
+
+    def embed(self, query_text: str) -> List[float]:
+        """Embed a question, memoizing repeated identical questions in process"""
+        key = _WHITESPACE.sub(" ", query_text.strip().lower())
+        with self._lock:
+            vector = self._embeddings.get(key)
+            if vector is not None:
+                self._embeddings.move_to_end(key)
+                return vector
+        vector = self.embedder.embed_one(query_text)
+        with self._lock:
+            self._embeddings[key] = vector
+            if len(self._embeddings) > self.embedding_cache_size:
+                self._embeddings.popitem(last=False)
+        return vector
+
+    def _data_version(self, db: Session, organization_id: int, context: Dict[str, Any]) -> Optional[datetime]:
+        """
+        Latest time the context's devices got new summarized data or alerts
+
+        Keyed on when a summary was written, not the window it covers: a
+        late-embedded window can start before an answer yet still be new to it.
+        """
+        device_ids = context.get("device_ids")
+        if not device_ids:
+            scope = tenant_scope(db, organization_id=organization_id, site_id=context.get("site_id"))
+            device_ids = scope.device_ids
+        if not device_ids:
+            return None
+        ids = literal(list(device_ids), ARRAY(Integer))
+        return db.scalar(select(func.greatest(
+            select(func.max(MetricEmbedding.created_at))
+            .where(MetricEmbedding.device_id == any_(ids)).scalar_subquery(),
+            select(func.max(AlertHistory.triggered_at))
+            .where(AlertHistory.device_id == any_(ids)).scalar_subquery(),
+        )))
+
+    def lookup(
+        self,
+        db: Session,
+        organization_id: int,
+        query_text: str,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Optional[CachedAnswer], List[float], str]:
+        """
+        Find a reusable answer for a question
+
+        Returns:
+            (answer or None, the question's embedding, its cache key) - the
+            embedding and key are returned so a miss can be recorded without
+            embedding the question twice
+        """
+        embedding = self.embed(query_text)
+        key = context_key(organization_id, context)
+        if not settings.AI_CACHE_ENABLED:
+            return None, embedding, key
+
+        fresh_after = datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+        data_version = self._data_version(db, organization_id, normalize_context(context))
+        if data_version is not None and data_version > fresh_after:
+            fresh_after = data_version
+
+        # Partition first (indexed cache_key), then rank the handful of candidates exactly
+        candidates = (
+            select(
+                AIQuery.id, AIQuery.query_text, AIQuery.response_text, AIQuery.ai_provider,
+                AIQuery.ai_model, AIQuery.created_at, AIQuery.embedding,
+            )
+            .where(AIQuery.cache_key == key, AIQuery.created_at >= fresh_after, AIQuery.embedding.isnot(None))
+            .cte("candidates")
+            .prefix_with("MATERIALIZED")
+        )
+        distance = candidates.c.embedding.cosine_distance(embedding).label("distance")
+        c = candidates.c
+        row = db.execute(
+            select(c.id, c.query_text, c.response_text, c.ai_provider, c.ai_model, c.created_at, distance)
+            .where(distance <= 1 - self.similarity_threshold)
+            .order_by(distance)
+            .limit(1)
+        ).first()
+        if row is None:
+            return None, embedding, key
+
+        logger.info(f"AI cache hit: query {row.id} (similarity {1 - row.distance:.3f})")
+        return CachedAnswer(
+            query_id=row.id,
+            query_text=row.query_text,
+            response_text=row.response_text,
+            similarity=1 - float(row.distance),
+            ai_provider=row.ai_provider,
+            ai_model=row.ai_model,
+            created_at=row.created_at,
+        ), embedding, key
+
+    def record(
+        self,
+        db: Session,
+        user_id: int,
+        query_text: str,
+        response_text: str,
+        embedding: List[float],
+        key: Optional[str],
+        context: Optional[Dict[str, Any]] = None,
+        **metadata,
+    ) -> AIQuery:
+        """Store an answered question so later similar questions can reuse it"""
+        query = AIQuery(
+            user_id=user_id,
+            query_text=query_text,
+            response_text=response_text,
+            context_json=context,
+            embedding=embedding,
+            cache_key=key,
+            **metadata,
+        )
+        db.add(query)
+        db.commit()
+        return query
+
+    def invalidate(self, db: Session, organization_id: int) -> int:
+        """Stop reusing any cached answer for an organization (history is kept)"""
+        user_ids = select(User.id).where(User.organization_id == organization_id)
+        result = db.execute(
+            update(AIQuery)
+            .where(AIQuery.user_id.in_(user_ids), AIQuery.cache_key.isnot(None))
+            .values(cache_key=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
+
+
+semantic_cache = SemanticCache()
@@ -0,0 +1,531 @@
+"""
+Alert evaluation engine
+Checks incoming poll samples against enabled Alert rules entirely in memory
+and records AlertHistory rows on trigger/resolve transitions. Samples come
+from the device polls: GET /api/v1/metrics/devices/{id}/current and the
+live WebSocket stream (``evaluate_system``).
+"""
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import logging
+import operator
+import threading
+import time
+
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import INGESTION_FLUSH_ROWS
+from app.models.alert import Alert, AlertHistory
+from app.models.user import User
+from app.services.notifications import EMAIL, WEBHOOK, Notification, notification_dispatcher
+from app.services.tenancy import tenant_cache
+
+logger = logging.getLogger(__name__)
+
+_FLUSH_ROWS = INGESTION_FLUSH_ROWS.labels("alert_incidents")
+
+CONDITIONS = {
+    "greater_than": operator.gt,
+    "less_than": operator.lt,
+    "equals": operator.eq,
+    "not_equals": operator.ne,
+    "greater_or_equal": operator.ge,
+    "less_or_equal": operator.le,
+}
+
+
+class AlertRule:
+    """Immutable in-memory copy of an enabled Alert row"""
+
+    __slots__ = (
+        "id", "name", "organization_id", "site_id", "device_id", "metric_type",
+        "condition", "check", "threshold", "clear_threshold", "duration_seconds", "severity",
+        "notify_users", "notify_email", "notify_webhook",
+    )
+
+    def __init__(self, alert: Alert):
+        self.id = alert.id
+        self.name = alert.name
+        self.organization_id = alert.organization_id
+        self.site_id = alert.site_id
+        self.device_id = alert.device_id
+        self.metric_type = alert.metric_type
+        self.condition = alert.condition
+        self.check = CONDITIONS[alert.condition]
+        self.threshold = alert.threshold
+        # Hysteresis: once active, the condition is re-checked against the clear threshold
+        self.clear_threshold = alert.threshold if alert.clear_threshold is None else alert.clear_threshold
+        self.duration_seconds = alert.duration_seconds or 0
+        self.severity = alert.severity
+        self.notify_users = tuple(alert.notify_users or ())
+        self.notify_email = alert.notify_email
+        self.notify_webhook = alert.notify_webhook
+
+    @property
+    def notifies(self) -> bool:
+        return bool(self.notify_users or self.notify_email or self.notify_webhook)
+
+
+class Incident:
+    """An open (or just resolved) alert for one rule on one device"""
+
+    __slots__ = (
+        "rule", "device_id", "value", "triggered_at", "resolved_at", "history_id",
+        "occurrences", "last_value", "last_seen", "is_flapping",
+    )
+
+    def __init__(self, rule: AlertRule, device_id: int, value: float, triggered_at: float, history_id: Optional[int] = None):
+        self.rule = rule
+        self.device_id = device_id
+        self.value = value
+        self.triggered_at = triggered_at
+        self.resolved_at: Optional[float] = None
+        self.history_id = history_id
+        self.occurrences = 1
+        self.last_value = value
+        self.last_seen = triggered_at
+        self.is_flapping = False
+
+    @property
+    def message(self) -> str:
+        rule = self.rule
+        return (
+            f"{rule.name}: {rule.metric_type} {self.value:g} {rule.condition} "
+            f"{rule.threshold:g} on device {self.device_id}"
+        )
+
+
+class RuleState:
+    """Evaluation state for one (rule, device) pair"""
+
+    __slots__ = ("held_since", "incident", "clears", "clear_after")
+
+    def __init__(self, flap_transitions: int):
+        self.held_since: Optional[float] = None
+        self.incident: Optional[Incident] = None
+        self.clears: Deque[float] = deque(maxlen=flap_transitions)  # Recent clear timestamps
+        self.clear_after: Optional[float] = None  # Deferred resolve while flapping
+
+
+def _utc(ts: float) -> datetime:
+    return datetime.fromtimestamp(ts, tz=timezone.utc)
+
+
+class AlertEvaluator:
+    """
+    Streaming evaluator for Alert rules
+
+    Rules are indexed by (metric_type, device), (metric_type, site) and
+    (metric_type, organization); the applicable rule list for each
+    (metric_type, device) pair is resolved once and memoized, so a sample
+    costs one dict lookup plus one comparison per matching rule. Nothing on
+    the evaluate path touches the database; changed incidents are collected
+    and written in bulk by ``flush()``.
+
+    Flapping is contained in three ways: hysteresis between the trigger and
+    clear thresholds, flap detection (``flap_transitions`` clears within
+    ``flap_window_seconds``) which holds the incident open for
+    ``flap_suppress_seconds`` instead of resolving it, and coalescing of
+    re-triggers into the open incident's counter and last-seen value.
+    """
+
+    def __init__(
+        self,
+        flap_window_seconds: float = settings.ALERT_FLAP_WINDOW_SECONDS,
+        flap_transitions: int = settings.ALERT_FLAP_TRANSITIONS,
+        flap_suppress_seconds: float = settings.ALERT_FLAP_SUPPRESS_SECONDS,
+    ):
+        self.flap_window_seconds = flap_window_seconds
+        self.flap_transitions = flap_transitions
+        self.flap_suppress_seconds = flap_suppress_seconds
+
+        self._by_device: Dict[Tuple[str, int], List[AlertRule]] = {}
+        self._by_site: Dict[Tuple[str, int], List[AlertRule]] = {}
+        self._by_org: Dict[Tuple[str, int], List[AlertRule]] = {}
+        self._applicable: Dict[Tuple[str, int], Tuple[AlertRule, ...]] = {}
+        self._device_site: Dict[int, int] = {}
+        self._site_org: Dict[int, Optional[int]] = {}
+
+        # Keyed by (rule_id, device_id)
+        self._states: Dict[Tuple[int, int], RuleState] = {}
+
+        # Incidents changed since the last flush, and notifications to send after it
+        self._dirty: Set[Incident] = set()
+        self._notify: List[Tuple[Incident, str, float]] = []
+        self._lock = threading.Lock()
+        self._hierarchy = None
+        self.rules_stale = True
+
+    # ------------------------------------------------------------------
+    # Rule loading
+    # ------------------------------------------------------------------
+
+    def load(self, db: Session):
+        """(Re)build the rule index and restore open incidents from the database"""
+        self.rules_stale = True
+        self._apply(self._read(db))
+
+    def _read(self, db: Session) -> Optional[tuple]:
+        """
+        Query what ``_apply`` needs, or None when nothing changed
+
+        Only reads, so it can run in a worker thread while ``evaluate``
+        keeps running on the loop. The tenant cache builds a new snapshot on
+        every TTL expiry; a reload is only needed when the rules changed or
+        devices and sites actually moved.
+        """
+        hierarchy = tenant_cache.get(db)
+        device_site = site_org = None
+        if hierarchy is not self._hierarchy:
+            device_site = dict(hierarchy.device_site)
+            site_org = {site_id: hierarchy.site_organization(site_id) for site_id in hierarchy.site_client}
+            if device_site == self._device_site and site_org == self._site_org:
+                device_site = site_org = None
+                self._hierarchy = hierarchy
+        if not self.rules_stale and device_site is None:
+            return None
+        if device_site is None:
+            device_site, site_org = self._device_site, self._site_org
+
+        # Cleared before reading, so an edit committed meanwhile triggers another reload
+        self.rules_stale = False
+        try:
+            alerts = db.query(Alert).filter(Alert.is_enabled.is_(True)).all()
+            rules: Dict[int, AlertRule] = {}
+            for alert in alerts:
+                if alert.condition not in CONDITIONS:
+                    logger.warning(f"Alert {alert.id} has unknown condition '{alert.condition}', skipping")
+                    continue
+                rules[alert.id] = AlertRule(alert)
+
+            open_rows = db.query(
+                AlertHistory.id, AlertHistory.alert_id, AlertHistory.device_id, AlertHistory.value,
+                AlertHistory.triggered_at, AlertHistory.occurrence_count, AlertHistory.last_value,
+                AlertHistory.last_seen_at, AlertHistory.is_flapping,
+            ).filter(AlertHistory.resolved_at.is_(None), AlertHistory.device_id.isnot(None)).all()
+        except Exception:
+            self.rules_stale = True
+            raise
+        return hierarchy, device_site, site_org, rules, open_rows
+
+    def _apply(self, loaded: Optional[tuple]):
+        """Swap in what ``_read`` returned; call it from the thread that calls ``evaluate``"""
+        if loaded is None:
+            return
+        hierarchy, device_site, site_org, rules, open_rows = loaded
+
+        by_device: Dict[Tuple[str, int], List[AlertRule]] = {}
+        by_site: Dict[Tuple[str, int], List[AlertRule]] = {}
+        by_org: Dict[Tuple[str, int], List[AlertRule]] = {}
+        for rule in rules.values():
+            if rule.device_id is not None:
+                by_device.setdefault((rule.metric_type, rule.device_id), []).append(rule)
+            elif rule.site_id is not None:
+                by_site.setdefault((rule.metric_type, rule.site_id), []).append(rule)
+            else:
+                by_org.setdefault((rule.metric_type, rule.organization_id), []).append(rule)
+
+        with self._lock:
+            self._by_device, self._by_site, self._by_org = by_device, by_site, by_org
+            self._applicable = {}
+            self._device_site = device_site
+            self._site_org = site_org
+
+            # Rebind surviving state to the fresh rule objects, drop state for removed rules
+            states = {k: v for k, v in self._states.items() if k[0] in rules}
+            for key, state in states.items():
+                if state.incident is not None:
+                    state.incident.rule = rules[key[0]]
+            for row in open_rows:
+                key = (row.alert_id, row.device_id)
+                state = states.get(key)
+                if row.alert_id not in rules or (state is not None and state.incident is not None):
+                    continue
+                incident = Incident(rules[row.alert_id], row.device_id, row.value, row.triggered_at.timestamp(), row.id)
+                incident.occurrences = row.occurrence_count or 1
+                incident.last_value = row.value if row.last_value is None else row.last_value
+                incident.last_seen = (row.last_seen_at or row.triggered_at).timestamp()
+                incident.is_flapping = bool(row.is_flapping)
+                state = states.setdefault(key, RuleState(self.flap_transitions))
+                state.incident = incident
+                state.held_since = incident.last_seen
+            self._states = states
+            self._hierarchy = hierarchy
+
+        open_count = sum(1 for state in states.values() if state.incident is not None)
+        logger.info(f"Alert evaluator loaded {len(rules)} rules, {open_count} open incidents")
+
+    def rules_for(self, device_id: int, metric_type: str) -> Tuple[AlertRule, ...]:
+        """Rules that apply to a metric on a device (memoized)"""
+        key = (metric_type, device_id)
+        rules = self._applicable.get(key)
+        if rules is None:
+            site_id = self._device_site.get(device_id)
+            org_id = self._site_org.get(site_id)
+            rules = (
+                *self._by_device.get(key, ()),
+                *self._by_site.get((metric_type, site_id), ()),
+                *self._by_org.get((metric_type, org_id), ()),
+            )
+            self._applicable[key] = rules
+        return rules
+
+    # ------------------------------------------------------------------
+    # Hot path
+    # ------------------------------------------------------------------
+
+    def evaluate(self, device_id: int, metric_type: str, value: float, ts: Optional[float] = None):
+        """Evaluate one poll sample; ``ts`` is a Unix timestamp (defaults to now)"""
+        rules = self._applicable.get((metric_type, device_id))
+        if rules is None:
+            rules = self.rules_for(device_id, metric_type)
+        if not rules:
+            return
+        if ts is None:
+            ts = time.time()
+
+        states = self._states
+        for rule in rules:
+            key = (rule.id, device_id)
+            state = states.get(key)
+            active = state is not None and state.held_since is not None
+
+            if rule.check(value, rule.clear_threshold if active else rule.threshold):
+                if state is None:
+                    state = states[key] = RuleState(self.flap_transitions)
+                incident = state.incident
+                if not active:
+                    state.held_since = ts
+                    state.clear_after = None
+                    if incident is not None:
+                        # Re-trigger while the incident was held open by flap suppression
+                        incident.occurrences += 1
+                if incident is None:
+                    if ts - state.held_since >= rule.duration_seconds:
+                        incident = state.incident = Incident(rule, device_id, value, ts)
+                        self._changed(incident, "triggered", ts)
+                else:
+                    incident.last_value = value
+                    incident.last_seen = ts
+                    self._changed(incident)
+
+            elif active:
+                state.held_since = None
+                incident = state.incident
+                if incident is None:
+                    continue
+                clears = state.clears
+                clears.append(ts)
+                if len(clears) == clears.maxlen and ts - clears[0] <= self.flap_window_seconds:
+                    # Flapping: keep the incident open until it has been quiet for the suppress window
+                    state.clear_after = ts + self.flap_suppress_seconds
+                    if not incident.is_flapping:
+                        incident.is_flapping = True
+                        self._changed(incident, "flapping", ts)
+                else:
+                    self._resolve(state, ts)
+
+            elif state is not None and state.clear_after is not None and ts >= state.clear_after:
+                self._resolve(state, ts)
+
+    def _resolve(self, state: RuleState, ts: float):
+        incident = state.incident
+        state.incident = None
+        state.clear_after = None
+        incident.resolved_at = ts
+        self._changed(incident, "resolved", ts)
+
+    def _changed(self, incident: Incident, notify: Optional[str] = None, ts: float = 0.0):
+        with self._lock:
+            self._dirty.add(incident)
+            if notify is not None and incident.rule.notifies:
+                self._notify.append((incident, notify, ts))
+
+    def expire_suppressed(self, ts: Optional[float] = None) -> int:
+        """
+        Resolve flapping incidents whose suppress window has passed
+
+        ``evaluate`` only checks ``clear_after`` when a sample arrives, so
+        the flush loop calls this for devices that stopped reporting. Call
+        it from the thread that calls ``evaluate``.
+
+        Returns:
+            Number of incidents resolved
+        """
+        if ts is None:
+            ts = time.time()
+        expired = [
+            state for state in list(self._states.values())
+            if state.clear_after is not None and ts >= state.clear_after and state.held_since is None
+        ]
+        for state in expired:
+            self._resolve(state, ts)
+        return len(expired)
+
+    def evaluate_many(self, samples: Iterable[Tuple[int, str, float, float]]):
+        """Evaluate (device_id, metric_type, value, ts) samples in order"""
+        evaluate = self.evaluate
+        for device_id, metric_type, value, ts in samples:
+            evaluate(device_id, metric_type, value, ts)
+
+    def evaluate_system(self, device_id: int, system: dict, ts: Optional[float] = None):
+        """Evaluate a ``routeros_records.system_record`` as cpu_load and memory_usage (%) samples"""
+        if ts is None:
+            ts = time.time()
+        self.evaluate(device_id, "cpu_load", system["cpu_load"], ts)
+        if system["memory_total"] > 0:
+            self.evaluate(device_id, "memory_usage", system["memory_used"] / system["memory_total"] * 100, ts)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def flush(self, db: Session) -> int:
+        """
+        Write changed incidents: one bulk INSERT for new incidents and one
+        bulk UPDATE for counters, last-seen values and resolutions
+
+        Returns:
+            Number of incidents written
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            notify, self._notify = self._notify, []
+        if not dirty:
+            return 0
+
+        new = [i for i in dirty if i.history_id is None]
+        existing = [i for i in dirty if i.history_id is not None]
+        try:
+            if new:
+                history_ids = db.scalars(
+                    insert(AlertHistory).returning(AlertHistory.id, sort_by_parameter_order=True),
+                    [
+                        {
+                            "alert_id": i.rule.id,
+                            "device_id": i.device_id,
+                            "value": i.value,
+                            "message": i.message,
+                            "triggered_at": _utc(i.triggered_at),
+                            "resolved_at": _utc(i.resolved_at) if i.resolved_at is not None else None,
+                            "occurrence_count": i.occurrences,
+                            "last_value": i.last_value,
+                            "last_seen_at": _utc(i.last_seen),
+                            "is_flapping": i.is_flapping,
+                        }
+                        for i in new
+                    ],
+                ).all()
+            if existing:
+                db.execute(update(AlertHistory), [
+                    {
+                        "id": i.history_id,
+                        "resolved_at": _utc(i.resolved_at) if i.resolved_at is not None else None,
+                        "occurrence_count": i.occurrences,
+                        "last_value": i.last_value,
+                        "last_seen_at": _utc(i.last_seen),
+                        "is_flapping": i.is_flapping,
+                    }
+                    for i in existing
+                ])
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self._dirty |= dirty
+                self._notify[:0] = notify
+            raise
+
+        _FLUSH_ROWS.observe(len(dirty))
+        for incident, history_id in zip(new, history_ids if new else ()):
+            incident.history_id = history_id
+        self.notify(db, notify)
+        return len(dirty)
+
+    def notify(self, db: Session, transitions: List[Tuple[Incident, str, float]]):
+        """Hand committed transitions to the notification dispatcher"""
+        if not transitions:
+            return
+
+        # One lookup for every user referenced by this batch
+        user_ids = {u for incident, _, _ in transitions for u in incident.rule.notify_users}
+        emails = dict(
+            db.query(User.id, User.email).filter(User.id.in_(user_ids), User.is_active.is_(True)).all()
+        ) if user_ids else {}
+
+        for incident, state, ts in transitions:
+            rule = incident.rule
+            notification = Notification(
+                alert_id=rule.id,
+                alert_name=rule.name,
+                severity=rule.severity,
+                state=state,
+                device_id=incident.device_id,
+                value=incident.last_value,
+                message=incident.message,
+                timestamp=_utc(ts).isoformat(),
+            )
+            if rule.notify_webhook:
+                notification_dispatcher.submit(WEBHOOK, rule.notify_webhook, notification)
+            addresses = {emails[u] for u in rule.notify_users if u in emails}
+            if rule.notify_email:
+                addresses.add(rule.notify_email)
+            for address in addresses:
+                notification_dispatcher.submit(EMAIL, address, notification)
+
+    async def run(self, interval_seconds: float = settings.ALERT_FLUSH_INTERVAL_SECONDS):
+        """Background loop: reload rules when stale and flush transitions"""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                # Queries run in a worker thread; incident state is only
+                # changed here on the loop, like the evaluate calls
+                self._apply(await asyncio.to_thread(self._read_once))
+                self.expire_suppressed()
+                await asyncio.to_thread(self._flush_once)
+            except Exception as e:
+                logger.error(f"Alert flush failed: {str(e)}")
+
+    def _read_once(self) -> Optional[tuple]:
+        db = SessionLocal()
+        try:
+            # Reload on rule edits, and when devices/sites moved in the tenant hierarchy
+            return self._read(db)
+        finally:
+            db.close()
+
+    def _flush_once(self):
+        db = SessionLocal()
+        try:
+            written = self.flush(db)
+            if written:
+                logger.info(f"Wrote {written} alert incident updates")
+        finally:
+            db.close()
+
+
+alert_evaluator = AlertEvaluator()
+
+
+@event.listens_for(Session, "after_flush")
+def _track_rule_changes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Alert):
+            session.info["alert_rules_changed"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_rules_stale(session):
+    if session.info.pop("alert_rules_changed", False):
+        alert_evaluator.rules_stale = True
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rule_changes(session):
+    session.info.pop("alert_rules_changed", None)
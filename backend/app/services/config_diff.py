@@ -0,0 +1,290 @@
+"""
+Section-aware RouterOS configuration diffs
+Exports are parsed once per distinct content hash into per-section line
+lists (continuations joined, comments dropped) plus line multisets, and the
+parsed form is cached. Diffs compare sections by multiset difference, with
+ordering only significant for sections where rule order matters (firewall,
+routing filters, queues).
+
+One-vs-many comparisons dedupe targets by content hash first: a fleet of
+hundreds of devices typically has a few dozen distinct configs, and each
+distinct pair is diffed once.
+"""
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+import logging
+import threading
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.device import ConfigBlob, DeviceConfig
+from app.services.config_store import content_hash, decompress, latest_hashes, normalize_export
+
+logger = logging.getLogger(__name__)
+
+COMMAND_VERBS = {"add", "set", "remove", "unset", "enable", "disable", "move", "print", "export", "reset"}
+
+# Sections where line order changes behaviour (rule evaluation order)
+ORDER_SENSITIVE = (
+    "/ip firewall", "/ipv6 firewall", "/routing filter", "/queue simple",
+    "/queue tree", "/interface bridge filter", "/interface bridge nat",
+)
+
+ROOT_SECTION = "/"
+
+
+class ParsedConfig:
+    """An export split into sections; immutable and shared through the cache"""
+
+    __slots__ = ("sha256", "sections", "counts")
+
+    def __init__(self, sha256: str, sections: Dict[str, Tuple[str, ...]]):
+        self.sha256 = sha256
+        self.sections = sections
+        self.counts = {name: Counter(lines) for name, lines in sections.items()}
+
+
+class SectionDiff:
+    """Lines added and removed within one section"""
+
+    __slots__ = ("section", "added", "removed", "reordered")
+
+    def __init__(self, section: str, added: List[str], removed: List[str], reordered: bool = False):
+        self.section = section
+        self.added = added
+        self.removed = removed
+        self.reordered = reordered
+
+    def to_dict(self) -> dict:
+        return {"section": self.section, "added": self.added, "removed": self.removed, "reordered": self.reordered}
+
+
+class ConfigDiff:
+    """Difference between two parsed configs (old -> new)"""
+
+    __slots__ = ("old_hash", "new_hash", "sections")
+
+    def __init__(self, old_hash: str, new_hash: str, sections: List[SectionDiff]):
+        self.old_hash = old_hash
+        self.new_hash = new_hash
+        self.sections = sections
+
+    @property
+    def identical(self) -> bool:
+        return not self.sections
+
+    @property
+    def lines_added(self) -> int:
+        return sum(len(s.added) for s in self.sections)
+
+    @property
+    def lines_removed(self) -> int:
+        return sum(len(s.removed) for s in self.sections)
+
+
+def _split_section(line: str) -> Tuple[str, str]:
+    """Split '/ip address add address=...' into ('/ip address', 'add address=...')"""
+    tokens = line.split(" ")
+    for i, token in enumerate(tokens[1:], start=1):
+        if token in COMMAND_VERBS:
+            return " ".join(tokens[:i]), " ".join(tokens[i:])
+    return line, ""
+
+
+def parse_export(normalized: str, sha256: Optional[str] = None) -> ParsedConfig:
+    """Parse a normalized RouterOS export into sections"""
+    sections: Dict[str, List[str]] = {}
+    current = ROOT_SECTION
+    pending = ""
+    for raw in normalized.split("\n"):
+        if pending:
+            raw = pending + raw.lstrip()
+            pending = ""
+        if raw.endswith("\\"):
+            pending = raw[:-1]
+            continue
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("/"):
+            current, command = _split_section(line)
+            if not command:
+                continue
+            line = command
+        sections.setdefault(current, []).append(line)
+    return ParsedConfig(
+        sha256 or content_hash(normalized),
+        {name: tuple(lines) for name, lines in sections.items()},
+    )
+
+
+def _ordered_difference(lines: Tuple[str, ...], extra: Counter) -> List[str]:
+    """Lines of ``lines`` that are in the multiset ``extra``, in original order"""
+    extra = Counter(extra)
+    result = []
+    for line in lines:
+        if extra[line] > 0:
+            extra[line] -= 1
+            result.append(line)
+    return result
+
+
+def diff_parsed(old: ParsedConfig, new: ParsedConfig, sections: Optional[Iterable[str]] = None) -> ConfigDiff:
+    """Section-aware diff of two parsed configs"""
+    if old.sha256 == new.sha256:
+        return ConfigDiff(old.sha256, new.sha256, [])
+    names = sorted(set(old.sections) | set(new.sections))
+    if sections is not None:
+        wanted = tuple(sections)
+        names = [name for name in names if name.startswith(wanted)]
+
+    result = []
+    empty: Tuple[str, ...] = ()
+    for name in names:
+        old_lines = old.sections.get(name, empty)
+        new_lines = new.sections.get(name, empty)
+        if old_lines == new_lines:
+            continue
+        old_counts = old.counts.get(name) or Counter()
+        new_counts = new.counts.get(name) or Counter()
+        added = _ordered_difference(new_lines, new_counts - old_counts)
+        removed = _ordered_difference(old_lines, old_counts - new_counts)
+        if added or removed:
+            result.append(SectionDiff(name, added, removed))
+        elif name.startswith(ORDER_SENSITIVE):
+            result.append(SectionDiff(name, [], [], reordered=True))
+    return ConfigDiff(old.sha256, new.sha256, result)
+
+
+class _LRU:
+    """Small thread-safe LRU map"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._data: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+
+class ConfigDiffEngine:
+    """Parses, caches and diffs stored configs"""
+
+    def __init__(self, parsed_cache_size: int = 4096, diff_cache_size: int = 16384, workers: int = 8):
+        self._parsed = _LRU(parsed_cache_size)
+        self._diffs = _LRU(diff_cache_size)
+        self.workers = workers
+
+    def parse_text(self, export: str) -> ParsedConfig:
+        """Parse (and cache) ad-hoc export text such as a golden template"""
+        normalized = normalize_export(export)
+        sha256 = content_hash(normalized)
+        parsed = self._parsed.get(sha256)
+        if parsed is None:
+            parsed = parse_export(normalized, sha256)
+            self._parsed.put(sha256, parsed)
+        return parsed
+
+    def parsed(self, db: Session, hashes: Iterable[str]) -> Dict[str, ParsedConfig]:
+        """Parsed configs by content hash; only uncached blobs are read and parsed"""
+        result: Dict[str, ParsedConfig] = {}
+        missing = []
+        for sha256 in set(hashes):
+            parsed = self._parsed.get(sha256)
+            if parsed is None:
+                missing.append(sha256)
+            else:
+                result[sha256] = parsed
+        if not missing:
+            return result
+
+        blobs = db.execute(select(ConfigBlob.sha256, ConfigBlob.data).where(ConfigBlob.sha256.in_(missing))).all()
+
+        def load(blob) -> ParsedConfig:
+            return parse_export(decompress(blob.data), blob.sha256)
+
+        if len(blobs) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(blobs))) as pool:
+                loaded = list(pool.map(load, blobs))
+        else:
+            loaded = [load(blob) for blob in blobs]
+        for parsed in loaded:
+            self._parsed.put(parsed.sha256, parsed)
+            result[parsed.sha256] = parsed
+        return result
+
+    def diff(self, old: ParsedConfig, new: ParsedConfig, sections: Optional[Tuple[str, ...]] = None) -> ConfigDiff:
+        key = (old.sha256, new.sha256, sections)
+        cached = self._diffs.get(key)
+        if cached is None:
+            cached = diff_parsed(old, new, sections)
+            self._diffs.put(key, cached)
+        return cached
+
+    def compare_fleet(
+        self,
+        db: Session,
+        template: ParsedConfig,
+        device_ids: Iterable[int],
+        sections: Optional[Tuple[str, ...]] = None,
+    ) -> Dict[int, Optional[ConfigDiff]]:
+        """
+        Diff each device's latest backup against a template (one-vs-many)
+
+        Returns:
+            device_id -> diff (template -> device), or None if the device has no backup
+        """
+        device_ids = list(device_ids)
+        hashes = latest_hashes(db, device_ids)
+        parsed = self.parsed(db, hashes.values())
+        diffs = {sha256: self.diff(template, config, sections) for sha256, config in parsed.items()}
+        return {device_id: diffs.get(hashes.get(device_id)) for device_id in device_ids}
+
+    def changes_since(
+        self,
+        db: Session,
+        device_id: int,
+        since: datetime,
+        sections: Optional[Tuple[str, ...]] = None,
+    ) -> Optional[Tuple[DeviceConfig, DeviceConfig, ConfigDiff]]:
+        """
+        Diff a device's latest backup against its last backup at or before ``since``
+
+        Falls back to the oldest backup when none predates ``since``.
+
+        Returns:
+            (baseline, latest, diff), or None if the device has no backups
+        """
+        latest = db.scalars(
+            select(DeviceConfig).where(DeviceConfig.device_id == device_id)
+            .order_by(DeviceConfig.created_at.desc()).limit(1)
+        ).first()
+        if latest is None:
+            return None
+        baseline = db.scalars(
+            select(DeviceConfig).where(DeviceConfig.device_id == device_id, DeviceConfig.created_at <= since)
+            .order_by(DeviceConfig.created_at.desc()).limit(1)
+        ).first() or db.scalars(
+            select(DeviceConfig).where(DeviceConfig.device_id == device_id)
+            .order_by(DeviceConfig.created_at).limit(1)
+        ).first()
+        parsed = self.parsed(db, [baseline.content_hash, latest.content_hash])
+        return baseline, latest, self.diff(parsed[baseline.content_hash], parsed[latest.content_hash], sections)
+
+
+config_diff_engine = ConfigDiffEngine()
@@ -0,0 +1,283 @@
+"""
+Content-addressed storage for device configuration backups
+Exports are normalized (timestamp header dropped, line endings unified),
+hashed with SHA-256 and stored once per distinct content as a
+zstd-compressed ConfigBlob. Every backup is a DeviceConfig row pointing at
+its blob, so an unchanged router costs one small metadata row per backup.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import logging
+import re
+import threading
+
+import zstandard
+from sqlalchemy import delete, exists, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.device import ConfigBlob, DeviceConfig
+
+logger = logging.getLogger(__name__)
+
+# "# 2024-01-15 10:23:45 by RouterOS 7.13.2" / "# jan/02/2024 10:23:45 by RouterOS 6.49"
+_EXPORT_TIMESTAMP = re.compile(r"^#\s*\S+\s+\d{1,2}:\d{2}:\d{2}\s+by RouterOS\b.*$")
+
+# CRLF, bare CR (old exports saved on Windows / classic Mac tools) and LF
+_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+
+_local = threading.local()
+
+
+def _compressor() -> zstandard.ZstdCompressor:
+    # zstd contexts are not thread-safe; keep one per thread and reuse it
+    compressor = getattr(_local, "compressor", None)
+    if compressor is None:
+        compressor = _local.compressor = zstandard.ZstdCompressor(level=settings.CONFIG_ZSTD_LEVEL)
+    return compressor
+
+
+def _decompressor() -> zstandard.ZstdDecompressor:
+    decompressor = getattr(_local, "decompressor", None)
+    if decompressor is None:
+        decompressor = _local.decompressor = zstandard.ZstdDecompressor()
+    return decompressor
+
+
+def normalize_export(export: str) -> str:
+    """Canonical export text: no generation timestamp, LF endings, no trailing whitespace"""
+    lines = [line.rstrip() for line in _LINE_BREAK.split(export)]
+    if lines and _EXPORT_TIMESTAMP.match(lines[0]):
+        lines = lines[1:]
+    while lines and not lines[-1]:
+        lines.pop()
+    return "\n".join(lines) + "\n"
+
+
+class ExportWriter:
+    """
+    Streaming normalize -> hash -> compress for an export read in chunks
+
+    Produces the same hash and content as ``normalize_export`` on the whole
+    text, while holding only the compressed output in memory.
+    """
+
+    def __init__(self):
+        self.size_bytes = 0
+        self._partial = ""
+        self._first = True
+        self._blank_lines = 0
+        self._hash = hashlib.sha256()
+        self._compressor = zstandard.ZstdCompressor(level=settings.CONFIG_ZSTD_LEVEL).compressobj()
+        self._chunks: List[bytes] = []
+        self.sha256: Optional[str] = None
+        self.data: Optional[bytes] = None
+
+    def write(self, chunk: str):
+        text = self._partial + chunk
+        # A trailing CR may be the first half of a CRLF split across chunks
+        held_cr = text.endswith("\r")
+        if held_cr:
+            text = text[:-1]
+        lines = _LINE_BREAK.split(text)
+        self._partial = lines.pop() + ("\r" if held_cr else "")
+        for line in lines:
+            self._line(line)
+
+    def _line(self, line: str):
+        line = line.rstrip()
+        if self._first:
+            self._first = False
+            if _EXPORT_TIMESTAMP.match(line):
+                return
+        if not line:
+            # Held back so trailing blank lines are dropped, as in normalize_export
+            self._blank_lines += 1
+            return
+        self._emit("\n" * self._blank_lines + line + "\n")
+        self._blank_lines = 0
+
+    def _emit(self, text: str):
+        data = text.encode()
+        self.size_bytes += len(data)
+        self._hash.update(data)
+        self._chunks.append(self._compressor.compress(data))
+
+    def finish(self) -> "ExportWriter":
+        if self._partial:
+            self._line(self._partial)
+            self._partial = ""
+        if not self.size_bytes:
+            self._emit("\n")
+        self._chunks.append(self._compressor.flush())
+        self.sha256 = self._hash.hexdigest()
+        self.data = b"".join(self._chunks)
+        self._chunks = []
+        return self
+
+
+def content_hash(normalized: str) -> str:
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def _blob_ids(db: Session, hashes: Iterable[str]) -> Dict[str, int]:
+    return dict(db.execute(
+        select(ConfigBlob.sha256, ConfigBlob.id).where(ConfigBlob.sha256.in_(list(hashes)))
+    ).all())
+
+
+def _insert_blobs(db: Session, rows: List[dict], ids: Dict[str, int]):
+    """Insert blob rows (ignoring ones a concurrent writer stored first) and record their ids"""
+    if not rows:
+        return
+    db.execute(insert(ConfigBlob).values(rows).on_conflict_do_nothing(index_elements=["sha256"]))
+    ids.update(_blob_ids(db, [row["sha256"] for row in rows]))
+
+
+def _ensure_blobs(db: Session, contents: Dict[str, str]) -> Dict[str, int]:
+    """
+    Make sure a blob exists for every hash -> normalized text
+
+    Only hashes not already stored are compressed and inserted.
+
+    Returns:
+        Mapping of hash to blob id
+    """
+    ids = _blob_ids(db, contents)
+    compressor = _compressor()
+    rows = []
+    for digest in contents:
+        if digest in ids:
+            continue
+        raw = contents[digest].encode()
+        data = compressor.compress(raw)
+        rows.append({
+            "sha256": digest,
+            "data": data,
+            "size_bytes": len(raw),
+            "compressed_size_bytes": len(data),
+        })
+    _insert_blobs(db, rows, ids)
+    return ids
+
+
+def store_configs(
+    db: Session,
+    backups: Iterable[Tuple[int, str]],
+    backup_type: str = "scheduled",
+    created_by_user_id: Optional[int] = None,
+) -> List[DeviceConfig]:
+    """
+    Store a batch of (device_id, export text) backups; the caller commits
+
+    Returns:
+        The new DeviceConfig rows (flushed, with ids)
+    """
+    normalized: List[Tuple[int, str, str]] = []
+    contents: Dict[str, str] = {}
+    for device_id, export in backups:
+        text = normalize_export(export)
+        digest = content_hash(text)
+        normalized.append((device_id, digest, text))
+        contents[digest] = text
+    if not normalized:
+        return []
+
+    blob_ids = _ensure_blobs(db, contents)
+    configs = [
+        DeviceConfig(
+            device_id=device_id,
+            blob_id=blob_ids[digest],
+            content_hash=digest,
+            backup_type=backup_type,
+            file_size_bytes=len(text.encode()),
+            created_by_user_id=created_by_user_id,
+        )
+        for device_id, digest, text in normalized
+    ]
+    db.add_all(configs)
+    db.flush()
+    return configs
+
+
+def store_config(
+    db: Session,
+    device_id: int,
+    export: str,
+    backup_type: str = "manual",
+    created_by_user_id: Optional[int] = None,
+) -> DeviceConfig:
+    """Store one backup; the caller commits"""
+    return store_configs(db, [(device_id, export)], backup_type, created_by_user_id)[0]
+
+
+def store_exports(
+    db: Session,
+    exports: Iterable[Tuple[int, ExportWriter]],
+    backup_type: str = "scheduled",
+) -> int:
+    """
+    Bulk-store finished streamed exports; the caller commits
+
+    Returns:
+        Number of DeviceConfig rows written
+    """
+    exports = list(exports)
+    if not exports:
+        return 0
+    ids = _blob_ids(db, {writer.sha256 for _, writer in exports})
+    rows = {}
+    for _, writer in exports:
+        if writer.sha256 not in ids and writer.sha256 not in rows:
+            rows[writer.sha256] = {
+                "sha256": writer.sha256,
+                "data": writer.data,
+                "size_bytes": writer.size_bytes,
+                "compressed_size_bytes": len(writer.data),
+            }
+    _insert_blobs(db, list(rows.values()), ids)
+    db.execute(insert(DeviceConfig).values([
+        {
+            "device_id": device_id,
+            "blob_id": ids[writer.sha256],
+            "content_hash": writer.sha256,
+            "backup_type": backup_type,
+            "file_size_bytes": writer.size_bytes,
+        }
+        for device_id, writer in exports
+    ]))
+    return len(exports)
+
+
+def decompress(data: bytes) -> str:
+    # Streamed blobs have no content size in the frame header, so decompress as a stream
+    return _decompressor().decompressobj().decompress(data).decode()
+
+
+def load_config(db: Session, config: DeviceConfig) -> str:
+    """Export text of a backup"""
+    return decompress(db.scalar(select(ConfigBlob.data).where(ConfigBlob.id == config.blob_id)))
+
+
+def latest_hashes(db: Session, device_ids: Iterable[int]) -> Dict[int, str]:
+    """Content hash of each device's most recent backup"""
+    rows = db.execute(
+        select(DeviceConfig.device_id, DeviceConfig.content_hash)
+        .where(DeviceConfig.device_id.in_(list(device_ids)))
+        .distinct(DeviceConfig.device_id)
+        .order_by(DeviceConfig.device_id, DeviceConfig.created_at.desc())
+    ).all()
+    return dict(rows)
+
+
+def prune_orphan_blobs(db: Session) -> int:
+    """Delete blobs no backup references any more (after backup retention cleanup)"""
+    result = db.execute(
+        delete(ConfigBlob)
+        .where(~exists().where(DeviceConfig.blob_id == ConfigBlob.id))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    logger.info(f"Pruned {result.rowcount} orphaned config blobs")
+    return result.rowcount
@@ -0,0 +1,321 @@
+"""
+RouterOS network discovery
+Sweeps CIDR ranges for the RouterOS API ports (8728 plain, 8729 TLS) with a
+fixed pool of asyncio workers, so socket usage stays bounded no matter how
+large the range is. Responders are fingerprinted without logging in: an
+unauthenticated /login sentence tells a RouterOS API apart from any other
+listener (and old challenge logins from post-6.43 plaintext ones), and on
+8729 the TLS certificate subject is recorded.
+
+Optionally listens for MNDP (MikroTik Neighbor Discovery) broadcasts, which
+carry identity, version, board and MAC without any probing at all.
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import asyncio
+import ipaddress
+import logging
+import resource
+import socket
+import ssl
+import struct
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+API_PORT = 8728
+API_SSL_PORT = 8729
+MNDP_PORT = 5678
+MAX_ADDRESSES = 65536  # One /16 per scan
+
+# MNDP TLV types
+_MNDP_FIELDS = {
+    1: "mac_address",
+    5: "identity",
+    7: "version",
+    8: "platform",
+    11: "software_id",
+    12: "board",
+}
+
+
+class DiscoveryError(Exception):
+    """Raised for invalid scan requests"""
+    pass
+
+
+class Candidate:
+    """A RouterOS device found on the network"""
+
+    __slots__ = (
+        "ip_address", "ports", "login", "tls_subject", "identity", "version",
+        "platform", "board", "mac_address", "software_id", "sources",
+    )
+
+    def __init__(self, ip_address: str):
+        self.ip_address = ip_address
+        self.ports: List[int] = []
+        self.login: Optional[str] = None  # "plaintext" (6.43+) or "challenge" (older)
+        self.tls_subject: Optional[str] = None
+        self.identity: Optional[str] = None
+        self.version: Optional[str] = None
+        self.platform: Optional[str] = None
+        self.board: Optional[str] = None
+        self.mac_address: Optional[str] = None
+        self.software_id: Optional[str] = None
+        self.sources: List[str] = []  # "api", "api-ssl", "mndp"
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def encode_word(word: bytes) -> bytes:
+    """RouterOS API length-prefixed word"""
+    length = len(word)
+    if length < 0x80:
+        prefix = struct.pack("!B", length)
+    elif length < 0x4000:
+        prefix = struct.pack("!H", length | 0x8000)
+    elif length < 0x200000:
+        prefix = struct.pack("!I", length | 0xC00000)[1:]
+    else:
+        prefix = struct.pack("!I", length | 0xE0000000)
+    return prefix + word
+
+
+async def read_word(reader: asyncio.StreamReader) -> bytes:
+    first = (await reader.readexactly(1))[0]
+    if first < 0x80:
+        length = first
+    elif first < 0xC0:
+        length = ((first & 0x3F) << 8) | (await reader.readexactly(1))[0]
+    elif first < 0xE0:
+        rest = await reader.readexactly(2)
+        length = ((first & 0x1F) << 16) | (rest[0] << 8) | rest[1]
+    else:
+        rest = await reader.readexactly(3)
+        length = ((first & 0x0F) << 24) | (rest[0] << 16) | (rest[1] << 8) | rest[2]
+    return await reader.readexactly(length) if length else b""
+
+
+async def read_sentence(reader: asyncio.StreamReader, max_words: int = 32) -> List[str]:
+    words = []
+    while len(words) < max_words:
+        word = await read_word(reader)
+        if not word:
+            break
+        words.append(word.decode(errors="replace"))
+    return words
+
+
+def expand_targets(cidrs: Sequence[str], ports: Sequence[int]) -> Tuple[int, Iterator[Tuple[str, int]]]:
+    """Validate ranges and return (probe count, lazy iterator of (ip, port))"""
+    networks = []
+    total = 0
+    hosts = 0
+    for cidr in cidrs:
+        try:
+            network = ipaddress.ip_network(cidr.strip(), strict=False)
+        except ValueError as e:
+            raise DiscoveryError(f"Invalid range '{cidr}': {str(e)}")
+        if network.version != 4:
+            raise DiscoveryError(f"Only IPv4 ranges can be swept: {cidr}")
+        networks.append(network)
+        total += network.num_addresses
+        hosts += network.num_addresses - 2 if network.num_addresses > 2 else network.num_addresses
+    if total > MAX_ADDRESSES:
+        raise DiscoveryError(f"Scan covers {total} addresses; the limit is {MAX_ADDRESSES}")
+
+    def targets():
+        for network in networks:
+            hosts = network.hosts() if network.num_addresses > 2 else iter(network)
+            for host in hosts:
+                for port in ports:
+                    yield str(host), port
+
+    return hosts * len(ports), targets()
+
+
+def _tls_context() -> ssl.SSLContext:
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    # api-ssl without a certificate only offers anonymous DH suites
+    context.set_ciphers("ALL:@SECLEVEL=0")
+    return context
+
+
+def _certificate_subject(der: Optional[bytes]) -> Optional[str]:
+    if not der:
+        return None
+    from cryptography import x509
+    try:
+        return x509.load_der_x509_certificate(der).subject.rfc4514_string()
+    except ValueError:
+        return None
+
+
+class DiscoveryScanner:
+    """Bounded-concurrency port sweep plus MNDP listener"""
+
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        tls_ports: Iterable[int] = (API_SSL_PORT,),
+    ):
+        # Keep well inside the process file descriptor limit
+        soft_limit = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+        self.concurrency = max(1, min(concurrency or settings.DISCOVERY_CONCURRENCY, soft_limit - 128))
+        self.timeout = timeout or settings.DISCOVERY_TIMEOUT_SECONDS
+        self.tls_ports = set(tls_ports)
+        self._tls = _tls_context()
+
+    async def probe(self, ip: str, port: int) -> Optional[dict]:
+        """Fingerprint one ip:port; None if closed or not a RouterOS API"""
+        tls = port in self.tls_ports
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(ip, port, ssl=self._tls if tls else None),
+                self.timeout * (3 if tls else 1),
+            )
+        except (OSError, asyncio.TimeoutError, ssl.SSLError):
+            return None
+
+        result = {"ip": ip, "port": port, "tls": tls, "open": True, "routeros": False}
+        try:
+            if tls:
+                ssl_object = writer.get_extra_info("ssl_object")
+                result["tls_subject"] = _certificate_subject(ssl_object.getpeercert(binary_form=True))
+            writer.write(encode_word(b"/login") + b"\x00")
+            await writer.drain()
+            words = await asyncio.wait_for(read_sentence(reader), self.timeout * 2)
+            if words and words[0].startswith("!"):
+                result["routeros"] = True
+                result["login"] = "challenge" if any(w.startswith("=ret=") for w in words) else "plaintext"
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ssl.SSLError, ValueError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await asyncio.wait_for(writer.wait_closed(), self.timeout)
+            except (OSError, asyncio.TimeoutError, ssl.SSLError):
+                pass
+        return result
+
+    async def sweep(self, cidrs: Sequence[str], ports: Sequence[int] = (API_PORT, API_SSL_PORT)) -> Tuple[List[dict], dict]:
+        """
+        Probe every host/port in the ranges with at most ``concurrency`` sockets open
+
+        Returns:
+            (probe results for open ports, sweep statistics)
+        """
+        total, targets = expand_targets(cidrs, ports)
+        results: List[dict] = []
+        started = time.perf_counter()
+
+        async def worker():
+            for ip, port in targets:
+                result = await self.probe(ip, port)
+                if result is not None:
+                    results.append(result)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, total) or 1)))
+        stats = {
+            "probes": total,
+            "open": len(results),
+            "routeros": sum(1 for r in results if r["routeros"]),
+            "seconds": round(time.perf_counter() - started, 2),
+        }
+        return results, stats
+
+    async def listen_mndp(self, seconds: float, port: int = MNDP_PORT) -> Dict[str, dict]:
+        """Collect MNDP announcements for ``seconds``; also sends one discovery request"""
+        loop = asyncio.get_running_loop()
+        found: Dict[str, dict] = {}
+
+        class Protocol(asyncio.DatagramProtocol):
+            def datagram_received(self, data, addr):
+                parsed = parse_mndp(data)
+                if parsed is not None:
+                    found.setdefault(addr[0], {}).update(parsed)
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        try:
+            sock.bind(("0.0.0.0", port))
+        except OSError as e:
+            sock.close()
+            logger.warning(f"MNDP listener unavailable on UDP {port}: {str(e)}")
+            return found
+        transport, _ = await loop.create_datagram_endpoint(Protocol, sock=sock)
+        try:
+            # An empty MNDP packet asks neighbors to announce themselves now
+            transport.sendto(b"\x00\x00\x00\x00", ("255.255.255.255", port))
+            await asyncio.sleep(seconds)
+        except OSError as e:
+            logger.warning(f"MNDP discovery request failed: {str(e)}")
+        finally:
+            transport.close()
+        return found
+
+    async def discover(
+        self,
+        cidrs: Sequence[str],
+        ports: Sequence[int] = (API_PORT, API_SSL_PORT),
+        mndp_seconds: float = 0,
+    ) -> Tuple[List[Candidate], dict]:
+        """Sweep (and optionally listen for MNDP) and merge results per IP"""
+        sweep = self.sweep(cidrs, ports)
+        if mndp_seconds > 0:
+            (results, stats), mndp = await asyncio.gather(sweep, self.listen_mndp(mndp_seconds))
+        else:
+            (results, stats), mndp = await sweep, {}
+
+        # MNDP hears every announcing neighbor; keep only the requested ranges
+        networks = [ipaddress.ip_network(cidr.strip(), strict=False) for cidr in cidrs]
+        mndp = {
+            ip: fields for ip, fields in mndp.items()
+            if any(ipaddress.ip_address(ip) in network for network in networks)
+        }
+
+        candidates: Dict[str, Candidate] = {}
+        for result in results:
+            if not result["routeros"]:
+                continue
+            candidate = candidates.get(result["ip"]) or candidates.setdefault(result["ip"], Candidate(result["ip"]))
+            candidate.ports.append(result["port"])
+            candidate.sources.append("api-ssl" if result["tls"] else "api")
+            candidate.login = candidate.login or result.get("login")
+            candidate.tls_subject = candidate.tls_subject or result.get("tls_subject")
+        for ip, fields in mndp.items():
+            candidate = candidates.get(ip) or candidates.setdefault(ip, Candidate(ip))
+            candidate.sources.append("mndp")
+            for name, value in fields.items():
+                setattr(candidate, name, value)
+        for candidate in candidates.values():
+            candidate.ports.sort()
+        stats["mndp"] = len(mndp)
+        return sorted(candidates.values(), key=lambda c: ipaddress.ip_address(c.ip_address)), stats
+
+
+def parse_mndp(data: bytes) -> Optional[dict]:
+    """Decode an MNDP announcement (4-byte header, then type/length/value fields)"""
+    if len(data) < 8:
+        return None
+    fields = {}
+    offset = 4
+    while offset + 4 <= len(data):
+        kind, length = struct.unpack_from("!HH", data, offset)
+        value = data[offset + 4:offset + 4 + length]
+        offset += 4 + length
+        name = _MNDP_FIELDS.get(kind)
+        if name is None:
+            continue
+        if name == "mac_address":
+            fields[name] = ":".join(f"{b:02X}" for b in value)
+        else:
+            fields[name] = value.decode(errors="replace")
+    return fields or None
@@ -0,0 +1,115 @@
+"""
+Text embedding providers
+Pluggable embedders used for MetricEmbedding, AIInsight and AIQuery vectors.
+The local embedder is deterministic and needs no network, for development
+and offline tests.
+"""
+from typing import List, Optional, Sequence
+import hashlib
+import logging
+import math
+import re
+
+import httpx
+
+from app.core.config import settings
+from app.services.vector_search import EMBEDDING_DIMENSIONS
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9_.%-]+")
+
+
+class EmbeddingError(Exception):
+    """Raised when an embedding provider fails"""
+    pass
+
+
+class Embedder:
+    """Base class: turns a batch of texts into unit-length vectors"""
+
+    name = "base"
+    max_batch_size = 256
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+    def embed_one(self, text: str) -> List[float]:
+        return self.embed([text])[0]
+
+
+class LocalHashEmbedder(Embedder):
+    """
+    Deterministic feature-hashing embedder
+
+    Hashes unigrams and bigrams into a fixed number of signed buckets and
+    L2-normalizes the result. Texts that share vocabulary land close
+    together, which is enough for offline tests of the search paths.
+    """
+
+    name = "local"
+    max_batch_size = 4096
+
+    def __init__(self, dimensions: int = EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def _vector(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        tokens = _TOKEN.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+            vector[digest % self.dimensions] += 1.0 if digest >> 63 else -1.0
+        norm = math.sqrt(sum(x * x for x in vector))
+        return [x / norm for x in vector] if norm else vector
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        return [self._vector(text) for text in texts]
+
+
+class OpenAIEmbedder(Embedder):
+    """OpenAI embeddings API over a persistent HTTP client"""
+
+    name = "openai"
+    max_batch_size = 512
+
+    def __init__(self, api_key: str, model: str = settings.EMBEDDING_MODEL):
+        self.model = model
+        self._client = httpx.Client(
+            base_url="https://api.openai.com/v1",
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=httpx.Timeout(60.0),
+        )
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        try:
+            response = self._client.post("/embeddings", json={
+                "model": self.model,
+                "input": list(texts),
+                "dimensions": EMBEDDING_DIMENSIONS,
+            })
+        except httpx.HTTPError as e:
+            raise EmbeddingError(f"OpenAI embeddings request failed: {str(e)}")
+        if response.status_code != 200:
+            raise EmbeddingError(f"OpenAI embeddings failed: HTTP {response.status_code} {response.text[:200]}")
+        data = sorted(response.json()["data"], key=lambda item: item["index"])
+        return [item["embedding"] for item in data]
+
+
+_embedder: Optional[Embedder] = None
+
+
+def get_embedder() -> Embedder:
+    """Return the configured embedder (created once per process)"""
+    global _embedder
+    if _embedder is None:
+        if settings.EMBEDDING_PROVIDER == "openai":
+            if not settings.OPENAI_API_KEY:
+                raise EmbeddingError("EMBEDDING_PROVIDER=openai requires OPENAI_API_KEY")
+            _embedder = OpenAIEmbedder(settings.OPENAI_API_KEY)
+        elif settings.EMBEDDING_PROVIDER == "local":
+            _embedder = LocalHashEmbedder()
+        else:
+            raise EmbeddingError(f"Unknown EMBEDDING_PROVIDER '{settings.EMBEDDING_PROVIDER}'")
+        logger.info(f"Using {_embedder.name} embedder")
+    return _embedder
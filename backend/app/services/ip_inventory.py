@@ -0,0 +1,327 @@
+"""
+Fleet-wide IP address inventory
+Syncs /ip/address from every device into ip_addresses, and keeps the
+enabled, valid addresses in a per-process binary prefix tree so ownership
+(longest-prefix match), containment and overlap questions are answered
+from memory without touching the database or any router.
+"""
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import ipaddress
+import logging
+import threading
+import time
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.address import IpAddress
+from app.models.client import Client
+from app.models.device import Device
+from app.models.site import Site
+
+logger = logging.getLogger(__name__)
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+# Columns compared to decide whether an address row changed
+_TRACKED = ("address", "network", "interface", "is_dynamic", "is_disabled", "is_invalid", "comment")
+
+
+def normalize_address(entry: dict) -> Optional[dict]:
+    """Map a RouterOS /ip/address entry to ip_addresses columns"""
+    ros_id = entry.get("id") or entry.get(".id")
+    if not ros_id or not entry.get("address"):
+        return None
+    try:
+        interface_address = ipaddress.ip_interface(entry["address"])
+    except ValueError:
+        logger.warning(f"Skipping unparseable address {entry['address']!r}")
+        return None
+    return {
+        "ros_id": ros_id,
+        "address": interface_address.with_prefixlen,
+        "network": interface_address.network.with_prefixlen,
+        "interface": entry.get("actual-interface") or entry.get("interface"),
+        "is_dynamic": entry.get("dynamic", "false") == "true",
+        "is_disabled": entry.get("disabled", "false") == "true",
+        "is_invalid": entry.get("invalid", "false") == "true",
+        "comment": entry.get("comment") or None,
+    }
+
+
+def sync_device_addresses(db: Session, device_id: int, site_id: int, entries: List[dict]) -> Tuple[int, int, int]:
+    """
+    Bring one device's stored addresses in line with what the router reports
+
+    Unchanged addresses are not touched, unless the device has moved to
+    another site; the caller commits.
+
+    Returns:
+        (inserted, updated, deleted)
+    """
+    now = datetime.now(timezone.utc)
+    incoming: Dict[str, dict] = {}
+    for entry in entries:
+        row = normalize_address(entry)
+        if row is not None:
+            incoming[row["ros_id"]] = row
+
+    stored = {
+        row.ros_id: row
+        for row in db.execute(
+            select(IpAddress.id, IpAddress.ros_id, IpAddress.site_id, *(getattr(IpAddress, name) for name in _TRACKED))
+            .where(IpAddress.device_id == device_id)
+        )
+    }
+
+    new_rows = []
+    changed_rows = []
+    for ros_id, row in incoming.items():
+        existing = stored.get(ros_id)
+        if existing is None:
+            new_rows.append({**row, "device_id": device_id, "site_id": site_id})
+        elif existing.site_id != site_id or any(getattr(existing, name) != row[name] for name in _TRACKED):
+            changed_rows.append({**row, "id": existing.id, "site_id": site_id, "changed_at": now})
+    gone = [row.id for ros_id, row in stored.items() if ros_id not in incoming]
+
+    if new_rows:
+        db.execute(insert(IpAddress), new_rows)
+    if changed_rows:
+        db.execute(update(IpAddress), changed_rows)
+    if gone:
+        db.execute(delete(IpAddress).where(IpAddress.id.in_(gone)))
+    return len(new_rows), len(changed_rows), len(gone)
+
+
+class InventoryEntry:
+    """An enabled, valid interface address, with its owner and tenant"""
+
+    __slots__ = (
+        "address", "network", "interface", "device_id", "device_name",
+        "site_id", "client_id", "organization_id", "is_dynamic",
+    )
+
+    def __init__(self, address, network, interface, device_id, device_name, site_id, client_id, organization_id, is_dynamic):
+        self.address = address
+        self.network = network
+        self.interface = interface
+        self.device_id = device_id
+        self.device_name = device_name
+        self.site_id = site_id
+        self.client_id = client_id
+        self.organization_id = organization_id
+        self.is_dynamic = is_dynamic
+
+    def to_dict(self) -> dict:
+        result = {name: getattr(self, name) for name in self.__slots__}
+        result["address"] = self.address.with_prefixlen
+        result["network"] = self.network.with_prefixlen
+        return result
+
+
+class PrefixTree:
+    """
+    Binary prefix tree over IPv4 and IPv6 networks
+
+    Nodes are ``[zero_child, one_child, entries]`` lists; a network of
+    prefix length N is stored N levels below its family's root, so every
+    query walks at most 32 (or 128) levels regardless of tree size.
+    """
+
+    __slots__ = ("_roots", "size")
+
+    def __init__(self):
+        self._roots = {4: [None, None, None], 6: [None, None, None]}
+        self.size = 0
+
+    @staticmethod
+    def _bits(network: Network) -> Iterator[int]:
+        value = int(network.network_address)
+        width = network.max_prefixlen
+        for i in range(network.prefixlen):
+            yield (value >> (width - 1 - i)) & 1
+
+    def insert(self, network: Network, entry: InventoryEntry):
+        node = self._roots[network.version]
+        value = int(network.network_address)
+        shift = network.max_prefixlen - 1
+        for i in range(network.prefixlen):
+            bit = (value >> (shift - i)) & 1
+            child = node[bit]
+            if child is None:
+                child = node[bit] = [None, None, None]
+            node = child
+        if node[2] is None:
+            node[2] = []
+        node[2].append(entry)
+        self.size += 1
+
+    def _node(self, network: Network) -> Tuple[Optional[list], List[InventoryEntry]]:
+        """Node for ``network`` (None if absent) and the entries of its strict supernets"""
+        node = self._roots[network.version]
+        supernets: List[InventoryEntry] = []
+        for bit in self._bits(network):
+            if node[2]:
+                supernets.extend(node[2])
+            node = node[bit]
+            if node is None:
+                break
+        return node, supernets
+
+    def longest_match(self, address: Union[ipaddress.IPv4Address, ipaddress.IPv6Address]) -> List[InventoryEntry]:
+        """Entries of the most specific network containing ``address``"""
+        node = self._roots[address.version]
+        value = int(address)
+        width = address.max_prefixlen
+        best = node[2] or []
+        for i in range(width):
+            node = node[(value >> (width - 1 - i)) & 1]
+            if node is None:
+                break
+            if node[2]:
+                best = node[2]
+        return list(best)
+
+    def supernets(self, network: Network) -> List[InventoryEntry]:
+        """Entries whose network contains ``network`` (including equal), least specific first"""
+        node, entries = self._node(network)
+        if node is not None and node[2]:
+            entries.extend(node[2])
+        return entries
+
+    def subnets(self, network: Network) -> List[InventoryEntry]:
+        """Entries whose network lies within ``network`` (including equal)"""
+        node, _ = self._node(network)
+        entries: List[InventoryEntry] = []
+        stack = [node] if node is not None else []
+        while stack:
+            node = stack.pop()
+            if node[2]:
+                entries.extend(node[2])
+            if node[1] is not None:
+                stack.append(node[1])
+            if node[0] is not None:
+                stack.append(node[0])
+        return entries
+
+    def overlapping(self, network: Network) -> List[InventoryEntry]:
+        """Entries whose network shares any address with ``network``"""
+        node, entries = self._node(network)
+        if node is not None:
+            entries.extend(self.subnets(network))
+        return entries
+
+    def conflicts(self) -> Iterator[Tuple[Network, List[InventoryEntry]]]:
+        """
+        Networks that overlap a network owned by a different client
+
+        Yields (network, entries) where entries are the network's own
+        entries plus those of every supernet, least specific first.
+        """
+        for root in self._roots.values():
+            # (node, supernet entries above it)
+            stack: List[Tuple[list, List[InventoryEntry]]] = [(root, [])]
+            while stack:
+                node, above = stack.pop()
+                here = node[2]
+                if here:
+                    clients = {entry.client_id for entry in here}
+                    if len(clients) > 1 or any(entry.client_id not in clients for entry in above):
+                        yield here[0].network, above + here
+                    above = above + here
+                for child in (node[1], node[0]):
+                    if child is not None:
+                        stack.append((child, above))
+
+
+class IpInventory:
+    """Immutable snapshot of the enabled addresses fleet-wide"""
+
+    def __init__(self, entries: List[InventoryEntry]):
+        self.tree = PrefixTree()
+        self.by_address: Dict[Union[ipaddress.IPv4Address, ipaddress.IPv6Address], List[InventoryEntry]] = {}
+        for entry in entries:
+            self.tree.insert(entry.network, entry)
+            self.by_address.setdefault(entry.address.ip, []).append(entry)
+
+    def lookup(self, ip: str) -> Tuple[List[InventoryEntry], List[InventoryEntry]]:
+        """
+        Who owns an address
+
+        Returns:
+            (entries configured with exactly this address,
+             entries of the most specific network containing it)
+        """
+        address = ipaddress.ip_address(ip)
+        return list(self.by_address.get(address, ())), self.tree.longest_match(address)
+
+
+class IpInventoryCache:
+    """
+    Process-wide cache of the prefix tree
+
+    Rebuilt from ip_addresses once the TTL expires; the harvester runs
+    in its own process, so the TTL is what bounds staleness. ``get`` may
+    block on the rebuild, so async callers run it in a threadpool.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._inventory: Optional[IpInventory] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> IpInventory:
+        inventory = self._inventory
+        if inventory is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+            return inventory
+
+        # One thread rebuilds; the others keep answering from the stale tree
+        if not self._lock.acquire(blocking=inventory is None):
+            return inventory
+        try:
+            current = self._inventory
+            if current is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+                return current
+            inventory = self._load(db)
+            self._inventory = inventory
+            self._loaded_at = time.monotonic()
+        finally:
+            self._lock.release()
+        return inventory
+
+    def invalidate(self):
+        with self._lock:
+            self._inventory = None
+
+    @staticmethod
+    def _load(db: Session) -> IpInventory:
+        started = time.perf_counter()
+        rows = db.execute(
+            select(
+                IpAddress.address, IpAddress.interface, IpAddress.device_id, Device.name,
+                IpAddress.site_id, Site.client_id, Client.organization_id, IpAddress.is_dynamic,
+            )
+            .join(Device, Device.id == IpAddress.device_id)
+            .join(Site, Site.id == IpAddress.site_id)
+            .join(Client, Client.id == Site.client_id)
+            .where(IpAddress.is_disabled.is_(False), IpAddress.is_invalid.is_(False))
+        ).all()
+        entries = []
+        for address, interface, device_id, device_name, site_id, client_id, organization_id, is_dynamic in rows:
+            interface_address = ipaddress.ip_interface(address)
+            entries.append(InventoryEntry(
+                interface_address, interface_address.network, interface, device_id, device_name,
+                site_id, client_id, organization_id, is_dynamic,
+            ))
+        inventory = IpInventory(entries)
+        logger.info(
+            f"Loaded IP inventory: {len(entries)} addresses "
+            f"in {(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+        return inventory
+
+
+ip_inventory_cache = IpInventoryCache(ttl_seconds=settings.IP_INVENTORY_CACHE_TTL_SECONDS)
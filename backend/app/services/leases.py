@@ -0,0 +1,183 @@
+"""
+Fleet-wide DHCP lease index
+Normalizes leases read from /ip/dhcp-server/lease, syncs them per device by
+fingerprint (only new, changed and vanished leases are written), and answers
+MAC / IP / hostname-prefix lookups from the prefix indexes on dhcp_leases.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import logging
+import re
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.device import Device
+from app.models.dhcp import DhcpLease
+from app.models.site import Site
+from app.services.tenancy import TenantScope
+
+logger = logging.getLogger(__name__)
+
+_DURATION = re.compile(r"(\d+)([wdhms])")
+_DURATION_SECONDS = {"w": 604800, "d": 86400, "h": 3600, "m": 60, "s": 1}
+_MAC_SEPARATORS = re.compile(r"[^0-9A-Fa-f]")
+_FULL_IP = re.compile(r"^\d{1,3}(\.\d{1,3}){3}$")
+
+# Fields compared to decide whether a lease row changed
+_TRACKED = ("mac_address", "ip_address", "host_name", "status", "server", "is_dynamic", "comment")
+
+
+def parse_duration(value: Optional[str]) -> Optional[timedelta]:
+    """RouterOS duration ('1d2h3m4s', '00:05:00') to timedelta; None for 'never'/empty"""
+    if not value or value == "never":
+        return None
+    if ":" in value:
+        parts = [int(p) for p in value.split(":")]
+        seconds = 0
+        for part in parts:
+            seconds = seconds * 60 + part
+        return timedelta(seconds=seconds)
+    return timedelta(seconds=sum(int(n) * _DURATION_SECONDS[unit] for n, unit in _DURATION.findall(value)))
+
+
+def normalize_mac(value: Optional[str]) -> Optional[str]:
+    """Upper-case colon-separated MAC (accepts any separator); partial MACs stay partial"""
+    if not value:
+        return None
+    digits = _MAC_SEPARATORS.sub("", value).upper()
+    return ":".join(digits[i:i + 2] for i in range(0, len(digits), 2))
+
+
+def normalize_lease(lease: dict, now: datetime) -> Optional[dict]:
+    """Map a RouterOS lease to dhcp_leases columns plus its fingerprint"""
+    ros_id = lease.get("id") or lease.get(".id")
+    if not ros_id:
+        return None
+    expires_after = parse_duration(lease.get("expires-after"))
+    row = {
+        "ros_id": ros_id,
+        "mac_address": normalize_mac(lease.get("active-mac-address") or lease.get("mac-address")),
+        "ip_address": lease.get("active-address") or lease.get("address"),
+        "host_name": lease.get("host-name") or None,
+        "status": lease.get("status"),
+        "server": lease.get("server"),
+        "is_dynamic": lease.get("dynamic", "false") == "true",
+        "comment": lease.get("comment") or None,
+        "expires_at": now + expires_after if expires_after else None,
+    }
+    row["fingerprint"] = hashlib.blake2b(
+        "\x1f".join(str(row[name]) for name in _TRACKED).encode(), digest_size=8
+    ).hexdigest()
+    return row
+
+
+def sync_device_leases(db: Session, device_id: int, site_id: int, leases: List[dict]) -> Tuple[int, int, int]:
+    """
+    Bring one device's stored leases in line with what the router reports
+
+    Unchanged leases are not touched; the caller commits.
+
+    Returns:
+        (inserted, updated, deleted)
+    """
+    now = datetime.now(timezone.utc)
+    incoming: Dict[str, dict] = {}
+    for lease in leases:
+        row = normalize_lease(lease, now)
+        if row is not None:
+            incoming[row["ros_id"]] = row
+
+    stored = {
+        ros_id: (lease_id, fingerprint, stored_site_id)
+        for lease_id, ros_id, fingerprint, stored_site_id in db.execute(
+            select(DhcpLease.id, DhcpLease.ros_id, DhcpLease.fingerprint, DhcpLease.site_id)
+            .where(DhcpLease.device_id == device_id)
+        )
+    }
+
+    new_rows = []
+    changed_rows = []
+    moved_rows = []  # Unchanged leases of a device that moved to another site
+    for ros_id, row in incoming.items():
+        existing = stored.get(ros_id)
+        if existing is None:
+            new_rows.append({**row, "device_id": device_id, "site_id": site_id})
+        elif existing[1] != row["fingerprint"]:
+            changed_rows.append({**row, "id": existing[0], "site_id": site_id, "changed_at": now})
+        elif existing[2] != site_id:
+            moved_rows.append({"id": existing[0], "site_id": site_id})
+    gone = [lease_id for ros_id, (lease_id, _, _) in stored.items() if ros_id not in incoming]
+
+    if new_rows:
+        db.execute(insert(DhcpLease), new_rows)
+    if changed_rows:
+        db.execute(update(DhcpLease), changed_rows)
+    if moved_rows:
+        db.execute(update(DhcpLease), moved_rows)
+    if gone:
+        db.execute(delete(DhcpLease).where(DhcpLease.id.in_(gone)))
+    return len(new_rows), len(changed_rows) + len(moved_rows), len(gone)
+
+
+def _prefix(value: str) -> str:
+    """LIKE pattern matching values that start with ``value`` literally"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def search_leases(
+    db: Session,
+    mac: Optional[str] = None,
+    ip: Optional[str] = None,
+    hostname: Optional[str] = None,
+    scope: Optional[TenantScope] = None,
+    limit: int = 50,
+) -> List[dict]:
+    """
+    Fleet-wide lease lookup by MAC, IP or hostname
+
+    Complete MACs and IPs match exactly; partial ones (an OUI, a subnet
+    such as '10.1.2.') and hostnames match by prefix.
+    """
+    query = (
+        select(DhcpLease, Device.name.label("device_name"), Site.name.label("site_name"))
+        .join(Device, Device.id == DhcpLease.device_id)
+        .join(Site, Site.id == DhcpLease.site_id)
+    )
+    if mac:
+        normalized = normalize_mac(mac)
+        if len(normalized) == 17:
+            query = query.where(DhcpLease.mac_address == normalized)
+        else:
+            query = query.where(DhcpLease.mac_address.like(_prefix(normalized)))
+    if ip:
+        if _FULL_IP.match(ip) or ":" in ip:
+            query = query.where(DhcpLease.ip_address == ip)
+        else:
+            query = query.where(DhcpLease.ip_address.like(_prefix(ip)))
+    if hostname:
+        query = query.where(func.lower(DhcpLease.host_name).like(_prefix(hostname.lower())))
+    if scope is not None:
+        query = query.where(scope.site_filter(DhcpLease.site_id))
+
+    results = []
+    for lease, device_name, site_name in db.execute(query.order_by(DhcpLease.changed_at.desc()).limit(limit)):
+        results.append({
+            "id": lease.id,
+            "mac_address": lease.mac_address,
+            "ip_address": lease.ip_address,
+            "host_name": lease.host_name,
+            "status": lease.status,
+            "server": lease.server,
+            "is_dynamic": lease.is_dynamic,
+            "comment": lease.comment,
+            "expires_at": lease.expires_at,
+            "device_id": lease.device_id,
+            "device_name": device_name,
+            "site_id": lease.site_id,
+            "site_name": site_name,
+            "first_seen_at": lease.first_seen_at,
+            "changed_at": lease.changed_at,
+        })
+    return results
@@ -0,0 +1,275 @@
+"""
+LLM provider gateway
+One entry point for OpenAI, Anthropic, xAI and self-hosted (OpenAI-compatible)
+models. Each provider gets a persistent pooled HTTP client, a concurrency
+limit and a token-rate budget. Responses are streamed as they arrive, and
+token usage and timings are captured on the completion object.
+"""
+from typing import AsyncIterator, Dict, List, Optional
+import asyncio
+import json
+import logging
+import time
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODELS = {
+    "openai": "gpt-4o-mini",
+    "anthropic": "claude-3-5-sonnet-latest",
+    "xai": "grok-beta",
+    "local": "local",
+}
+
+
+class LLMError(Exception):
+    """Raised when an LLM provider is unavailable or returns an error"""
+    pass
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at ``tokens_per_minute``"""
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.tokens = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: int):
+        amount = min(float(amount), self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def adjust(self, delta: int):
+        """Settle an estimate against actual usage (positive delta = used more)"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class LLMCompletion:
+    """
+    A streaming completion
+
+    Iterate it to receive text deltas as they arrive; once exhausted,
+    ``text``, token counts and timings are populated.
+    """
+
+    def __init__(self, provider: "Provider", model: str, messages: List[dict], system: Optional[str], max_tokens: int):
+        self.provider = provider.name
+        self.model = model
+        self.text = ""
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.first_token_ms: Optional[int] = None
+        self.response_time_ms: Optional[int] = None
+        self._provider = provider
+        self._messages = messages
+        self._system = system
+        self._max_tokens = max_tokens
+
+    @property
+    def tokens_used(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._provider.run(self, self._messages, self._system, self._max_tokens)
+
+    async def collect(self) -> str:
+        async for _ in self:
+            pass
+        return self.text
+
+
+class Provider:
+    """Base provider: pooled client, limits and the SSE streaming loop"""
+
+    path = ""
+
+    def __init__(self, name: str, base_url: str, headers: Dict[str, str]):
+        self.name = name
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=httpx.Timeout(settings.LLM_TIMEOUT_SECONDS, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONCURRENCY,
+                max_keepalive_connections=settings.LLM_MAX_CONCURRENCY,
+            ),
+        )
+        self.semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        self.bucket = TokenBucket(settings.LLM_TOKENS_PER_MINUTE)
+
+    def payload(self, model: str, messages: List[dict], system: Optional[str], max_tokens: int) -> dict:
+        raise NotImplementedError
+
+    def parse(self, event: dict, completion: LLMCompletion) -> Optional[str]:
+        """Update usage from one stream event and return its text delta, if any"""
+        raise NotImplementedError
+
+    async def run(self, completion: LLMCompletion, messages: List[dict], system: Optional[str], max_tokens: int):
+        # Rough prompt estimate (~4 chars/token) plus the output ceiling, settled after the call
+        estimate = sum(len(m.get("content", "")) for m in messages) // 4 + len(system or "") // 4 + max_tokens
+        await self.bucket.acquire(estimate)
+        started = time.perf_counter()
+        try:
+            async with self.semaphore:
+                body = self.payload(completion.model, messages, system, max_tokens)
+                async with self.client.stream("POST", self.path, json=body) as response:
+                    if response.status_code != 200:
+                        detail = (await response.aread()).decode(errors="replace")[:300]
+                        raise LLMError(f"{self.name} returned HTTP {response.status_code}: {detail}")
+                    parts = []
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            break
+                        try:
+                            event = json.loads(data)
+                        except json.JSONDecodeError:
+                            raise LLMError(f"{self.name} sent a malformed stream event: {data[:200]}")
+                        delta = self.parse(event, completion)
+                        if delta:
+                            if completion.first_token_ms is None:
+                                completion.first_token_ms = int((time.perf_counter() - started) * 1000)
+                            parts.append(delta)
+                            yield delta
+                    completion.text = "".join(parts)
+        except httpx.HTTPError as e:
+            raise LLMError(f"{self.name} request failed: {str(e)}")
+        finally:
+            completion.response_time_ms = int((time.perf_counter() - started) * 1000)
+            self.bucket.adjust((completion.tokens_used or estimate) - estimate)
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class OpenAICompatibleProvider(Provider):
+    """OpenAI chat completions API (also used by xAI and local servers)"""
+
+    path = "/chat/completions"
+
+    def payload(self, model, messages, system, max_tokens):
+        if system:
+            messages = [{"role": "system", "content": system}, *messages]
+        return {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
+
+    def parse(self, event, completion):
+        usage = event.get("usage")
+        if usage:
+            completion.input_tokens = usage.get("prompt_tokens", 0)
+            completion.output_tokens = usage.get("completion_tokens", 0)
+        choices = event.get("choices")
+        if choices:
+            return (choices[0].get("delta") or {}).get("content")
+        return None
+
+
+class AnthropicProvider(Provider):
+    """Anthropic messages API"""
+
+    path = "/messages"
+
+    def payload(self, model, messages, system, max_tokens):
+        body = {"model": model, "messages": messages, "max_tokens": max_tokens, "stream": True}
+        if system:
+            body["system"] = system
+        return body
+
+    def parse(self, event, completion):
+        kind = event.get("type")
+        if kind == "content_block_delta":
+            return event.get("delta", {}).get("text")
+        if kind == "message_start":
+            completion.input_tokens = event["message"].get("usage", {}).get("input_tokens", 0)
+        elif kind == "message_delta":
+            completion.output_tokens = event.get("usage", {}).get("output_tokens", 0)
+        elif kind == "error":
+            raise LLMError(f"anthropic stream error: {event.get('error', {}).get('message')}")
+        return None
+
+
+class LLMGateway:
+    """Creates providers on first use and routes completions to them"""
+
+    def __init__(self):
+        self._providers: Dict[str, Provider] = {}
+
+    def _build(self, name: str) -> Provider:
+        if name == "openai" and settings.OPENAI_API_KEY:
+            return OpenAICompatibleProvider(
+                name, "https://api.openai.com/v1", {"Authorization": f"Bearer {settings.OPENAI_API_KEY}"}
+            )
+        if name == "xai" and settings.XAI_API_KEY:
+            return OpenAICompatibleProvider(
+                name, "https://api.x.ai/v1", {"Authorization": f"Bearer {settings.XAI_API_KEY}"}
+            )
+        if name == "local" and settings.LOCAL_LLM_URL:
+            return OpenAICompatibleProvider(name, settings.LOCAL_LLM_URL.rstrip("/"), {})
+        if name == "anthropic" and settings.ANTHROPIC_API_KEY:
+            return AnthropicProvider(
+                name, "https://api.anthropic.com/v1",
+                {"x-api-key": settings.ANTHROPIC_API_KEY, "anthropic-version": "2023-06-01"},
+            )
+        raise LLMError(f"LLM provider '{name}' is not configured")
+
+    def provider(self, name: str) -> Provider:
+        provider = self._providers.get(name)
+        if provider is None:
+            provider = self._providers[name] = self._build(name)
+        return provider
+
+    def stream(
+        self,
+        messages: List[dict],
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+    ) -> LLMCompletion:
+        """Start a streaming completion; iterate the result for text deltas"""
+        name = provider or settings.LLM_DEFAULT_PROVIDER
+        return LLMCompletion(
+            self.provider(name),
+            model or DEFAULT_MODELS.get(name, "default"),
+            messages,
+            system,
+            max_tokens or settings.LLM_MAX_TOKENS,
+        )
+
+    async def complete(self, messages: List[dict], **kwargs) -> LLMCompletion:
+        """Run a completion to the end and return it"""
+        completion = self.stream(messages, **kwargs)
+        await completion.collect()
+        return completion
+
+    async def close(self):
+        for provider in self._providers.values():
+            await provider.close()
+        self._providers.clear()
+
+
+llm_gateway = LLMGateway()
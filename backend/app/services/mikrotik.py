@@ -3,11 +3,35 @@ MikroTik RouterOS API Service
 Handles connections to MikroTik devices and retrieves metrics
 """
 import routeros_api
-from typing import Dict, Any, Optional
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
 import logging
+import time
+
+from app.core import tracing
+from app.core.metrics import ROUTEROS_COMMAND_SECONDS
 
 logger = logging.getLogger(__name__)
 
+# Histogram children per command path, resolved once
+_COMMAND_SECONDS = {
+    path: ROUTEROS_COMMAND_SECONDS.labels(path)
+    for path in (
+        "/login",
+        "/system/identity",
+        "/system/resource",
+        "/interface",
+        "/interface/monitor-traffic",
+        "/ip/dhcp-server/lease",
+        "/ip/address",
+        "/ip/neighbor",
+        "/interface/bridge/host",
+        "/export",
+        "/file/read",
+        "/file/remove",
+    )
+}
+
 
 class MikroTikConnectionError(Exception):
     """Raised when connection to MikroTik device fails"""
@@ -46,16 +70,17 @@ class MikroTikService:
             MikroTikConnectionError: If connection fails
         """
         try:
-            self.connection = routeros_api.RouterOsApiPool(
-                host=self.host,
-                username=self.username,
-                password=self.password,
-                port=self.port,
-                use_ssl=self.use_ssl,
-                plaintext_login=True
-            )
-            # Test connection by getting API
-            api = self.connection.get_api()
+            with self._command("/login"):
+                self.connection = routeros_api.RouterOsApiPool(
+                    host=self.host,
+                    username=self.username,
+                    password=self.password,
+                    port=self.port,
+                    use_ssl=self.use_ssl,
+                    plaintext_login=True
+                )
+                # Test connection by getting API
+                api = self.connection.get_api()
             logger.info(f"Successfully connected to MikroTik device at {self.host}")
             return True
         except Exception as e:
@@ -69,11 +94,36 @@ class MikroTikService:
             self.connection = None
             logger.info(f"Disconnected from {self.host}")
     
+    @contextmanager
+    def _command(self, path: str):
+        """Record one command's round trip, and trace it inside a sampled request"""
+        started = time.perf_counter()
+        span = None
+        if tracing.current_span() is not None:
+            span = tracing.start_span(f"routeros {path}", tracing.CLIENT, {
+                "net.peer.name": self.host,
+                "net.peer.port": self.port,
+                "routeros.command": path,
+            })
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _COMMAND_SECONDS[path].observe(time.perf_counter() - started)
+            if span is not None:
+                span.end(error)
+    
+    def _print(self, path: str) -> list[Dict[str, Any]]:
+        """Run ``print`` on a menu"""
+        with self._command(path):
+            return self.connection.get_api().get_resource(path).get()
+    
     def get_system_identity(self) -> Dict[str, Any]:
         """Get system identity/hostname"""
-        api = self.connection.get_api()
-        resource = api.get_resource('/system/identity')
-        result = resource.get()
+        result = self._print('/system/identity')
         return result[0] if result else {}
     
     def get_system_resources(self) -> Dict[str, Any]:
@@ -90,9 +140,7 @@ class MikroTikService:
                 - uptime: System uptime
                 - architecture-name: CPU architecture
         """
-        api = self.connection.get_api()
-        resource = api.get_resource('/system/resource')
-        result = resource.get()
+        result = self._print('/system/resource')
         return result[0] if result else {}
     
     def get_interfaces(self) -> list[Dict[str, Any]]:
@@ -102,9 +150,7 @@ class MikroTikService:
         Returns:
             List of interface dictionaries with name, type, mac-address, etc.
         """
-        api = self.connection.get_api()
-        resource = api.get_resource('/interface')
-        return resource.get()
+        return self._print('/interface')
     
     def get_interface_stats(self, interface_name: str) -> Dict[str, Any]:
         """
@@ -117,29 +163,67 @@ class MikroTikService:
             Dict with rx-bits-per-second, tx-bits-per-second, etc.
         """
         api = self.connection.get_api()
-        stats = api.get_resource('/interface').call(
-            'monitor-traffic',
-            {'interface': interface_name, 'once': ''}
-        )
+        with self._command("/interface/monitor-traffic"):
+            stats = api.get_resource('/interface').call(
+                'monitor-traffic',
+                {'interface': interface_name, 'once': ''}
+            )
         return stats[0] if stats else {}
     
     def get_all_interface_stats(self) -> Dict[str, Any]:
         """Get statistics for all interfaces at once"""
-        api = self.connection.get_api()
-        resource = api.get_resource('/interface')
-        return resource.get()
+        return self._print('/interface')
     
     def get_dhcp_leases(self) -> list[Dict[str, Any]]:
         """Get list of DHCP leases"""
-        api = self.connection.get_api()
-        resource = api.get_resource('/ip/dhcp-server/lease')
-        return resource.get()
+        return self._print('/ip/dhcp-server/lease')
     
     def get_ip_addresses(self) -> list[Dict[str, Any]]:
         """Get configured IP addresses"""
+        return self._print('/ip/address')
+    
+    def get_neighbors(self) -> list[Dict[str, Any]]:
+        """Get discovered neighbors (MNDP/CDP/LLDP)"""
+        return self._print('/ip/neighbor')
+    
+    def get_bridge_hosts(self) -> list[Dict[str, Any]]:
+        """Get MAC addresses learned on bridge ports"""
+        return self._print('/interface/bridge/host')
+    
+    def export_config(self, chunk_size: int = 32768, file_name: str = "mtcloud-export") -> Iterator[str]:
+        """
+        Stream the configuration export (/export) in chunks
+        
+        The export is written to a temporary file on the device and read back
+        with /file/read (RouterOS 7.13+), so large configs are never held whole
+        in memory on either side. The file is removed afterwards.
+        
+        Args:
+            chunk_size: Bytes per /file/read call
+            file_name: Temporary file name on the device (.rsc is appended)
+            
+        Yields:
+            Export text chunks
+        """
         api = self.connection.get_api()
-        resource = api.get_resource('/ip/address')
-        return resource.get()
+        with self._command("/export"):
+            api.get_resource('/').call('export', {'file': file_name})
+        files = api.get_resource('/file')
+        path = f"{file_name}.rsc"
+        try:
+            offset = 0
+            while True:
+                with self._command("/file/read"):
+                    result = files.call('read', {'file': path, 'chunk-size': str(chunk_size), 'offset': str(offset)})
+                data = result[0].get('data', '') if result else ''
+                if not data:
+                    break
+                offset += len(data.encode())
+                yield data
+        finally:
+            with self._command("/file/remove"):
+                for entry in files.get(name=path):
+                    files.remove(id=entry['id'])
     
     def test_connection(self) -> Dict[str, Any]:
         """
@@ -0,0 +1,305 @@
+"""
+Alert notification dispatcher
+Coalesces alert notifications per target into digests and delivers them over
+a shared httpx pool (webhooks) and a small pool of persistent SMTP
+connections (email), with retries and per-host concurrency limits.
+"""
+from collections import Counter
+from email.message import EmailMessage
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+import asyncio
+import logging
+import queue
+import random
+import smtplib
+import threading
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK = "webhook"
+EMAIL = "email"
+
+# HTTP statuses worth retrying; any other 4xx is a permanent failure
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class PermanentDeliveryError(Exception):
+    """Raised when a target rejects a notification and retrying won't help"""
+    pass
+
+
+class Notification:
+    """A single alert state change destined for one or more targets"""
+
+    __slots__ = ("alert_id", "alert_name", "severity", "state", "device_id", "value", "message", "timestamp")
+
+    def __init__(self, alert_id: int, alert_name: str, severity: str, state: str,
+                 device_id: Optional[int], value: float, message: str, timestamp: str):
+        self.alert_id = alert_id
+        self.alert_name = alert_name
+        self.severity = severity
+        self.state = state  # triggered, flapping, resolved
+        self.device_id = device_id
+        self.value = value
+        self.message = message
+        self.timestamp = timestamp
+
+    def to_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class SMTPPool:
+    """Bounded pool of persistent SMTP connections, used from worker threads"""
+
+    def __init__(self, host: str, port: int, username: Optional[str], password: Optional[str],
+                 use_tls: bool, size: int):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self._idle: "queue.LifoQueue[Optional[smtplib.SMTP]]" = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(None)  # Connections are opened lazily
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.use_tls:
+            conn.starttls()
+        if self.username:
+            conn.login(self.username, self.password or "")
+        return conn
+
+    def send(self, message: EmailMessage):
+        """Send a message on a pooled connection, reconnecting once if it went stale"""
+        conn = self._idle.get()
+        try:
+            if conn is None:
+                conn = self._connect()
+            try:
+                conn.send_message(message)
+            except smtplib.SMTPServerDisconnected:
+                self._discard(conn)
+                conn = self._connect()
+                conn.send_message(message)
+        except Exception:
+            self._discard(conn)
+            conn = None
+            raise
+        finally:
+            self._idle.put(conn)
+
+    @staticmethod
+    def _discard(conn: Optional[smtplib.SMTP]):
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            if conn is not None:
+                try:
+                    conn.quit()
+                except Exception:
+                    self._discard(conn)
+
+
+class NotificationDispatcher:
+    """
+    Async, batching notification dispatcher
+
+    ``submit()`` is cheap and thread-safe: it only appends to an in-memory
+    buffer for the target. Each target's buffer is sent as one digest after
+    the digest window (or as soon as it reaches the max batch size), so an
+    outage that fires hundreds of alerts at the same webhook produces a
+    handful of requests over a bounded number of pooled connections.
+    """
+
+    def __init__(
+        self,
+        digest_window_seconds: float = settings.NOTIFY_DIGEST_WINDOW_SECONDS,
+        max_batch_size: int = settings.NOTIFY_MAX_BATCH_SIZE,
+        max_concurrency_per_target: int = settings.NOTIFY_MAX_CONCURRENCY_PER_TARGET,
+        max_connections: int = settings.NOTIFY_MAX_CONNECTIONS,
+        max_retries: int = settings.NOTIFY_MAX_RETRIES,
+    ):
+        self.digest_window_seconds = digest_window_seconds
+        self.max_batch_size = max_batch_size
+        self.max_concurrency_per_target = max_concurrency_per_target
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._smtp: Optional[SMTPPool] = None
+        # One worker thread per pooled SMTP connection; more would only park
+        # on the pool's queue and starve other asyncio.to_thread users
+        self._smtp_slots: Optional[asyncio.Semaphore] = None
+        self._buffers: Dict[Tuple[str, str], List[Notification]] = {}
+        self._timers: Dict[Tuple[str, str], asyncio.TimerHandle] = {}
+        # Per-host concurrency limits, dropped once no delivery to the host is pending
+        self._semaphores: Dict[Tuple[str, str], Tuple[asyncio.Semaphore, List[int]]] = {}
+        self._inflight: Set[asyncio.Task] = set()
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        if settings.SMTP_HOST:
+            self._smtp = SMTPPool(
+                settings.SMTP_HOST, settings.SMTP_PORT, settings.SMTP_USER, settings.SMTP_PASSWORD,
+                settings.SMTP_USE_TLS, settings.SMTP_POOL_SIZE,
+            )
+            self._smtp_slots = asyncio.Semaphore(settings.SMTP_POOL_SIZE)
+
+    async def stop(self):
+        """Send whatever is buffered, wait for in-flight deliveries, close pools"""
+        for target in list(self._buffers):
+            self._flush_target(target)
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._smtp is not None:
+            await asyncio.to_thread(self._smtp.close)
+        self._loop = None
+
+    # ------------------------------------------------------------------
+    # Buffering
+    # ------------------------------------------------------------------
+
+    def submit(self, kind: str, address: str, notification: Notification):
+        """Queue a notification for a target; safe to call from any thread"""
+        loop = self._loop
+        if loop is None:
+            logger.warning(f"Notification dispatcher not running, dropping {kind} to {address}")
+            return
+        if threading.get_ident() == self._loop_thread:
+            self._buffer((kind, address), notification)
+        else:
+            loop.call_soon_threadsafe(self._buffer, (kind, address), notification)
+
+    def _buffer(self, target: Tuple[str, str], notification: Notification):
+        batch = self._buffers.setdefault(target, [])
+        batch.append(notification)
+        if len(batch) >= self.max_batch_size:
+            self._flush_target(target)
+        elif len(batch) == 1:
+            self._timers[target] = self._loop.call_later(self.digest_window_seconds, self._flush_target, target)
+
+    def _flush_target(self, target: Tuple[str, str]):
+        timer = self._timers.pop(target, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._buffers.pop(target, None)
+        if batch:
+            task = asyncio.ensure_future(self._deliver(target, batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    # ------------------------------------------------------------------
+    # Delivery
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _limit_key(kind: str, address: str) -> Tuple[str, str]:
+        """Concurrency is limited per webhook host and per recipient domain"""
+        if kind == WEBHOOK:
+            return kind, urlsplit(address).netloc.lower()
+        return kind, address.rpartition("@")[2].lower()
+
+    async def _deliver(self, target: Tuple[str, str], batch: List[Notification]):
+        key = self._limit_key(*target)
+        entry = self._semaphores.get(key)
+        if entry is None:
+            entry = self._semaphores[key] = (asyncio.Semaphore(self.max_concurrency_per_target), [0])
+        semaphore, pending = entry
+        pending[0] += 1
+        try:
+            async with semaphore:
+                await self._deliver_with_retries(target, batch)
+        finally:
+            pending[0] -= 1
+            if not pending[0]:
+                del self._semaphores[key]
+
+    async def _deliver_with_retries(self, target: Tuple[str, str], batch: List[Notification]):
+        kind, address = target
+        for attempt in range(self.max_retries + 1):
+            try:
+                if kind == WEBHOOK:
+                    await self._send_webhook(address, batch)
+                else:
+                    await self._send_email(address, batch)
+                return
+            except PermanentDeliveryError as e:
+                logger.error(f"Dropping {len(batch)} notifications to {kind} {address}: {str(e)}")
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.error(f"Giving up on {kind} {address} after {attempt + 1} attempts: {str(e)}")
+                    return
+                delay = min(60.0, 0.5 * 2 ** attempt) * (0.5 + random.random())
+                logger.warning(f"Delivery to {kind} {address} failed ({str(e)}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def _http(self) -> httpx.AsyncClient:
+        """Webhook client, created on the first delivery (building its TLS context is slow)"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(10.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def _send_webhook(self, url: str, batch: List[Notification]):
+        payload = {
+            "type": "alert_digest",
+            "count": len(batch),
+            "alerts": [n.to_dict() for n in batch],
+        }
+        response = await self._http().post(url, json=payload)
+        if response.status_code >= 400:
+            if response.status_code in RETRYABLE_STATUS:
+                response.raise_for_status()
+            raise PermanentDeliveryError(f"HTTP {response.status_code}")
+
+    async def _send_email(self, address: str, batch: List[Notification]):
+        if self._smtp is None:
+            raise PermanentDeliveryError("SMTP is not configured")
+
+        message = EmailMessage()
+        message["From"] = settings.SMTP_FROM
+        message["To"] = address
+        if len(batch) == 1:
+            n = batch[0]
+            message["Subject"] = f"[{settings.PROJECT_NAME}] {(n.severity or 'info').upper()} {n.state}: {n.alert_name}"
+        else:
+            counts = Counter(n.state for n in batch)
+            message["Subject"] = (
+                f"[{settings.PROJECT_NAME}] {len(batch)} alert updates "
+                f"({', '.join(f'{count} {state}' for state, count in counts.items())})"
+            )
+        message.set_content("\n".join(
+            f"[{n.timestamp}] {(n.severity or 'info').upper()} {n.state}: {n.message}" for n in batch
+        ))
+        async with self._smtp_slots:
+            await asyncio.to_thread(self._smtp.send, message)
+
+
+notification_dispatcher = NotificationDispatcher()
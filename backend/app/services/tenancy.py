@@ -0,0 +1,243 @@
+"""
+Tenant hierarchy cache
+Keeps a precomputed Organization -> Client -> Site -> Device mapping in
+process so tenant scoping becomes a single indexed array filter instead of
+three joins plus JSON containment.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+import threading
+import time
+
+from sqlalchemy import Integer, any_, event, inspect, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.client import Client
+from app.models.device import Device
+from app.models.organization import Organization
+from app.models.site import Site
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+_HIERARCHY_MODELS = (Organization, Client, Site, Device)
+
+# Parent foreign key per model; updates to anything else don't move a node
+_PARENT_KEYS = {Client: "organization_id", Site: "client_id", Device: "site_id"}
+
+
+class TenantScope:
+    """Set of sites and devices a caller may see"""
+
+    __slots__ = ("site_ids", "device_ids", "unrestricted")
+
+    def __init__(self, site_ids: Tuple[int, ...] = (), device_ids: Tuple[int, ...] = (), unrestricted: bool = False):
+        self.site_ids = site_ids
+        self.device_ids = device_ids
+        self.unrestricted = unrestricted
+
+    def site_filter(self, column):
+        """Filter clause for a site_id column: ``column = ANY(:site_ids)``"""
+        if self.unrestricted:
+            return literal(True)
+        return column == any_(literal(list(self.site_ids), ARRAY(Integer)))
+
+    def device_filter(self, column):
+        """Filter clause for a device_id column: ``column = ANY(:device_ids)``"""
+        if self.unrestricted:
+            return literal(True)
+        return column == any_(literal(list(self.device_ids), ARRAY(Integer)))
+
+    def __repr__(self):
+        if self.unrestricted:
+            return "<TenantScope unrestricted>"
+        return f"<TenantScope {len(self.site_ids)} sites, {len(self.device_ids)} devices>"
+
+
+UNRESTRICTED = TenantScope(unrestricted=True)
+
+
+class TenantHierarchy:
+    """Immutable snapshot of the tenant tree with memoized scope lookups"""
+
+    def __init__(self, site_rows: Iterable[Tuple[int, int, int]], device_rows: Iterable[Tuple[int, int]]):
+        """
+        Args:
+            site_rows: (site_id, client_id, organization_id) tuples
+            device_rows: (device_id, site_id) tuples
+        """
+        self.client_org: Dict[int, int] = {}
+        self.site_client: Dict[int, int] = {}
+        self.device_site: Dict[int, int] = {}
+        self._sites_by_client: Dict[int, List[int]] = defaultdict(list)
+        self._sites_by_org: Dict[int, List[int]] = defaultdict(list)
+        self._devices_by_site: Dict[int, List[int]] = defaultdict(list)
+        self._memo: Dict[tuple, TenantScope] = {}
+        self._memo_lock = threading.Lock()
+
+        for site_id, client_id, organization_id in site_rows:
+            self.client_org[client_id] = organization_id
+            self.site_client[site_id] = client_id
+            self._sites_by_client[client_id].append(site_id)
+            self._sites_by_org[organization_id].append(site_id)
+
+        for device_id, site_id in device_rows:
+            self.device_site[device_id] = site_id
+            self._devices_by_site[site_id].append(device_id)
+
+    def site_organization(self, site_id: int) -> Optional[int]:
+        return self.client_org.get(self.site_client.get(site_id))
+
+    def _scope_for_sites(self, key: tuple, site_ids: Iterable[int]) -> TenantScope:
+        scope = self._memo.get(key)
+        if scope is not None:
+            return scope
+        sites = tuple(sorted(set(site_ids)))
+        devices = tuple(sorted(d for s in sites for d in self._devices_by_site.get(s, ())))
+        scope = TenantScope(site_ids=sites, device_ids=devices)
+        with self._memo_lock:
+            self._memo[key] = scope
+        return scope
+
+    def organization_scope(self, organization_id: int) -> TenantScope:
+        return self._scope_for_sites(("org", organization_id), self._sites_by_org.get(organization_id, ()))
+
+    def clients_scope(self, client_ids: Iterable[int]) -> TenantScope:
+        clients = tuple(sorted(set(client_ids)))
+        return self._scope_for_sites(
+            ("clients", clients),
+            (s for c in clients for s in self._sites_by_client.get(c, ()))
+        )
+
+    def site_scope(self, site_id: int) -> TenantScope:
+        sites = (site_id,) if site_id in self.site_client else ()
+        return self._scope_for_sites(("site", site_id), sites)
+
+
+class TenantHierarchyCache:
+    """
+    Process-wide cache of the tenant hierarchy
+
+    Invalidated on commits that touch organizations, clients, sites or
+    devices in this process; the TTL bounds staleness for writes made by
+    other workers.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._hierarchy: Optional[TenantHierarchy] = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> TenantHierarchy:
+        hierarchy = self._hierarchy
+        if hierarchy is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+            return hierarchy
+
+        with self._lock:
+            hierarchy = self._hierarchy
+            if hierarchy is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+                return hierarchy
+            generation = self._generation
+
+        hierarchy = self._load(db)
+
+        with self._lock:
+            # Don't cache a snapshot that was invalidated while loading
+            if generation == self._generation:
+                self._hierarchy = hierarchy
+                self._loaded_at = time.monotonic()
+        return hierarchy
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._hierarchy = None
+
+    @staticmethod
+    def _load(db: Session) -> TenantHierarchy:
+        started = time.perf_counter()
+        site_rows = db.execute(
+            select(Site.id, Site.client_id, Client.organization_id).join(Client, Site.client_id == Client.id)
+        ).all()
+        device_rows = db.execute(select(Device.id, Device.site_id)).all()
+        logger.info(
+            f"Loaded tenant hierarchy: {len(site_rows)} sites, {len(device_rows)} devices "
+            f"in {(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+        return TenantHierarchy(site_rows, device_rows)
+
+
+tenant_cache = TenantHierarchyCache(ttl_seconds=settings.TENANT_CACHE_TTL_SECONDS)
+
+
+def tenant_scope(
+    db: Session,
+    organization_id: Optional[int] = None,
+    client_id: Optional[int] = None,
+    site_id: Optional[int] = None,
+) -> TenantScope:
+    """Return the narrowest scope for the given organization/client/site filters"""
+    hierarchy = tenant_cache.get(db)
+    if site_id is not None:
+        scope = hierarchy.site_scope(site_id)
+        client = hierarchy.site_client.get(site_id)
+        if client_id is not None and client != client_id:
+            return TenantScope()
+        if organization_id is not None and hierarchy.client_org.get(client) != organization_id:
+            return TenantScope()
+        return scope
+    if client_id is not None:
+        if organization_id is not None and hierarchy.client_org.get(client_id) != organization_id:
+            return TenantScope()
+        return hierarchy.clients_scope([client_id])
+    if organization_id is not None:
+        return hierarchy.organization_scope(organization_id)
+    return UNRESTRICTED
+
+
+def user_scope(db: Session, user: User) -> TenantScope:
+    """
+    Return the scope a user is authorized for
+
+    global_admin sees everything, msp_admin sees its organization, and all
+    other roles see only their assigned clients within their organization.
+    """
+    if user.role == "global_admin":
+        return UNRESTRICTED
+    hierarchy = tenant_cache.get(db)
+    if user.role == "msp_admin":
+        return hierarchy.organization_scope(user.organization_id)
+    assigned = [
+        c for c in (user.assigned_client_ids or [])
+        if hierarchy.client_org.get(c) == user.organization_id
+    ]
+    return hierarchy.clients_scope(assigned)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_hierarchy_changes(session, flush_context):
+    for obj in (*session.new, *session.deleted):
+        if isinstance(obj, _HIERARCHY_MODELS):
+            session.info["tenant_hierarchy_changed"] = True
+            return
+    for obj in session.dirty:
+        parent_key = _PARENT_KEYS.get(type(obj))
+        if parent_key and inspect(obj).attrs[parent_key].history.has_changes():
+            session.info["tenant_hierarchy_changed"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop("tenant_hierarchy_changed", False):
+        tenant_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop("tenant_hierarchy_changed", None)
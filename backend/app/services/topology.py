@@ -0,0 +1,443 @@
+"""
+Network topology
+Resolves /ip/neighbor and bridge host entries to known devices and
+interfaces, syncs them into device_links, and serves per-site adjacency
+graphs from a process-wide cache.
+
+Each cached site graph is an immutable snapshot with its shortest-path
+tree toward the site's routers and its dominator tree precomputed, so
+upstream and blast-radius queries are lookups. A snapshot is rebuilt only
+when the site's links change (checked at most every
+TOPOLOGY_CACHE_CHECK_SECONDS), never per request.
+"""
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+import logging
+import threading
+import time
+
+from sqlalchemy import delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.device import Device
+from app.models.interface import Interface
+from app.models.topology import DeviceLink
+
+logger = logging.getLogger(__name__)
+
+# Columns compared to decide whether a link row changed
+_TRACKED = (
+    "interface_id", "neighbor_address", "neighbor_identity", "neighbor_platform", "neighbor_board",
+    "neighbor_interface_name", "neighbor_device_id", "neighbor_interface_id",
+)
+
+_VIRTUAL_ROOT = -1
+
+
+def _mac(value: Optional[str]) -> Optional[str]:
+    return value.upper() if value else None
+
+
+class NeighborResolver:
+    """Maps neighbor MACs, addresses and identities to managed devices and interfaces"""
+
+    __slots__ = ("by_interface_mac", "by_device_mac", "by_address", "by_name", "interface_ids")
+
+    def __init__(self, db: Session):
+        self.by_interface_mac: Dict[str, Tuple[int, int]] = {}
+        self.by_device_mac: Dict[str, int] = {}
+        self.by_address: Dict[str, int] = {}
+        self.by_name: Dict[str, int] = {}
+        self.interface_ids: Dict[Tuple[int, str], int] = {}
+
+        for device_id, name, hostname, ip_address, mac_address in db.execute(
+            select(Device.id, Device.name, Device.hostname, Device.ip_address, Device.mac_address)
+        ):
+            self.by_address[ip_address] = device_id
+            for label in (name, hostname):
+                if label:
+                    self.by_name[label.lower()] = device_id
+            if mac_address:
+                self.by_device_mac[mac_address.upper()] = device_id
+        for interface_id, device_id, name, mac_address in db.execute(
+            select(Interface.id, Interface.device_id, Interface.name, Interface.mac_address)
+        ):
+            self.interface_ids[(device_id, name)] = interface_id
+            if mac_address:
+                # Bridges and their ports share a MAC; keep the first (lowest id) interface
+                self.by_interface_mac.setdefault(mac_address.upper(), (device_id, interface_id))
+
+    def device_for_mac(self, mac: Optional[str]) -> Optional[int]:
+        if not mac:
+            return None
+        match = self.by_interface_mac.get(mac)
+        return match[0] if match else self.by_device_mac.get(mac)
+
+    def resolve(
+        self,
+        mac: Optional[str],
+        address: Optional[str] = None,
+        identity: Optional[str] = None,
+        interface_name: Optional[str] = None,
+    ) -> Tuple[Optional[int], Optional[int]]:
+        """(device_id, interface_id) of a neighbor; either may be None"""
+        match = self.by_interface_mac.get(mac) if mac else None
+        if match is not None:
+            device_id, interface_id = match
+        else:
+            device_id = (
+                (self.by_device_mac.get(mac) if mac else None)
+                or (self.by_address.get(address) if address else None)
+                or (self.by_name.get(identity.lower()) if identity else None)
+            )
+            interface_id = None
+        if device_id is not None and interface_name:
+            interface_id = self.interface_ids.get((device_id, interface_name), interface_id)
+        return device_id, interface_id
+
+
+def build_links(
+    device_id: int,
+    neighbors: List[dict],
+    bridge_hosts: List[dict],
+    resolver: NeighborResolver,
+) -> List[dict]:
+    """
+    Turn one device's neighbor and bridge host tables into device_links rows
+
+    Bridge hosts only add links the neighbor table missed, and only on ports
+    that learned exactly one managed device, which makes that device a direct
+    neighbor rather than something further down the segment.
+    """
+    rows: Dict[Tuple[str, str, str], dict] = {}
+    for neighbor in neighbors:
+        mac = _mac(neighbor.get("mac-address"))
+        # RouterOS 7 reports "ether1,bridge" for bridge ports
+        interface_name = (neighbor.get("interface") or "").split(",")[0]
+        if not mac or not interface_name:
+            continue
+        address = neighbor.get("address4") or neighbor.get("address")
+        remote_interface = neighbor.get("interface-name") or None
+        neighbor_device_id, neighbor_interface_id = resolver.resolve(
+            mac, address, neighbor.get("identity"), remote_interface
+        )
+        if neighbor_device_id == device_id:
+            continue
+        rows[(interface_name, mac, "neighbor")] = {
+            "source": "neighbor",
+            "interface_id": resolver.interface_ids.get((device_id, interface_name)),
+            "interface_name": interface_name,
+            "neighbor_mac": mac,
+            "neighbor_address": address,
+            "neighbor_identity": neighbor.get("identity") or None,
+            "neighbor_platform": neighbor.get("platform") or None,
+            "neighbor_board": neighbor.get("board") or None,
+            "neighbor_interface_name": remote_interface,
+            "neighbor_device_id": neighbor_device_id,
+            "neighbor_interface_id": neighbor_interface_id,
+        }
+
+    linked = {row["neighbor_device_id"] for row in rows.values() if row["neighbor_device_id"]}
+    ports: Dict[str, Dict[int, str]] = {}
+    for host in bridge_hosts:
+        if host.get("local") == "true" or host.get("invalid") == "true":
+            continue
+        mac = _mac(host.get("mac-address"))
+        port = host.get("on-interface") or host.get("interface")
+        neighbor_device_id = resolver.device_for_mac(mac)
+        if port and neighbor_device_id is not None and neighbor_device_id != device_id:
+            ports.setdefault(port, {}).setdefault(neighbor_device_id, mac)
+    for port, learned in ports.items():
+        if len(learned) != 1:
+            continue
+        (neighbor_device_id, mac), = learned.items()
+        if neighbor_device_id in linked:
+            continue
+        _, neighbor_interface_id = resolver.resolve(mac)
+        rows[(port, mac, "bridge-host")] = {
+            "source": "bridge-host",
+            "interface_id": resolver.interface_ids.get((device_id, port)),
+            "interface_name": port,
+            "neighbor_mac": mac,
+            "neighbor_address": None,
+            "neighbor_identity": None,
+            "neighbor_platform": None,
+            "neighbor_board": None,
+            "neighbor_interface_name": None,
+            "neighbor_device_id": neighbor_device_id,
+            "neighbor_interface_id": neighbor_interface_id,
+        }
+    return list(rows.values())
+
+
+def sync_device_links(db: Session, device_id: int, site_id: int, rows: List[dict]) -> Tuple[int, int, int]:
+    """
+    Bring one device's stored links in line with ``rows`` from build_links
+
+    Unchanged links are not touched (so cached site graphs stay valid); the
+    caller commits.
+
+    Returns:
+        (inserted, updated, deleted)
+    """
+    now = datetime.now(timezone.utc)
+    incoming = {(row["interface_name"], row["neighbor_mac"], row["source"]): row for row in rows}
+    stored = {
+        (link.interface_name, link.neighbor_mac, link.source): link
+        for link in db.execute(
+            select(
+                DeviceLink.id, DeviceLink.interface_name, DeviceLink.neighbor_mac, DeviceLink.source,
+                *(getattr(DeviceLink, name) for name in _TRACKED)
+            ).where(DeviceLink.device_id == device_id)
+        )
+    }
+
+    new_rows = []
+    changed_rows = []
+    for key, row in incoming.items():
+        existing = stored.get(key)
+        if existing is None:
+            new_rows.append({**row, "device_id": device_id, "site_id": site_id})
+        elif any(getattr(existing, name) != row[name] for name in _TRACKED):
+            changed_rows.append({**row, "id": existing.id, "site_id": site_id, "changed_at": now})
+    gone = [link.id for key, link in stored.items() if key not in incoming]
+
+    if new_rows:
+        db.execute(insert(DeviceLink), new_rows)
+    if changed_rows:
+        db.execute(update(DeviceLink), changed_rows)
+    if gone:
+        db.execute(delete(DeviceLink).where(DeviceLink.id.in_(gone)))
+    return len(new_rows), len(changed_rows), len(gone)
+
+
+class SiteTopology:
+    """
+    Immutable adjacency graph of one site's managed devices
+
+    Edges join devices that see each other in /ip/neighbor or on a bridge
+    port. Roots are the site's routers (or, without any, its best-connected
+    device); everything upstream/blast-radius is measured from them.
+    """
+
+    def __init__(self, site_id: int, version: tuple, nodes: Dict[int, dict], links: List[tuple]):
+        """
+        Args:
+            nodes: device_id -> {"name", "device_type", "site_id"}
+            links: (device_id, interface_name, neighbor_device_id, neighbor_interface_name, source)
+        """
+        self.site_id = site_id
+        self.version = version
+        self.nodes = nodes
+        self.adjacency: Dict[int, Dict[int, Set[Tuple[Optional[str], Optional[str]]]]] = {n: {} for n in nodes}
+        for device_id, interface_name, neighbor_id, neighbor_interface, _ in links:
+            if neighbor_id is None or neighbor_id == device_id or neighbor_id not in nodes:
+                continue
+            self.adjacency[device_id].setdefault(neighbor_id, set()).add((interface_name, neighbor_interface))
+            self.adjacency[neighbor_id].setdefault(device_id, set()).add((neighbor_interface, interface_name))
+        # A link seen from one end only has no remote interface name; drop it once the other end fills it in
+        for edges in self.adjacency.values():
+            for ports in edges.values():
+                named = {pair for pair in ports if pair[0] and pair[1]}
+                for pair in [p for p in ports if not (p[0] and p[1])]:
+                    if any(n[0] == pair[0] or n[1] == pair[1] for n in named):
+                        ports.discard(pair)
+
+        local = [n for n, info in nodes.items() if info["site_id"] == site_id]
+        self.roots = sorted(n for n in local if nodes[n]["device_type"] == "router")
+        if not self.roots and local:
+            self.roots = [max(sorted(local), key=lambda n: len(self.adjacency[n]))]
+
+        self.parent, self.depth = self._bfs(self.roots)
+        self.idom = self._dominators()
+        self.dominated: Dict[int, List[int]] = {}
+        for node, dominator in self.idom.items():
+            if node != _VIRTUAL_ROOT and dominator != _VIRTUAL_ROOT:
+                self.dominated.setdefault(dominator, []).append(node)
+        self._trees: Dict[int, Dict[int, Optional[int]]] = {self.roots[0]: self.parent} if len(self.roots) == 1 else {}
+
+    def _bfs(self, sources: List[int]) -> Tuple[Dict[int, Optional[int]], Dict[int, int]]:
+        parent: Dict[int, Optional[int]] = {s: None for s in sources}
+        depth = {s: 0 for s in sources}
+        queue = deque(sources)
+        while queue:
+            node = queue.popleft()
+            for neighbor in sorted(self.adjacency[node]):
+                if neighbor not in parent:
+                    parent[neighbor] = node
+                    depth[neighbor] = depth[node] + 1
+                    queue.append(neighbor)
+        return parent, depth
+
+    def _dominators(self) -> Dict[int, int]:
+        """Immediate dominators from a virtual root joined to every root (Cooper-Harvey-Kennedy)"""
+        def successors(node):
+            return self.roots if node == _VIRTUAL_ROOT else sorted(self.adjacency[node])
+
+        # Reverse postorder of everything reachable from the virtual root
+        order: List[int] = []
+        seen = {_VIRTUAL_ROOT}
+        stack = [(_VIRTUAL_ROOT, iter(successors(_VIRTUAL_ROOT)))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if child not in seen:
+                    seen.add(child)
+                    stack.append((child, iter(successors(child))))
+                    break
+            else:
+                order.append(node)
+                stack.pop()
+        order.reverse()
+        index = {node: i for i, node in enumerate(order)}
+        roots = set(self.roots)
+
+        idom = {_VIRTUAL_ROOT: _VIRTUAL_ROOT}
+        changed = True
+        while changed:
+            changed = False
+            for node in order[1:]:
+                predecessors = [p for p in self.adjacency[node] if p in index]
+                if node in roots:
+                    predecessors.append(_VIRTUAL_ROOT)
+                new = None
+                for p in predecessors:
+                    if p not in idom:
+                        continue
+                    if new is None:
+                        new = p
+                        continue
+                    a, b = p, new
+                    while a != b:
+                        while index[a] > index[b]:
+                            a = idom[a]
+                        while index[b] > index[a]:
+                            b = idom[b]
+                    new = a
+                if idom.get(node) != new:
+                    idom[node] = new
+                    changed = True
+        return idom
+
+    def unreachable(self) -> List[int]:
+        """Devices with no link path to any root"""
+        return sorted(n for n in self.nodes if n not in self.parent)
+
+    def upstream(self, device_id: int) -> Tuple[List[int], List[int]]:
+        """
+        Returns:
+            (shortest path toward the nearest root, excluding the device itself;
+             devices every such path must cross, nearest first)
+        """
+        path = []
+        node = self.parent.get(device_id)
+        while node is not None:
+            path.append(node)
+            node = self.parent[node]
+        critical = []
+        node = self.idom.get(device_id, _VIRTUAL_ROOT)
+        while node != _VIRTUAL_ROOT:
+            critical.append(node)
+            node = self.idom[node]
+        return path, critical
+
+    def blast_radius(self, device_id: int) -> List[int]:
+        """Devices cut off from every root if ``device_id`` fails"""
+        result = []
+        stack = list(self.dominated.get(device_id, ()))
+        while stack:
+            node = stack.pop()
+            result.append(node)
+            stack.extend(self.dominated.get(node, ()))
+        return sorted(result)
+
+    def path(self, source: int, target: int) -> Optional[List[int]]:
+        """Fewest-hop device path from source to target; None if disconnected"""
+        tree = self._trees.get(target)
+        if tree is None:
+            # Shortest-path tree rooted at the target, kept for the life of the snapshot
+            tree = self._trees.setdefault(target, self._bfs([target])[0])
+        if source not in tree:
+            return None
+        path = [source]
+        while path[-1] != target:
+            path.append(tree[path[-1]])
+        return path
+
+    def ports(self, a: int, b: int) -> List[Tuple[Optional[str], Optional[str]]]:
+        return sorted(self.adjacency[a].get(b, ()), key=lambda pair: (pair[0] or "", pair[1] or ""))
+
+
+class TopologyCache:
+    """Process-wide per-site graph cache, rebuilt per site when its links change"""
+
+    def __init__(self, check_seconds: float):
+        self.check_seconds = check_seconds
+        self._sites: Dict[int, SiteTopology] = {}
+        self._checked_at: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version(db: Session, site_id: int) -> tuple:
+        count, changed_at = db.execute(
+            select(func.count(DeviceLink.id), func.max(DeviceLink.changed_at)).where(DeviceLink.site_id == site_id)
+        ).one()
+        # Per-type count and id sum: a device added, removed or retyped (which
+        # moves the roots) changes it without loading every device
+        device_types = tuple(db.execute(
+            select(Device.device_type, func.count(Device.id), func.sum(Device.id))
+            .where(Device.site_id == site_id)
+            .group_by(Device.device_type)
+            .order_by(Device.device_type)
+        ).all())
+        return count, changed_at, device_types
+
+    def get(self, db: Session, site_id: int) -> SiteTopology:
+        topology = self._sites.get(site_id)
+        now = time.monotonic()
+        if topology is not None and now - self._checked_at.get(site_id, 0.0) < self.check_seconds:
+            return topology
+
+        version = self._version(db, site_id)
+        if topology is None or topology.version != version:
+            topology = self._load(db, site_id, version)
+        with self._lock:
+            self._sites[site_id] = topology
+            self._checked_at[site_id] = now
+        return topology
+
+    def invalidate(self, site_id: Optional[int] = None):
+        with self._lock:
+            if site_id is None:
+                self._checked_at.clear()
+            else:
+                self._checked_at.pop(site_id, None)
+
+    @staticmethod
+    def _load(db: Session, site_id: int, version: tuple) -> SiteTopology:
+        started = time.perf_counter()
+        links = db.execute(
+            select(
+                DeviceLink.device_id, DeviceLink.interface_name, DeviceLink.neighbor_device_id,
+                DeviceLink.neighbor_interface_name, DeviceLink.source
+            ).where(DeviceLink.site_id == site_id)
+        ).all()
+        neighbor_ids = {link.neighbor_device_id for link in links if link.neighbor_device_id is not None}
+        nodes = {
+            device_id: {"name": name, "device_type": device_type, "site_id": device_site_id}
+            for device_id, name, device_type, device_site_id in db.execute(
+                select(Device.id, Device.name, Device.device_type, Device.site_id)
+                .where(or_(Device.site_id == site_id, Device.id.in_(neighbor_ids)))
+            )
+        }
+        topology = SiteTopology(site_id, version, nodes, links)
+        logger.info(
+            f"Built topology for site {site_id}: {len(nodes)} devices, {len(links)} links "
+            f"in {(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+        return topology
+
+
+topology_cache = TopologyCache(check_seconds=settings.TOPOLOGY_CACHE_CHECK_SECONDS)
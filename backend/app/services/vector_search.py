@@ -0,0 +1,140 @@
+"""
+Semantic search over AI embedding tables
+Applies tenant/device filters first, then runs k-NN either exactly over the
+filtered candidates (small tenants) or through the HNSW index with tunable
+ef_search/probes (large tenants).
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.ai import AIInsight, AIQuery, MetricEmbedding
+from app.models.user import User
+from app.services.tenancy import tenant_scope
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIMENSIONS = 1536
+
+SEARCH_TARGETS = {
+    "insights": AIInsight,
+    "queries": AIQuery,
+    "metrics": MetricEmbedding,
+}
+
+
+class VectorSearchError(Exception):
+    """Raised for invalid semantic search requests"""
+    pass
+
+
+def _filters(
+    db: Session,
+    model,
+    organization_id: Optional[int],
+    site_id: Optional[int],
+    device_id: Optional[int],
+) -> Tuple[list, list]:
+    """Return (joins, where clauses) that scope a target table to a tenant"""
+    joins, where = [], [model.embedding.isnot(None)]
+    if model is AIInsight:
+        if device_id is not None:
+            raise VectorSearchError("Insights can't be filtered by device")
+        if organization_id is not None:
+            where.append(AIInsight.organization_id == organization_id)
+        if site_id is not None:
+            where.append(AIInsight.site_id == site_id)
+    elif model is MetricEmbedding:
+        if device_id is not None:
+            where.append(MetricEmbedding.device_id == device_id)
+        if organization_id is not None or site_id is not None:
+            scope = tenant_scope(db, organization_id=organization_id, site_id=site_id)
+            where.append(scope.device_filter(MetricEmbedding.device_id))
+    elif model is AIQuery:
+        if site_id is not None or device_id is not None:
+            raise VectorSearchError("Queries can only be filtered by organization")
+        if organization_id is not None:
+            joins.append((User, AIQuery.user_id == User.id))
+            where.append(User.organization_id == organization_id)
+    return joins, where
+
+
+def _apply(stmt, joins, where):
+    for target, onclause in joins:
+        stmt = stmt.join(target, onclause)
+    return stmt.where(*where)
+
+
+def search(
+    db: Session,
+    target: str,
+    embedding: Sequence[float],
+    k: int = 10,
+    organization_id: Optional[int] = None,
+    site_id: Optional[int] = None,
+    device_id: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    exact: Optional[bool] = None,
+) -> List[Tuple[Any, float]]:
+    """
+    k-NN search over one embedding table
+
+    Args:
+        target: "insights", "queries" or "metrics"
+        embedding: Query vector (EMBEDDING_DIMENSIONS floats)
+        k: Number of neighbours to return
+        organization_id/site_id/device_id: Tenant filters, applied before ranking
+        ef_search: HNSW candidate list size (higher = better recall, slower)
+        probes: IVFFlat lists to probe, if the table uses an IVFFlat index
+        exact: Force (True) or forbid (False) exact search; None picks by candidate count
+
+    Returns:
+        List of (model instance, cosine distance) ordered by distance
+    """
+    model = SEARCH_TARGETS.get(target)
+    if model is None:
+        raise VectorSearchError(f"Unknown search target '{target}'")
+    if len(embedding) != EMBEDDING_DIMENSIONS:
+        raise VectorSearchError(f"Embedding must have {EMBEDDING_DIMENSIONS} dimensions")
+
+    joins, where = _filters(db, model, organization_id, site_id, device_id)
+    filtered = len(where) > 1
+
+    if exact is None and not filtered:
+        exact = False
+    elif exact is None:
+        # Bounded count: stops as soon as the candidate set is too large for exact search
+        limit = settings.VECTOR_EXACT_SEARCH_MAX_ROWS
+        probe = _apply(select(model.id), joins, where).limit(limit + 1).subquery()
+        exact = db.scalar(select(func.count()).select_from(probe)) <= limit
+
+    if exact:
+        # Materialize the filtered candidates so the planner can't swap in the ANN index
+        candidates = _apply(select(model.id, model.embedding), joins, where).cte("candidates").prefix_with("MATERIALIZED")
+        distance = candidates.c.embedding.cosine_distance(embedding).label("distance")
+        stmt = select(candidates.c.id, distance).order_by(distance).limit(k)
+    else:
+        distance = model.embedding.cosine_distance(embedding).label("distance")
+        stmt = _apply(select(model.id, distance), joins, where).order_by(distance).limit(k)
+
+    # Planner settings must land on the same connection (replica or primary) as the query
+    conn = db.connection(bind_arguments={"clause": stmt})
+    if not exact:
+        conn.execute(select(func.set_config("hnsw.ef_search", str(ef_search or settings.VECTOR_EF_SEARCH), True)))
+        if probes:
+            conn.execute(select(func.set_config("ivfflat.probes", str(probes), True)))
+        if filtered and settings.VECTOR_ITERATIVE_SCAN:
+            conn.execute(select(func.set_config("hnsw.iterative_scan", "relaxed_order", True)))
+    # relaxed_order iterative scans may return neighbours slightly out of order
+    ranked = sorted(conn.execute(stmt).all(), key=lambda r: r.distance)
+
+    if not ranked:
+        return []
+    rows: Dict[int, Any] = {
+        row.id: row for row in db.scalars(select(model).where(model.id.in_([r.id for r in ranked])))
+    }
+    return [(rows[r.id], float(r.distance)) for r in ranked if r.id in rows]
@@ -0,0 +1,411 @@
+"""
+Daily AI analysis
+Map-reduce over the fleet. Map: each site's day is aggregated in one SQL
+pass into a compact digest; sites are fanned out over a thread pool against
+a read replica. Reduce: an organization's digests are folded into a single
+prompt and the model's answer is stored as a daily_summary AIInsight.
+
+The run has a wall-clock budget (AI_ANALYSIS_TIME_BUDGET_SECONDS) and is
+checkpointed in ai_analysis_digests: site digests are committed as they
+complete and marked with the insight they were reduced into, so a rerun
+after a crash or an exhausted budget picks up where the last one stopped.
+
+Scheduled externally on AI_ANALYSIS_CRON:
+    python -m app.tasks.ai_analysis [--date YYYY-MM-DD]
+"""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import logging
+import time
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine, replica_router
+from app.core.profiler import install_signal_hook
+from app.models.ai import AIAnalysisDigest, AIInsight
+from app.models.client import Client
+from app.models.organization import Organization
+from app.models.site import Site
+from app.services.ai_cache import semantic_cache
+from app.services.embeddings import get_embedder
+from app.services.llm import llm_gateway
+
+logger = logging.getLogger(__name__)
+
+# Share of the budget held back for the reduce (LLM) phase
+REDUCE_SHARE = 0.3
+# Sites described individually in an organization prompt; the rest are totalled
+MAX_SITES_IN_PROMPT = 40
+DIGEST_BATCH_SIZE = 25
+
+SYSTEM_PROMPT = (
+    "You are a network operations analyst for a managed service provider. "
+    "Given per-site digests of the last 24 hours of MikroTik router metrics and alerts, "
+    "write a short daily report: overall health, the sites and devices that need attention and why, "
+    "and concrete recommended actions. Do not restate every number."
+)
+
+SITE_DIGEST_SQL = text("""
+    WITH site_devices AS (
+        SELECT id, name, is_online
+        FROM devices
+        WHERE site_id = :site_id AND is_monitored
+    ),
+    metric_stats AS (
+        SELECT m.device_id, m.metric_type,
+               avg(m.value) AS avg,
+               max(m.value) AS max,
+               percentile_cont(0.95) WITHIN GROUP (ORDER BY m.value) AS p95,
+               count(*) AS samples
+        FROM device_metrics m
+        JOIN site_devices d ON d.id = m.device_id
+        WHERE m.timestamp >= :start AND m.timestamp < :end
+        GROUP BY m.device_id, m.metric_type
+    ),
+    alert_stats AS (
+        SELECT h.device_id,
+               count(*) AS alerts,
+               count(*) FILTER (WHERE a.severity = 'critical') AS critical,
+               count(*) FILTER (WHERE h.resolved_at IS NULL) AS open,
+               bool_or(h.is_flapping) AS flapping
+        FROM alert_history h
+        JOIN alerts a ON a.id = h.alert_id
+        JOIN site_devices d ON d.id = h.device_id
+        WHERE h.triggered_at >= :start AND h.triggered_at < :end
+        GROUP BY h.device_id
+    )
+    SELECT d.id, d.name, d.is_online,
+           s.metric_type, s.avg, s.max, s.p95, s.samples,
+           coalesce(a.alerts, 0) AS alerts,
+           coalesce(a.critical, 0) AS critical,
+           coalesce(a.open, 0) AS open,
+           coalesce(a.flapping, false) AS flapping
+    FROM site_devices d
+    LEFT JOIN metric_stats s ON s.device_id = d.id
+    LEFT JOIN alert_stats a ON a.device_id = d.id
+    ORDER BY d.id, s.metric_type
+""")
+
+
+def _day_bounds(run_date: date) -> Tuple[datetime, datetime]:
+    start = datetime.combine(run_date, dt_time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def digest_site(site_id: int, site_name: str, run_date: date, timeout_ms: int) -> dict:
+    """
+    Aggregate one site's day into a compact digest (map step)
+
+    Runs on its own replica connection so it is safe to call from worker
+    threads; the statement timeout keeps one slow site inside the budget.
+    """
+    start, end = _day_bounds(run_date)
+    with (replica_router.pick() or engine).connect() as conn:
+        conn.execute(text("SELECT set_config('statement_timeout', :ms, true)"), {"ms": str(timeout_ms)})
+        rows = conn.execute(SITE_DIGEST_SQL, {"site_id": site_id, "start": start, "end": end}).all()
+
+    devices: Dict[int, dict] = {}
+    metrics: Dict[str, dict] = {}
+    for row in rows:
+        device = devices.get(row.id)
+        if device is None:
+            device = devices[row.id] = {
+                "name": row.name, "online": bool(row.is_online), "alerts": row.alerts,
+                "critical": row.critical, "open": row.open, "flapping": row.flapping,
+            }
+        if row.metric_type is None:
+            continue
+        m = metrics.setdefault(row.metric_type, {"sum": 0.0, "samples": 0, "max": None, "p95": None, "worst": None})
+        m["sum"] += float(row.avg) * row.samples
+        m["samples"] += row.samples
+        m["max"] = float(row.max) if m["max"] is None else max(m["max"], float(row.max))
+        if m["p95"] is None or row.p95 > m["p95"]:
+            m["p95"] = float(row.p95)
+            m["worst"] = row.name
+
+    alerting = sorted((d for d in devices.values() if d["alerts"]), key=lambda d: d["alerts"], reverse=True)
+    offline = [d["name"] for d in devices.values() if not d["online"]]
+    return {
+        "site": site_name,
+        "devices": len(devices),
+        "offline_count": len(offline),
+        "offline": offline[:10],
+        "alerts": sum(d["alerts"] for d in devices.values()),
+        "critical": sum(d["critical"] for d in devices.values()),
+        "open": sum(d["open"] for d in devices.values()),
+        "flapping": [d["name"] for d in devices.values() if d["flapping"]][:5],
+        "noisiest": [[d["name"], d["alerts"]] for d in alerting[:3]],
+        "metrics": {
+            metric_type: {
+                "avg": round(m["sum"] / m["samples"], 2),
+                "p95": round(m["p95"], 2),
+                "max": round(m["max"], 2),
+                "worst": m["worst"],
+            }
+            for metric_type, m in sorted(metrics.items())
+        },
+    }
+
+
+def _score(digest: dict) -> int:
+    """Attention score used to order sites and prioritize the insight"""
+    return digest["critical"] * 10 + digest["open"] * 5 + digest["offline_count"] * 5 + digest["alerts"]
+
+
+def map_sites(db, run_date: date, sites: List[Tuple[int, str, int]], deadline: float) -> int:
+    """
+    Digest every site that has no checkpoint for ``run_date`` yet
+
+    Stops submitting new sites at ``deadline``; digests are committed in
+    small batches as they complete.
+
+    Returns:
+        Number of digests written
+    """
+    done = set(db.scalars(select(AIAnalysisDigest.site_id).where(AIAnalysisDigest.run_date == run_date)))
+    pending = iter([site for site in sites if site[0] not in done])
+    workers = settings.AI_ANALYSIS_WORKERS
+    batch: List[dict] = []
+    written = 0
+
+    def flush():
+        nonlocal written
+        if batch:
+            db.execute(
+                insert(AIAnalysisDigest).values(batch)
+                .on_conflict_do_nothing(index_elements=["run_date", "site_id"])
+            )
+            db.commit()
+            written += len(batch)
+            batch.clear()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-analysis") as pool:
+        futures = {}
+
+        def submit_next() -> bool:
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                return False
+            site = next(pending, None)
+            if site is None:
+                return False
+            site_id, site_name, _ = site
+            futures[pool.submit(digest_site, site_id, site_name, run_date, max(remaining_ms, 1000))] = site
+            return True
+
+        while len(futures) < workers * 2 and submit_next():
+            pass
+        while futures:
+            completed, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in completed:
+                site_id, site_name, organization_id = futures.pop(future)
+                try:
+                    batch.append({
+                        "run_date": run_date,
+                        "organization_id": organization_id,
+                        "site_id": site_id,
+                        "digest_json": future.result(),
+                    })
+                except Exception as e:
+                    logger.error(f"AI analysis: digest for site {site_id} failed: {str(e)}")
+                submit_next()
+            if len(batch) >= DIGEST_BATCH_SIZE:
+                flush()
+        flush()
+    return written
+
+
+def render_prompt(organization_name: str, run_date: date, digests: List[dict]) -> str:
+    """Fold an organization's site digests into one bounded prompt (reduce input)"""
+    digests = sorted(digests, key=_score, reverse=True)
+    lines = [
+        f"Organization: {organization_name}",
+        f"Day: {run_date.isoformat()} (UTC)",
+        f"Sites: {len(digests)}, devices: {sum(d['devices'] for d in digests)}, "
+        f"offline: {sum(d['offline_count'] for d in digests)}, alerts: {sum(d['alerts'] for d in digests)} "
+        f"({sum(d['critical'] for d in digests)} critical, {sum(d['open'] for d in digests)} still open)",
+        "",
+    ]
+    for d in digests[:MAX_SITES_IN_PROMPT]:
+        parts = [f"{d['devices']} devices"]
+        if d["offline_count"]:
+            parts.append(f"{d['offline_count']} offline ({', '.join(d['offline'])})")
+        if d["alerts"]:
+            parts.append(f"{d['alerts']} alerts, {d['critical']} critical, {d['open']} open")
+        if d["noisiest"]:
+            parts.append("noisiest " + ", ".join(f"{name} ({count})" for name, count in d["noisiest"]))
+        if d["flapping"]:
+            parts.append("flapping " + ", ".join(d["flapping"]))
+        for metric_type, m in d["metrics"].items():
+            parts.append(f"{metric_type} avg {m['avg']} p95 {m['p95']} max {m['max']} (worst {m['worst']})")
+        lines.append(f"- {d['site']}: " + "; ".join(parts))
+    rest = digests[MAX_SITES_IN_PROMPT:]
+    if rest:
+        lines.append(
+            f"- {len(rest)} more sites: {sum(d['devices'] for d in rest)} devices, "
+            f"{sum(d['alerts'] for d in rest)} alerts, {sum(d['offline_count'] for d in rest)} offline"
+        )
+    return "\n".join(lines)
+
+
+def _store_insight(organization_id: int, run_date: date, digests: List[dict], completion) -> int:
+    """Write the organization insight and mark its digests reduced, atomically"""
+    critical = sum(d["critical"] for d in digests)
+    attention = sum(_score(d) for d in digests)
+    db = SessionLocal()
+    try:
+        insight = AIInsight(
+            organization_id=organization_id,
+            insight_type="daily_summary",
+            summary=completion.text,
+            details_json={
+                "run_date": run_date.isoformat(),
+                "sites": len(digests),
+                "devices": sum(d["devices"] for d in digests),
+                "alerts": sum(d["alerts"] for d in digests),
+                "critical": critical,
+                "offline": sum(d["offline_count"] for d in digests),
+            },
+            severity="critical" if critical else "warning" if attention else "info",
+            priority_score=min(100, attention),
+            ai_model=completion.model,
+            tokens_used=completion.tokens_used,
+            generation_time_ms=completion.response_time_ms,
+            embedding=get_embedder().embed_one(completion.text),
+        )
+        db.add(insight)
+        db.flush()
+        db.execute(
+            update(AIAnalysisDigest)
+            .where(
+                AIAnalysisDigest.run_date == run_date,
+                AIAnalysisDigest.organization_id == organization_id,
+                AIAnalysisDigest.insight_id.is_(None),
+            )
+            .values(insight_id=insight.id)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        # Cached assistant answers predate this summary
+        semantic_cache.invalidate(db, organization_id)
+        return insight.id
+    finally:
+        db.close()
+
+
+async def reduce_organizations(db, run_date: date, sites: List[Tuple[int, str, int]], deadline: float) -> int:
+    """
+    Summarize every fully digested, not yet reduced organization (reduce step)
+
+    Organizations run concurrently; the LLM gateway bounds in-flight
+    requests. Work still running at ``deadline`` is cancelled and retried
+    on the next run.
+
+    Returns:
+        Number of insights written
+    """
+    expected: Dict[int, int] = {}
+    for _, _, organization_id in sites:
+        expected[organization_id] = expected.get(organization_id, 0) + 1
+
+    digests: Dict[int, List[dict]] = {}
+    unreduced = set()
+    for organization_id, digest, insight_id in db.execute(
+        select(AIAnalysisDigest.organization_id, AIAnalysisDigest.digest_json, AIAnalysisDigest.insight_id)
+        .where(AIAnalysisDigest.run_date == run_date)
+    ):
+        digests.setdefault(organization_id, []).append(digest)
+        if insight_id is None:
+            unreduced.add(organization_id)
+
+    ready = [org for org in unreduced if len(digests[org]) >= expected.get(org, 0)]
+    if not ready:
+        return 0
+    names = dict(db.execute(select(Organization.id, Organization.name).where(Organization.id.in_(ready))).all())
+
+    async def reduce_one(organization_id: int):
+        prompt = render_prompt(names.get(organization_id, f"#{organization_id}"), run_date, digests[organization_id])
+        completion = await llm_gateway.complete([{"role": "user", "content": prompt}], system=SYSTEM_PROMPT)
+        return await asyncio.to_thread(_store_insight, organization_id, run_date, digests[organization_id], completion)
+
+    tasks = {asyncio.create_task(reduce_one(org)): org for org in ready}
+    finished, unfinished = await asyncio.wait(tasks, timeout=max(0.0, deadline - time.monotonic()))
+    for task in unfinished:
+        task.cancel()
+    if unfinished:
+        logger.warning(f"AI analysis: time budget exhausted with {len(unfinished)} organizations left to summarize")
+
+    written = 0
+    for task in finished:
+        try:
+            task.result()
+            written += 1
+        except Exception as e:
+            logger.error(f"AI analysis: summary for organization {tasks[task]} failed: {str(e)}")
+    return written
+
+
+async def _reduce_and_close(db, run_date, sites, deadline) -> int:
+    try:
+        return await reduce_organizations(db, run_date, sites, deadline)
+    finally:
+        await llm_gateway.close()
+
+
+def run_daily_analysis(run_date: Optional[date] = None, budget_seconds: Optional[int] = None) -> dict:
+    """
+    Run (or resume) the daily analysis for ``run_date`` (default: yesterday, UTC)
+
+    Returns:
+        Run statistics
+    """
+    run_date = run_date or (datetime.now(timezone.utc).date() - timedelta(days=1))
+    budget = budget_seconds or settings.AI_ANALYSIS_TIME_BUDGET_SECONDS
+    started = time.monotonic()
+    deadline = started + budget
+    db = SessionLocal()
+    try:
+        sites = db.execute(
+            select(Site.id, Site.name, Client.organization_id)
+            .join(Client, Client.id == Site.client_id)
+            .join(Organization, Organization.id == Client.organization_id)
+            .where(Site.is_active.is_(True), Client.is_active.is_(True), Organization.is_active.is_(True))
+            .order_by(Site.id)
+        ).all()
+
+        digested = map_sites(db, run_date, sites, started + budget * (1 - REDUCE_SHARE))
+        map_seconds = time.monotonic() - started
+        insights = asyncio.run(_reduce_and_close(db, run_date, sites, deadline))
+
+        remaining = db.scalar(
+            select(func.count()).select_from(AIAnalysisDigest)
+            .where(AIAnalysisDigest.run_date == run_date, AIAnalysisDigest.insight_id.is_(None))
+        )
+        stats = {
+            "run_date": run_date.isoformat(),
+            "sites": len(sites),
+            "digests_written": digested,
+            "insights_written": insights,
+            "unreduced_digests": remaining,
+            "map_seconds": round(map_seconds, 1),
+            "total_seconds": round(time.monotonic() - started, 1),
+        }
+        logger.info(f"AI analysis finished: {stats}")
+        return stats
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=settings.LOG_LEVEL)
+    install_signal_hook()
+    parser = argparse.ArgumentParser(description="Run or resume the daily AI analysis")
+    parser.add_argument("--date", type=date.fromisoformat, help="Day to analyze (default: yesterday, UTC)")
+    parser.add_argument("--budget", type=int, help="Wall-clock budget in seconds")
+    args = parser.parse_args()
+    run_daily_analysis(args.date, args.budget)
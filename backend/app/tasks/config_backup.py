@@ -0,0 +1,150 @@
+"""
+Scheduled configuration backups
+Exports every monitored device's configuration with bounded concurrency
+fleet-wide (CONFIG_BACKUP_MAX_CONCURRENCY) and per site
+(CONFIG_BACKUP_MAX_PER_SITE). Sites are served round-robin so a large site
+cannot starve the rest, and no site uplink carries more than a few exports
+at a time.
+
+Exports are streamed from the device through normalize -> hash -> compress,
+so only compressed output is held in memory. Devices whose export hashes to
+their latest backup are skipped, and new backups are written in bulk.
+
+Run nightly:
+    python -m app.tasks.config_backup
+"""
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Deque, Dict, List, Optional, Tuple
+import logging
+import time
+
+from sqlalchemy import select
+
+from app.api.devices import decrypt_password
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.profiler import install_signal_hook
+from app.models.device import Device
+from app.services.config_store import ExportWriter, latest_hashes, store_exports
+from app.services.mikrotik import MikroTikService
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_SIZE = 100
+
+
+def export_device(device: Device, password: str) -> ExportWriter:
+    """Stream one device's export into a finished ExportWriter"""
+    writer = ExportWriter()
+    with MikroTikService(
+        host=device.ip_address,
+        username=device.username,
+        password=password,
+        port=device.port or 8728,
+        use_ssl=device.use_ssl,
+    ) as mikrotik:
+        for chunk in mikrotik.export_config():
+            writer.write(chunk)
+    return writer.finish()
+
+
+class SiteScheduler:
+    """Hands out devices round-robin across sites, respecting a per-site cap"""
+
+    def __init__(self, devices: List[Device], per_site: int):
+        self.per_site = per_site
+        self.queues: Dict[int, Deque[Device]] = {}
+        for device in devices:
+            self.queues.setdefault(device.site_id, deque()).append(device)
+        self.order: Deque[int] = deque(self.queues)
+        self.in_flight: Dict[int, int] = {site_id: 0 for site_id in self.queues}
+
+    def next(self) -> Optional[Device]:
+        for _ in range(len(self.order)):
+            site_id = self.order[0]
+            self.order.rotate(-1)
+            if self.queues[site_id] and self.in_flight[site_id] < self.per_site:
+                self.in_flight[site_id] += 1
+                return self.queues[site_id].popleft()
+        return None
+
+    def done(self, device: Device):
+        self.in_flight[device.site_id] -= 1
+
+
+def run_config_backups(
+    max_concurrency: Optional[int] = None,
+    max_per_site: Optional[int] = None,
+    backup_type: str = "scheduled",
+) -> dict:
+    """
+    Back up every monitored device
+
+    Returns:
+        Run statistics
+    """
+    max_concurrency = max_concurrency or settings.CONFIG_BACKUP_MAX_CONCURRENCY
+    max_per_site = max_per_site or settings.CONFIG_BACKUP_MAX_PER_SITE
+    started = time.perf_counter()
+    stats = {"devices": 0, "written": 0, "unchanged": 0, "failed": 0, "bytes": 0}
+
+    db = SessionLocal()
+    try:
+        devices = db.scalars(select(Device).where(Device.is_monitored.is_(True)).order_by(Device.id)).all()
+        # Detach so worker threads can read attributes without touching the session
+        db.expunge_all()
+        stats["devices"] = len(devices)
+        previous = latest_hashes(db, [device.id for device in devices])
+        scheduler = SiteScheduler(devices, max_per_site)
+        pending: List[Tuple[int, ExportWriter]] = []
+
+        def flush():
+            if pending:
+                stats["written"] += store_exports(db, pending, backup_type)
+                db.commit()
+                pending.clear()
+
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="config-backup") as pool:
+            futures = {}
+
+            def fill():
+                while len(futures) < max_concurrency:
+                    device = scheduler.next()
+                    if device is None:
+                        return
+                    futures[pool.submit(export_device, device, decrypt_password(device.encrypted_password))] = device
+
+            fill()
+            while futures:
+                completed, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    device = futures.pop(future)
+                    scheduler.done(device)
+                    try:
+                        writer = future.result()
+                    except Exception as e:
+                        stats["failed"] += 1
+                        logger.warning(f"Config backup failed for {device.name} ({device.ip_address}): {str(e)}")
+                        continue
+                    stats["bytes"] += writer.size_bytes
+                    if previous.get(device.id) == writer.sha256:
+                        stats["unchanged"] += 1
+                    else:
+                        pending.append((device.id, writer))
+                fill()
+                if len(pending) >= WRITE_BATCH_SIZE:
+                    flush()
+            flush()
+    finally:
+        db.close()
+
+    stats["seconds"] = round(time.perf_counter() - started, 1)
+    logger.info(f"Config backups finished: {stats}")
+    return stats
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=settings.LOG_LEVEL)
+    install_signal_hook()
+    run_config_backups()
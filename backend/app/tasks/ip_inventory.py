@@ -0,0 +1,93 @@
+"""
+IP address inventory harvester
+Reads /ip/address from every monitored device in parallel and syncs the
+fleet-wide ip_addresses table. Only new, changed and removed addresses
+are written. API workers pick the changes up when their prefix tree
+cache expires (IP_INVENTORY_CACHE_TTL_SECONDS).
+
+Run every few minutes:
+    python -m app.tasks.ip_inventory
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional
+import logging
+import time
+
+from sqlalchemy import select
+
+from app.api.devices import decrypt_password
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.profiler import install_signal_hook
+from app.models.device import Device
+from app.services.ip_inventory import sync_device_addresses
+from app.services.mikrotik import MikroTikService
+
+logger = logging.getLogger(__name__)
+
+COMMIT_EVERY_DEVICES = 50
+
+
+def fetch_addresses(device: Device, password: str) -> list:
+    with MikroTikService(
+        host=device.ip_address,
+        username=device.username,
+        password=password,
+        port=device.port or 8728,
+        use_ssl=device.use_ssl,
+    ) as mikrotik:
+        return mikrotik.get_ip_addresses()
+
+
+def harvest_ip_addresses(concurrency: Optional[int] = None) -> dict:
+    """
+    Sync configured addresses for every monitored device
+
+    Returns:
+        Run statistics
+    """
+    concurrency = concurrency or settings.IP_INVENTORY_SYNC_CONCURRENCY
+    started = time.perf_counter()
+    stats = {"devices": 0, "failed": 0, "addresses": 0, "inserted": 0, "updated": 0, "deleted": 0}
+
+    db = SessionLocal()
+    try:
+        devices = db.scalars(select(Device).where(Device.is_monitored.is_(True)).order_by(Device.id)).all()
+        db.expunge_all()
+        stats["devices"] = len(devices)
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ip-inventory") as pool:
+            futures = {
+                pool.submit(fetch_addresses, device, decrypt_password(device.encrypted_password)): device
+                for device in devices
+            }
+            synced = 0
+            for future in as_completed(futures):
+                device = futures[future]
+                try:
+                    entries = future.result()
+                except Exception as e:
+                    stats["failed"] += 1
+                    logger.warning(f"IP inventory sync failed for {device.name} ({device.ip_address}): {str(e)}")
+                    continue
+                inserted, updated, deleted = sync_device_addresses(db, device.id, device.site_id, entries)
+                stats["addresses"] += len(entries)
+                stats["inserted"] += inserted
+                stats["updated"] += updated
+                stats["deleted"] += deleted
+                synced += 1
+                if synced % COMMIT_EVERY_DEVICES == 0:
+                    db.commit()
+        db.commit()
+    finally:
+        db.close()
+
+    stats["seconds"] = round(time.perf_counter() - started, 1)
+    logger.info(f"IP inventory sync finished: {stats}")
+    return stats
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=settings.LOG_LEVEL)
+    install_signal_hook()
+    harvest_ip_addresses()
@@ -0,0 +1,195 @@
+"""
+Incremental MetricEmbedding generation
+Finds closed per-device time windows that have no embedding yet, aggregates
+their metrics in one SQL pass, renders a summary, embeds summaries in large
+batches and bulk-inserts them.
+
+The job is resumable and idempotent: each device's watermark is its latest
+embedded window, windows are processed oldest-first and committed per
+batch, and inserts skip windows that already exist.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+import time
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.profiler import install_signal_hook
+from app.models.ai import MetricEmbedding
+from app.models.device import Device
+from app.services.embeddings import Embedder, get_embedder
+
+logger = logging.getLogger(__name__)
+
+# Per-device watermark -> closed windows -> per-metric aggregates
+PENDING_WINDOWS_SQL = text("""
+    WITH watermarks AS (
+        SELECT d.id AS device_id,
+               COALESCE(
+                   max(e.time_period_start) + make_interval(secs => :window_seconds),
+                   :backfill_start
+               ) AS since
+        FROM devices d
+        LEFT JOIN metric_embeddings e ON e.device_id = d.id
+        WHERE d.id = ANY(:device_ids)
+        GROUP BY d.id
+    )
+    SELECT m.device_id,
+           to_timestamp(floor(extract(epoch FROM m.timestamp) / :window_seconds) * :window_seconds) AS window_start,
+           m.metric_type,
+           max(m.unit) AS unit,
+           avg(m.value) AS avg,
+           min(m.value) AS min,
+           max(m.value) AS max,
+           count(*) AS samples
+    FROM device_metrics m
+    JOIN watermarks w ON w.device_id = m.device_id
+    WHERE m.timestamp >= w.since AND m.timestamp < :until
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3
+""")
+
+
+class Window:
+    """Aggregated metrics for one device over one time window"""
+
+    __slots__ = ("device_id", "start", "end", "metrics")
+
+    def __init__(self, device_id: int, start: datetime, end: datetime):
+        self.device_id = device_id
+        self.start = start
+        self.end = end
+        self.metrics: Dict[str, dict] = {}
+
+    def summary(self, device: Tuple[str, Optional[str], Optional[str]]) -> str:
+        name, model, device_type = device
+        parts = []
+        for metric_type, m in sorted(self.metrics.items()):
+            unit = f" {m['unit']}" if m["unit"] else ""
+            parts.append(
+                f"{metric_type} avg {m['avg']:.2f}{unit} (min {m['min']:.2f}, max {m['max']:.2f}, "
+                f"{m['samples']} samples)"
+            )
+        return (
+            f"{device_type or 'device'} {name}" + (f" ({model})" if model else "")
+            + f" from {self.start:%Y-%m-%d %H:%M} to {self.end:%Y-%m-%d %H:%M} UTC: "
+            + "; ".join(parts)
+        )
+
+
+def _closed_until(now: datetime, window_seconds: int) -> datetime:
+    """Start of the current (still open) window"""
+    epoch = int(now.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % window_seconds, tz=timezone.utc)
+
+
+def pending_windows(db: Session, device_ids: Sequence[int], window_seconds: int, now: datetime) -> List[Window]:
+    """Aggregate every closed, not-yet-embedded window for the given devices"""
+    rows = db.execute(PENDING_WINDOWS_SQL, {
+        "device_ids": list(device_ids),
+        "window_seconds": window_seconds,
+        "backfill_start": now - timedelta(days=settings.METRIC_EMBEDDING_BACKFILL_DAYS),
+        "until": _closed_until(now, window_seconds),
+    }).all()
+
+    windows: List[Window] = []
+    current: Optional[Window] = None
+    for row in rows:
+        if current is None or current.device_id != row.device_id or current.start != row.window_start:
+            current = Window(row.device_id, row.window_start, row.window_start + timedelta(seconds=window_seconds))
+            windows.append(current)
+        current.metrics[row.metric_type] = {
+            "unit": row.unit,
+            "avg": float(row.avg),
+            "min": float(row.min),
+            "max": float(row.max),
+            "samples": int(row.samples),
+        }
+    return windows
+
+
+def embed_windows(db: Session, windows: List[Window], embedder: Embedder, batch_size: int) -> int:
+    """Render, embed and insert windows in batches; commits after each batch"""
+    device_ids = {w.device_id for w in windows}
+    devices = {
+        row.id: (row.name, row.model, row.device_type)
+        for row in db.execute(
+            select(Device.id, Device.name, Device.model, Device.device_type).where(Device.id.in_(device_ids))
+        )
+    }
+
+    inserted = 0
+    batch_size = min(batch_size, embedder.max_batch_size)
+    for offset in range(0, len(windows), batch_size):
+        batch = [w for w in windows[offset:offset + batch_size] if w.device_id in devices]
+        if not batch:
+            continue
+        summaries = [w.summary(devices[w.device_id]) for w in batch]
+        vectors = embedder.embed(summaries)
+
+        result = db.execute(
+            insert(MetricEmbedding)
+            .values([
+                {
+                    "device_id": w.device_id,
+                    "time_period_start": w.start,
+                    "time_period_end": w.end,
+                    "summary_text": summary,
+                    "metrics_json": w.metrics,
+                    "embedding": vector,
+                }
+                for w, summary, vector in zip(batch, summaries, vectors)
+            ])
+            .on_conflict_do_nothing(index_elements=["device_id", "time_period_start"])
+        )
+        db.commit()
+        inserted += result.rowcount
+    return inserted
+
+
+def generate_metric_embeddings(
+    db: Optional[Session] = None,
+    embedder: Optional[Embedder] = None,
+    device_chunk_size: int = 200,
+    now: Optional[datetime] = None,
+) -> int:
+    """
+    Embed all new closed metric windows across the fleet
+
+    Returns:
+        Number of MetricEmbedding rows inserted
+    """
+    owns_session = db is None
+    db = db or SessionLocal()
+    embedder = embedder or get_embedder()
+    now = now or datetime.now(timezone.utc)
+    window_seconds = settings.METRIC_EMBEDDING_WINDOW_MINUTES * 60
+    started = time.perf_counter()
+
+    try:
+        device_ids = db.scalars(select(Device.id).where(Device.is_monitored.is_(True)).order_by(Device.id)).all()
+        inserted = 0
+        for offset in range(0, len(device_ids), device_chunk_size):
+            chunk = device_ids[offset:offset + device_chunk_size]
+            windows = pending_windows(db, chunk, window_seconds, now)
+            if windows:
+                inserted += embed_windows(db, windows, embedder, settings.EMBEDDING_BATCH_SIZE)
+        logger.info(
+            f"Generated {inserted} metric embeddings for {len(device_ids)} devices "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        return inserted
+    finally:
+        if owns_session:
+            db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=settings.LOG_LEVEL)
+    install_signal_hook()
+    generate_metric_embeddings()
@@ -0,0 +1,102 @@
+"""
+Topology harvester
+Polls /ip/neighbor (and the bridge host table on switches) from every
+monitored device in parallel, resolves neighbors to known devices and
+interfaces, and syncs device_links. Only changed links are written, so
+cached site graphs in the API are rebuilt only for sites whose topology
+actually moved.
+
+Run every few minutes:
+    python -m app.tasks.topology
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Tuple
+import logging
+import time
+
+from sqlalchemy import select
+
+from app.api.devices import decrypt_password
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.profiler import install_signal_hook
+from app.models.device import Device
+from app.services.mikrotik import MikroTikService
+from app.services.topology import NeighborResolver, build_links, sync_device_links
+
+logger = logging.getLogger(__name__)
+
+COMMIT_EVERY_DEVICES = 50
+
+# Device types whose bridge host table is worth reading
+BRIDGE_HOST_TYPES = ("switch",)
+
+
+def fetch_neighbors(device: Device, password: str) -> Tuple[list, list]:
+    with MikroTikService(
+        host=device.ip_address,
+        username=device.username,
+        password=password,
+        port=device.port or 8728,
+        use_ssl=device.use_ssl,
+    ) as mikrotik:
+        neighbors = mikrotik.get_neighbors()
+        bridge_hosts = mikrotik.get_bridge_hosts() if device.device_type in BRIDGE_HOST_TYPES else []
+    return neighbors, bridge_hosts
+
+
+def harvest_topology(concurrency: Optional[int] = None) -> dict:
+    """
+    Sync neighbor links for every monitored device
+
+    Returns:
+        Run statistics
+    """
+    concurrency = concurrency or settings.TOPOLOGY_SYNC_CONCURRENCY
+    started = time.perf_counter()
+    stats = {"devices": 0, "failed": 0, "links": 0, "resolved": 0, "inserted": 0, "updated": 0, "deleted": 0}
+
+    db = SessionLocal()
+    try:
+        devices = db.scalars(select(Device).where(Device.is_monitored.is_(True)).order_by(Device.id)).all()
+        db.expunge_all()
+        stats["devices"] = len(devices)
+        resolver = NeighborResolver(db)
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="topology") as pool:
+            futures = {
+                pool.submit(fetch_neighbors, device, decrypt_password(device.encrypted_password)): device
+                for device in devices
+            }
+            synced = 0
+            for future in as_completed(futures):
+                device = futures[future]
+                try:
+                    neighbors, bridge_hosts = future.result()
+                except Exception as e:
+                    stats["failed"] += 1
+                    logger.warning(f"Neighbor poll failed for {device.name} ({device.ip_address}): {str(e)}")
+                    continue
+                rows = build_links(device.id, neighbors, bridge_hosts, resolver)
+                inserted, updated, deleted = sync_device_links(db, device.id, device.site_id, rows)
+                stats["links"] += len(rows)
+                stats["resolved"] += sum(1 for row in rows if row["neighbor_device_id"] is not None)
+                stats["inserted"] += inserted
+                stats["updated"] += updated
+                stats["deleted"] += deleted
+                synced += 1
+                if synced % COMMIT_EVERY_DEVICES == 0:
+                    db.commit()
+        db.commit()
+    finally:
+        db.close()
+
+    stats["seconds"] = round(time.perf_counter() - started, 1)
+    logger.info(f"Topology sync finished: {stats}")
+    return stats
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=settings.LOG_LEVEL)
+    install_signal_hook()
+    harvest_topology()
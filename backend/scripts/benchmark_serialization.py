@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for metric response building and serialization
+
+Times the CPU work of turning RouterOS replies into response bodies, with no
+network or device in the loop, for a range of interface counts:
+
+    current_metrics   GET /api/v1/metrics/devices/{id}/current
+                      models:  SystemMetrics / InterfaceStats models built
+                               field by field, then FastAPI's response_model
+                               validation, jsonable_encoder and JSONResponse
+                      records: routeros_records dicts rendered by ORJSONResponse
+    websocket_live    one /ws/devices/{id}/live message
+                      models:  per-field dict building plus send_json's json.dumps
+                      records: routeros_records dicts plus orjson.dumps
+
+Both paths produce the same JSON document (checked before timing); the
+WebSocket "models" path is given the full InterfaceStats field set that the
+records path now sends, so the comparison is like for like.
+
+Usage:
+    ./venv/bin/python scripts/benchmark_serialization.py --interfaces 8,24,60 --iterations 2000
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import orjson
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+# Add parent directory to path for imports
+backend_path = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_path))
+
+from app.schemas.device import DeviceMetricsResponse, InterfaceStats, SystemMetrics
+from app.services.routeros_records import interface_records, system_record
+
+DEVICE_ID = 42
+DEVICE_NAME = "core-sw-01"
+TIMESTAMP = datetime(2024, 1, 1, 12, 0, 0, 123456)
+
+
+def routeros_replies(interfaces: int):
+    """/system/resource and /interface replies as the API returns them (all strings)"""
+    resources = {
+        "uptime": "3d16h24m24s", "version": "7.16.1 (stable)", "build-time": "Oct/10/2024 13:10:35",
+        "free-memory": "2362311880", "total-memory": "4294967296", "cpu": "ARM64", "cpu-count": "4",
+        "cpu-frequency": "1700", "cpu-load": "7", "free-hdd-space": "87818240", "total-hdd-space": "134217728",
+        "architecture-name": "arm64", "board-name": "CRS326-24S+2Q+", "platform": "MikroTik",
+    }
+    replies = []
+    for n in range(interfaces):
+        replies.append({
+            ".id": f"*{n + 1:X}", "name": f"sfp-sfpplus{n + 1}", "default-name": f"sfp-sfpplus{n + 1}",
+            "type": "ether", "mtu": "1500", "actual-mtu": "1500", "l2mtu": "1592", "max-l2mtu": "10218",
+            "mac-address": f"48:A9:8A:00:{n // 256:02X}:{n % 256:02X}", "last-link-up-time": "2024-01-01 08:00:00",
+            "link-downs": str(n % 3), "rx-byte": str(1015645063319 + n * 7919), "tx-byte": str(458551645392 + n * 104729),
+            "rx-packet": str(1128494514 + n), "tx-packet": str(655073779 + n), "rx-drop": "0", "tx-drop": str(n % 2),
+            "tx-queue-drop": "0", "rx-error": str(n % 5), "tx-error": "0", "fp-rx-byte": "0", "fp-tx-byte": "0",
+            "fp-rx-packet": "0", "fp-tx-packet": "0", "running": "true", "disabled": "false",
+        })
+    return resources, replies
+
+
+def current_metrics_models(resources: dict, interfaces: list) -> DeviceMetricsResponse:
+    """get_current_metrics before the records fast path"""
+    free_memory = int(resources.get('free-memory', 0))
+    total_memory = int(resources.get('total-memory', 0))
+    system_metrics = SystemMetrics(
+        cpu_load=int(resources.get('cpu-load', 0)),
+        memory_used=total_memory - free_memory,
+        memory_total=total_memory,
+        uptime=resources.get('uptime', 'Unknown'),
+        version=resources.get('version', 'Unknown'),
+        board_name=resources.get('board-name', 'Unknown')
+    )
+    interface_stats = [
+        InterfaceStats(
+            name=iface.get('name', 'unknown'),
+            rx_bytes=int(iface.get('rx-byte', 0)),
+            tx_bytes=int(iface.get('tx-byte', 0)),
+            rx_packets=int(iface.get('rx-packet', 0)),
+            tx_packets=int(iface.get('tx-packet', 0)),
+            rx_errors=int(iface.get('rx-error', 0)),
+            tx_errors=int(iface.get('tx-error', 0)),
+            rx_drops=int(iface.get('rx-drop', 0)),
+            tx_drops=int(iface.get('tx-drop', 0))
+        )
+        for iface in interfaces
+    ]
+    return DeviceMetricsResponse(
+        device_id=DEVICE_ID,
+        device_name=DEVICE_NAME,
+        system=system_metrics,
+        interfaces=interface_stats,
+        timestamp=TIMESTAMP
+    )
+
+
+def current_metrics_records(resources: dict, interfaces: list) -> ORJSONResponse:
+    return ORJSONResponse({
+        "device_id": DEVICE_ID,
+        "device_name": DEVICE_NAME,
+        "system": system_record(resources),
+        "interfaces": interface_records(interfaces),
+        "timestamp": TIMESTAMP,
+    })
+
+
+def live_message_models(resources: dict, interfaces: list) -> str:
+    """fetch_device_metrics + send_json before the records fast path"""
+    free_memory = int(resources.get('free-memory', 0))
+    total_memory = int(resources.get('total-memory', 0))
+    message = {
+        "type": "metrics",
+        "timestamp": TIMESTAMP.isoformat(),
+        "device_id": DEVICE_ID,
+        "device_name": DEVICE_NAME,
+        "system": {
+            "cpu_load": int(resources.get('cpu-load', 0)),
+            "memory_used": total_memory - free_memory,
+            "memory_total": total_memory,
+            "memory_percent": round((total_memory - free_memory) / total_memory * 100, 1) if total_memory > 0 else 0,
+            "uptime": resources.get('uptime', 'Unknown'),
+            "version": resources.get('version', 'Unknown'),
+            "board_name": resources.get('board-name', 'Unknown'),
+        },
+        "interfaces": [
+            {
+                "name": iface.get('name', 'unknown'),
+                "rx_bytes": int(iface.get('rx-byte', 0)),
+                "tx_bytes": int(iface.get('tx-byte', 0)),
+                "rx_packets": int(iface.get('rx-packet', 0)),
+                "tx_packets": int(iface.get('tx-packet', 0)),
+                "rx_errors": int(iface.get('rx-error', 0)),
+                "tx_errors": int(iface.get('tx-error', 0)),
+                "rx_drops": int(iface.get('rx-drop', 0)),
+                "tx_drops": int(iface.get('tx-drop', 0))
+            }
+            for iface in interfaces[:10]
+        ],
+        "status": "online"
+    }
+    # What WebSocket.send_json does
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+def live_message_records(resources: dict, interfaces: list) -> str:
+    system = system_record(resources)
+    system["memory_percent"] = (
+        round(system["memory_used"] / system["memory_total"] * 100, 1) if system["memory_total"] > 0 else 0
+    )
+    return orjson.dumps({
+        "type": "metrics",
+        "timestamp": TIMESTAMP.isoformat(),
+        "device_id": DEVICE_ID,
+        "device_name": DEVICE_NAME,
+        "system": system,
+        "interfaces": interface_records(interfaces[:10]),
+        "status": "online"
+    }).decode()
+
+
+async def time_per_call(fn, iterations: int, repeats: int) -> float:
+    """Median microseconds per call over ``repeats`` runs of ``iterations`` calls"""
+    runs = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            result = fn()
+            if asyncio.iscoroutine(result):
+                await result
+        runs.append((time.perf_counter() - started) / iterations * 1e6)
+    return statistics.median(runs)
+
+
+async def run(interface_counts: list, iterations: int, repeats: int) -> dict:
+    response_field = create_model_field("Response_get_current_metrics", DeviceMetricsResponse, mode="serialization")
+    results = {}
+    for count in interface_counts:
+        resources, interfaces = routeros_replies(count)
+
+        async def current_models():
+            content = await serialize_response(
+                field=response_field, response_content=current_metrics_models(resources, interfaces)
+            )
+            return JSONResponse(content).body
+
+        def current_records():
+            return current_metrics_records(resources, interfaces).body
+
+        # Same document either way; only the bytes spent getting there differ
+        old_body, new_body = await current_models(), current_records()
+        assert json.loads(old_body) == json.loads(new_body), "current_metrics bodies differ"
+        old_live, new_live = live_message_models(resources, interfaces), live_message_records(resources, interfaces)
+        assert json.loads(old_live) == json.loads(new_live), "websocket_live messages differ"
+
+        cases = {
+            "current_metrics": (current_models, current_records, len(new_body)),
+            "websocket_live": (
+                lambda: live_message_models(resources, interfaces),
+                lambda: live_message_records(resources, interfaces),
+                len(new_live.encode()),
+            ),
+        }
+        for name, (old, new, size) in cases.items():
+            models_us = await time_per_call(old, iterations, repeats)
+            records_us = await time_per_call(new, iterations, repeats)
+            results[f"{name}_{count}_interfaces"] = {
+                "bytes": size,
+                "models_us": round(models_us, 1),
+                "records_us": round(records_us, 1),
+                "saved_us": round(models_us - records_us, 1),
+                "speedup": round(models_us / records_us, 2),
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interfaces", default="8,24,60", help="Comma-separated interface counts")
+    parser.add_argument("--iterations", type=int, default=2000, help="Calls per timed run")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per case (the median is reported)")
+    parser.add_argument("--output", help="Also write the results here as JSON")
+    args = parser.parse_args()
+
+    interface_counts = [int(n) for n in args.interfaces.split(",")]
+    results = asyncio.run(run(interface_counts, args.iterations, args.repeats))
+
+    print(f"Python {platform.python_version()}, orjson {orjson.__version__}, "
+          f"{args.iterations} calls x {args.repeats} runs (median)\n")
+    print(f"{'case':<34}{'bytes':>8}{'models us':>12}{'records us':>12}{'saved us':>10}{'speedup':>9}")
+    for name, row in results.items():
+        print(f"{name:<34}{row['bytes']:>8}{row['models_us']:>12}{row['records_us']:>12}"
+              f"{row['saved_us']:>10}{row['speedup']:>8}x")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            "python": platform.python_version(),
+            "orjson": orjson.__version__,
+            "iterations": args.iterations,
+            "repeats": args.repeats,
+            "results": results,
+        }, indent=2))
+        print(f"\nSaved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+End-to-end performance benchmarks for the API, poller and streaming paths
+
+Runs against a local RouterOS simulator, a running API server and the
+configured Postgres database:
+
+    mikrotik_round_trip     MikroTikService sessions and per-command round trips
+    current_metrics         GET /api/v1/metrics/devices/{id}/current under concurrency
+    device_list_pagination  GET /api/v1/devices first/middle/last page at 10k rows
+    websocket_fanout        N clients on /ws/devices/{id}/live
+    metric_ingestion        device_metrics rows inserted per second
+    bulk_onboarding         POST /api/v1/devices/bulk devices per second
+
+Benchmark devices live under a dedicated "Benchmark Suite" organization that
+is created on start and deleted (with everything under it) on exit.
+
+Results are written as JSON. With --baseline they are compared metric by
+metric (``*_ms`` lower is better, ``*_per_second`` higher is better) and the
+script exits non-zero when any metric regresses by more than --tolerance, a
+benchmark fails or is missing from the run, or a failure count
+(errors, failed, failed_clients) is above zero.
+
+The API server and this script must share ENCRYPTION_KEY.
+
+Usage:
+    export ENCRYPTION_KEY=$(./venv/bin/python -c 'from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())')
+    ./venv/bin/python scripts/routeros_simulator.py --count 400 --base-port 8728 --bind-range 127.20.0.0/16
+    ./venv/bin/uvicorn app.main:app --port 8000
+    ./venv/bin/python scripts/benchmark_suite.py --sim-count 400 --sim-bind-range 127.20.0.0/16 \\
+        --baseline scripts/benchmark_baseline.json
+    # Accept the current numbers as the new baseline
+    ./venv/bin/python scripts/benchmark_suite.py ... --save-baseline scripts/benchmark_baseline.json
+"""
+import argparse
+import asyncio
+import ipaddress
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+import websockets
+from sqlalchemy import create_engine, delete, insert
+
+# Add parent directory to path for imports
+backend_path = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_path))
+
+from app.api.devices import encrypt_password
+from app.core.config import settings
+from app.models.client import Client
+from app.models.device import Device
+from app.models.metric import DeviceMetric
+from app.models.organization import Organization
+from app.models.site import Site
+from app.services.mikrotik import MikroTikService
+
+BENCHMARK_SLUG = "benchmark-suite"
+FILLER_NETWORK = ipaddress.ip_network("198.18.0.0/15")  # RFC 2544 benchmarking range
+BENCHMARKS = (
+    "mikrotik_round_trip",
+    "current_metrics",
+    "device_list_pagination",
+    "websocket_fanout",
+    "metric_ingestion",
+    "bulk_onboarding",
+)
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def latency_summary(prefix: str, latencies_ms) -> dict:
+    return {
+        f"{prefix}_p50_ms": round(percentile(latencies_ms, 50), 3),
+        f"{prefix}_p95_ms": round(percentile(latencies_ms, 95), 3),
+        f"{prefix}_p99_ms": round(percentile(latencies_ms, 99), 3),
+    }
+
+
+def sim_endpoint(args, index: int) -> tuple:
+    """Matches routeros_simulator.py's layout for the same --base-port/--bind-range"""
+    if args.sim_bind_range:
+        return str(ipaddress.ip_network(args.sim_bind_range)[index + 1]), args.sim_base_port
+    return args.sim_host, args.sim_base_port + index
+
+
+class Fixtures:
+    """Benchmark organization/client/site with simulator-backed and filler devices"""
+
+    def __init__(self, engine, args):
+        self.engine = engine
+        self.args = args
+        self.site_id = None
+        self.device_ids = []  # Simulator-backed, monitored
+
+    def create(self):
+        self.drop()
+        with self.engine.begin() as conn:
+            organization_id = conn.execute(insert(Organization).values(
+                name="Benchmark Suite", slug=BENCHMARK_SLUG, is_active=True
+            ).returning(Organization.id)).scalar()
+            client_id = conn.execute(insert(Client).values(
+                organization_id=organization_id, name="Benchmark Client", slug="benchmark-client", is_active=True
+            ).returning(Client.id)).scalar()
+            self.site_id = conn.execute(insert(Site).values(
+                client_id=client_id, name="Benchmark Site", slug="benchmark-site"
+            ).returning(Site.id)).scalar()
+
+            # First half of the simulator is pre-registered; bulk onboarding uses the second half
+            password = encrypt_password(self.args.sim_password)
+            rows = []
+            for index in range(self.args.sim_count // 2):
+                host, port = sim_endpoint(self.args, index)
+                rows.append({
+                    "site_id": self.site_id, "name": f"bench-sim-{index:05d}", "ip_address": host, "port": port,
+                    "device_type": "router", "username": self.args.sim_username, "encrypted_password": password,
+                    "use_ssl": False, "is_online": True, "is_monitored": True,
+                })
+            self.device_ids = list(conn.execute(insert(Device).returning(Device.id), rows).scalars())
+
+            filler = max(0, self.args.list_rows - len(rows))
+            for start in range(0, filler, 5000):
+                conn.execute(insert(Device), [
+                    {
+                        "site_id": self.site_id, "name": f"bench-filler-{i:05d}",
+                        "ip_address": str(FILLER_NETWORK[i + 1]), "port": 8728, "device_type": "switch",
+                        "username": "admin", "encrypted_password": password, "use_ssl": False,
+                        "is_online": i % 10 != 0, "is_monitored": False,
+                    }
+                    for i in range(start, min(start + 5000, filler))
+                ])
+        print(f"🧱 Fixtures: site {self.site_id}, {len(self.device_ids)} simulator devices, "
+              f"{self.args.list_rows} devices total")
+
+    def drop(self):
+        with self.engine.begin() as conn:
+            conn.execute(delete(Organization).where(Organization.slug == BENCHMARK_SLUG))
+
+
+def bench_mikrotik_round_trip(args, fixtures) -> dict:
+    def session(index: int) -> float:
+        host, port = sim_endpoint(args, index % args.sim_count)
+        started = time.perf_counter()
+        with MikroTikService(host, args.sim_username, args.sim_password, port=port) as mikrotik:
+            mikrotik.get_system_resources()
+            mikrotik.get_interfaces()
+        return (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        sessions = list(pool.map(session, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    # Command round trips on one established connection
+    host, port = sim_endpoint(args, 0)
+    commands = []
+    with MikroTikService(host, args.sim_username, args.sim_password, port=port) as mikrotik:
+        for _ in range(args.requests):
+            command_started = time.perf_counter()
+            mikrotik.get_system_resources()
+            commands.append((time.perf_counter() - command_started) * 1000)
+
+    return {
+        **latency_summary("session", sessions),
+        "sessions_per_second": round(args.requests / elapsed, 1),
+        **latency_summary("command", commands),
+    }
+
+
+def bench_current_metrics(args, fixtures) -> dict:
+    errors = 0
+
+    def fetch(client: httpx.Client, index: int) -> float:
+        nonlocal errors
+        device_id = fixtures.device_ids[index % len(fixtures.device_ids)]
+        started = time.perf_counter()
+        response = client.get(f"/api/v1/metrics/devices/{device_id}/current")
+        if response.status_code != 200:
+            errors += 1
+        return (time.perf_counter() - started) * 1000
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    with httpx.Client(base_url=args.api_url, timeout=60, limits=limits) as client:
+        fetch(client, 0)  # Warm up
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            latencies = list(pool.map(lambda i: fetch(client, i), range(args.requests)))
+        elapsed = time.perf_counter() - started
+    return {**latency_summary("request", latencies), "requests_per_second": round(args.requests / elapsed, 1),
+            "errors": errors}
+
+
+def bench_device_list_pagination(args, fixtures) -> dict:
+    page_size = 100
+    last_page = max(1, -(-args.list_rows // page_size))
+    result = {}
+    with httpx.Client(base_url=args.api_url, timeout=60) as client:
+        for label, page in (("first_page", 1), ("middle_page", last_page // 2 or 1), ("last_page", last_page)):
+            params = {"site_id": fixtures.site_id, "page": page, "page_size": page_size}
+            client.get("/api/v1/devices", params=params).raise_for_status()
+            latencies = []
+            for _ in range(args.pagination_repeats):
+                started = time.perf_counter()
+                client.get("/api/v1/devices", params=params).raise_for_status()
+                latencies.append((time.perf_counter() - started) * 1000)
+            result.update(latency_summary(label, latencies))
+    result["rows"] = args.list_rows
+    return result
+
+
+def bench_websocket_fanout(args, fixtures) -> dict:
+    ws_url = args.api_url.replace("http://", "ws://").replace("https://", "wss://")
+    device_id = fixtures.device_ids[0]
+    connect_ms, first_metrics_ms = [], []
+    messages = 0
+
+    async def client(deadline: float):
+        nonlocal messages
+        started = time.perf_counter()
+        async with websockets.connect(f"{ws_url}/ws/devices/{device_id}/live", open_timeout=60) as ws:
+            first = json.loads(await ws.recv())
+            connect_ms.append((time.perf_counter() - started) * 1000)
+            if first.get("type") != "connected":
+                raise RuntimeError(first.get("message", "connection refused"))
+            received_metrics = False
+            while time.perf_counter() < deadline:
+                try:
+                    message = json.loads(await asyncio.wait_for(ws.recv(), deadline - time.perf_counter()))
+                except asyncio.TimeoutError:
+                    break
+                if message.get("type") != "metrics":
+                    continue
+                messages += 1
+                if not received_metrics:
+                    received_metrics = True
+                    first_metrics_ms.append((time.perf_counter() - started) * 1000)
+
+    async def run():
+        deadline = time.perf_counter() + args.ws_seconds
+        results = await asyncio.gather(*(client(deadline) for _ in range(args.ws_clients)), return_exceptions=True)
+        return sum(1 for r in results if isinstance(r, Exception))
+
+    started = time.perf_counter()
+    failed = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    return {
+        "clients": args.ws_clients,
+        "failed_clients": failed,
+        **latency_summary("connect", connect_ms),
+        **latency_summary("first_metrics", first_metrics_ms),
+        "messages_per_second": round(messages / elapsed, 1),
+    }
+
+
+def bench_metric_ingestion(args, fixtures) -> dict:
+    engine = fixtures.engine
+    now = datetime.now(timezone.utc)
+    metric_types = ("cpu_load", "memory_usage", "uptime", "temperature")
+    rows = [
+        {
+            "device_id": fixtures.device_ids[i % len(fixtures.device_ids)],
+            "metric_type": metric_types[i % len(metric_types)],
+            "value": float(i % 100),
+            "unit": "percent",
+            "timestamp": now - timedelta(seconds=i),
+        }
+        for i in range(args.ingest_rows)
+    ]
+    batch = 5000
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for start in range(0, len(rows), batch):
+            conn.execute(insert(DeviceMetric), rows[start:start + batch])
+    elapsed = time.perf_counter() - started
+    return {"rows": len(rows), "batch_size": batch, "rows_per_second": round(len(rows) / elapsed, 1)}
+
+
+def bench_bulk_onboarding(args, fixtures) -> dict:
+    lines = ["name,ip_address,port,username,password,device_type,site_id"]
+    for index in range(args.sim_count // 2, args.sim_count):
+        host, port = sim_endpoint(args, index)
+        lines.append(f"bench-bulk-{index:05d},{host},{port},{args.sim_username},{args.sim_password},router,{fixtures.site_id}")
+    if not args.sim_bind_range:
+        print("⚠️  bulk_onboarding deduplicates by IP; run the simulator with --bind-range for a meaningful result")
+
+    started = time.perf_counter()
+    summary = {}
+    with httpx.Client(base_url=args.api_url, timeout=600) as client:
+        with client.stream(
+            "POST", "/api/v1/devices/bulk", content="\n".join(lines).encode(),
+            headers={"Content-Type": "text/csv"}, params={"concurrency": min(args.concurrency, 256)}
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    record = json.loads(line)
+                    if record.get("type") == "summary":
+                        summary = record
+    elapsed = time.perf_counter() - started
+    return {
+        "requested": len(lines) - 1,
+        "created": summary.get("created", 0),
+        "failed": summary.get("failed", 0),
+        "devices_per_second": round(summary.get("created", 0) / elapsed, 1),
+    }
+
+
+# Metrics counting failed requests, clients or devices; any non-zero value fails the run
+FAILURE_COUNTS = ("errors", "failed", "failed_clients")
+
+
+def compare(results: dict, baseline: dict, tolerance: float, selected: list) -> list:
+    """
+    Regressions as (benchmark, metric, baseline value, current value, change)
+
+    Besides metrics that moved past the tolerance, a benchmark that raised,
+    is in the baseline but was not run, or counted failures is a regression;
+    those have None for the values it could not compare.
+    """
+    regressions = []
+    previous_benchmarks = baseline.get("benchmarks", {})
+    for name in previous_benchmarks:
+        if name in selected and name not in results["benchmarks"]:
+            print(f"❌ {name}: in the baseline but missing from this run")
+            regressions.append((name, None, None, None, None))
+
+    print(f"\n{'benchmark':<24} {'metric':<26} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, metrics in results["benchmarks"].items():
+        if "error" in metrics:
+            print(f"{name:<24} {'error':<26} {'':>12} {'':>12} {'':>9}  ❌ {metrics['error']}")
+            regressions.append((name, "error", None, metrics["error"], None))
+            continue
+        previous = previous_benchmarks.get(name, {})
+        for metric, value in metrics.items():
+            if metric in FAILURE_COUNTS and value:
+                print(f"{name:<24} {metric:<26} {previous.get(metric, 0):>12} {value:>12} {'':>9}  ❌")
+                regressions.append((name, metric, previous.get(metric), value, None))
+                continue
+            if metric not in previous or not isinstance(value, (int, float)):
+                continue
+            if metric.endswith("_ms"):
+                worse = value > previous[metric] * (1 + tolerance)
+            elif metric.endswith("_per_second"):
+                worse = value < previous[metric] * (1 - tolerance)
+            else:
+                continue
+            change = (value - previous[metric]) / previous[metric] if previous[metric] else 0.0
+            flag = "  ❌" if worse else ""
+            print(f"{name:<24} {metric:<26} {previous[metric]:>12.2f} {value:>12.2f} {change:>+8.1%}{flag}")
+            if worse:
+                regressions.append((name, metric, previous[metric], value, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api-url", default="http://localhost:8000")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--sim-host", default="127.0.0.1")
+    parser.add_argument("--sim-base-port", type=int, default=8728)
+    parser.add_argument("--sim-bind-range", help="Same value as the simulator's --bind-range")
+    parser.add_argument("--sim-count", type=int, default=200, help="Devices the simulator is hosting")
+    parser.add_argument("--sim-username", default="admin")
+    parser.add_argument("--sim-password", default="simulator")
+    parser.add_argument("--only", help=f"Comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--list-rows", type=int, default=10000, help="Devices in the benchmark site")
+    parser.add_argument("--pagination-repeats", type=int, default=50)
+    parser.add_argument("--ws-clients", type=int, default=200)
+    parser.add_argument("--ws-seconds", type=float, default=15)
+    parser.add_argument("--ingest-rows", type=int, default=200000)
+    parser.add_argument("--output", default=str(backend_path / "scripts" / "benchmark_results.json"))
+    parser.add_argument("--baseline", help="Compare against this results file")
+    parser.add_argument("--save-baseline", help="Also write the results here")
+    parser.add_argument("--tolerance", type=float, default=0.20, help="Allowed relative regression")
+    parser.add_argument("--keep-fixtures", action="store_true", help="Leave the benchmark organization in place")
+    args = parser.parse_args()
+
+    if not os.getenv("ENCRYPTION_KEY"):
+        parser.error("Set ENCRYPTION_KEY to the API server's value so fixture device passwords decrypt there")
+    selected = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    engine = create_engine(args.database_url)
+    with engine.connect() as conn:
+        server_version = ".".join(str(part) for part in conn.dialect.server_version_info or ())
+    fixtures = Fixtures(engine, args)
+    results = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": server_version,
+            "api_url": args.api_url,
+            "sim_count": args.sim_count,
+            "concurrency": args.concurrency,
+        },
+        "benchmarks": {},
+    }
+
+    try:
+        fixtures.create()
+        for name in BENCHMARKS:
+            if name not in selected:
+                continue
+            print(f"\n⏱️  {name}")
+            started = time.perf_counter()
+            try:
+                metrics = globals()[f"bench_{name}"](args, fixtures)
+            except Exception as e:
+                print(f"❌ {name} failed: {str(e)}")
+                results["benchmarks"][name] = {"error": str(e)}
+                continue
+            metrics["seconds"] = round(time.perf_counter() - started, 2)
+            results["benchmarks"][name] = metrics
+            for metric, value in metrics.items():
+                print(f"   {metric:<26} {value}")
+    finally:
+        if not args.keep_fixtures:
+            fixtures.drop()
+        engine.dispose()
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n📄 Results saved to: {args.output}")
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📌 Baseline saved to: {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, selected)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s): failed or missing benchmarks, failure counts, "
+                  f"or metrics worse by more than {args.tolerance:.0%}")
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
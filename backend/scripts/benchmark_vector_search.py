@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Recall and latency benchmark for pgvector HNSW search on synthetic embeddings
+
+Builds a scratch table of clustered, unit-length vectors spread across
+tenants, creates the same HNSW index the migrations use, and compares ANN
+results at several ef_search values against exact search, both unfiltered
+and with a per-tenant filter.
+
+Usage:
+    ./venv/bin/python scripts/benchmark_vector_search.py --rows 200000 --dim 1536
+"""
+import argparse
+import io
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import psycopg2
+
+# Add parent directory to path for imports
+backend_path = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_path))
+
+from app.core.config import settings
+
+TABLE = "bench_vectors"
+
+
+def synthetic_vectors(rows: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Clustered unit vectors, closer to real embeddings than uniform noise"""
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, rows)
+    vectors = centers[labels] + 0.35 * rng.standard_normal((rows, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def to_literal(vector: np.ndarray) -> str:
+    return "[" + ",".join(f"{x:.6f}" for x in vector) + "]"
+
+
+def load_table(conn, vectors: np.ndarray, tenants: int, rng: np.random.Generator):
+    print(f"Loading {len(vectors)} vectors...")
+    with conn.cursor() as cur:
+        cur.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        cur.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cur.execute(
+            f"CREATE TABLE {TABLE} (id integer PRIMARY KEY, tenant_id integer NOT NULL, "
+            f"embedding vector({vectors.shape[1]}) NOT NULL)"
+        )
+        tenant_ids = rng.integers(0, tenants, len(vectors))
+        buffer = io.StringIO()
+        for i, vector in enumerate(vectors):
+            buffer.write(f"{i}\t{tenant_ids[i]}\t{to_literal(vector)}\n")
+        buffer.seek(0)
+        cur.copy_expert(f"COPY {TABLE} (id, tenant_id, embedding) FROM STDIN", buffer)
+        cur.execute(f"CREATE INDEX ON {TABLE} (tenant_id)")
+
+        print("Building HNSW index (m=16, ef_construction=64)...")
+        started = time.perf_counter()
+        cur.execute("SET maintenance_work_mem = '1GB'")
+        cur.execute(
+            f"CREATE INDEX ON {TABLE} USING hnsw (embedding vector_cosine_ops) "
+            f"WITH (m = 16, ef_construction = 64)"
+        )
+        build_seconds = time.perf_counter() - started
+        cur.execute(f"ANALYZE {TABLE}")
+    conn.commit()
+    return build_seconds
+
+
+def run_queries(cur, queries, k: int, tenant_id=None, exact: bool = False):
+    """Return (result id lists, latencies in ms)"""
+    where = "WHERE tenant_id = %(tenant)s" if tenant_id is not None else ""
+    if exact:
+        sql = (
+            f"WITH c AS MATERIALIZED (SELECT id, embedding FROM {TABLE} {where}) "
+            f"SELECT id FROM c ORDER BY embedding <=> %(q)s::vector LIMIT %(k)s"
+        )
+    else:
+        sql = f"SELECT id FROM {TABLE} {where} ORDER BY embedding <=> %(q)s::vector LIMIT %(k)s"
+
+    results, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        cur.execute(sql, {"q": query, "k": k, "tenant": tenant_id})
+        results.append([row[0] for row in cur.fetchall()])
+        latencies.append((time.perf_counter() - started) * 1000)
+    return results, latencies
+
+
+def recall(approx, truth) -> float:
+    return statistics.mean(len(set(a) & set(t)) / len(t) for a, t in zip(approx, truth) if t)
+
+
+def percentile(values, pct: float) -> float:
+    return float(np.percentile(values, pct))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--tenants", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef-search", default="20,40,80,160", help="Comma-separated ef_search values")
+    parser.add_argument("--skip-load", action="store_true", help="Reuse the existing scratch table")
+    parser.add_argument("--output", default=str(backend_path / "scripts" / "vector_benchmark_results.json"))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    vectors = synthetic_vectors(args.rows + args.queries, args.dim, args.clusters, rng)
+    corpus, queries = vectors[:args.rows], [to_literal(v) for v in vectors[args.rows:]]
+
+    conn = psycopg2.connect(args.database_url)
+    report = {"rows": args.rows, "dim": args.dim, "k": args.k, "queries": args.queries, "runs": []}
+    if not args.skip_load:
+        report["index_build_seconds"] = round(load_table(conn, corpus, args.tenants, rng), 2)
+
+    with conn.cursor() as cur:
+        for label, tenant in (("unfiltered", None), ("tenant_filter", 0)):
+            truth, exact_latency = run_queries(cur, queries, args.k, tenant, exact=True)
+            print(f"\n{label}: exact p50={percentile(exact_latency, 50):.2f}ms p95={percentile(exact_latency, 95):.2f}ms")
+            report["runs"].append({
+                "mode": label, "method": "exact",
+                "p50_ms": round(percentile(exact_latency, 50), 3),
+                "p95_ms": round(percentile(exact_latency, 95), 3),
+                "recall": 1.0,
+            })
+            for ef in (int(x) for x in args.ef_search.split(",")):
+                cur.execute("SELECT set_config('hnsw.ef_search', %s, false)", (str(ef),))
+                approx, latency = run_queries(cur, queries, args.k, tenant)
+                r = recall(approx, truth)
+                print(
+                    f"{label}: hnsw ef_search={ef:<4} recall@{args.k}={r:.3f} "
+                    f"p50={percentile(latency, 50):.2f}ms p95={percentile(latency, 95):.2f}ms"
+                )
+                report["runs"].append({
+                    "mode": label, "method": "hnsw", "ef_search": ef,
+                    "p50_ms": round(percentile(latency, 50), 3),
+                    "p95_ms": round(percentile(latency, 95), 3),
+                    "recall": round(r, 4),
+                })
+    conn.close()
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
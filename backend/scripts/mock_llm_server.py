@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Mock OpenAI-compatible LLM server for exercising the LLM gateway locally
+
+Serves a streaming /v1/chat/completions endpoint with configurable time to
+first token, per-token delay and error rate, and reports the peak number of
+concurrent requests it saw so gateway concurrency limits can be checked.
+
+Usage:
+    ./venv/bin/python scripts/mock_llm_server.py --port 11500 --first-token-ms 300
+    LOCAL_LLM_URL=http://localhost:11500/v1 LLM_DEFAULT_PROVIDER=local ./venv/bin/uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+ANSWER = (
+    "All monitored routers are reachable. CPU load peaked at 71% on the core router "
+    "around 14:00 UTC, driven by firewall connection tracking; memory and interface "
+    "error counters are within normal ranges."
+)
+
+
+def create_app(first_token_ms: int, token_ms: int, error_rate: float) -> FastAPI:
+    app = FastAPI(title="Mock LLM")
+    stats = {"requests": 0, "in_flight": 0, "peak_in_flight": 0}
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        if random.random() < error_rate:
+            return JSONResponse({"error": {"message": "mock overload"}}, status_code=529)
+
+        prompt_tokens = sum(len(m.get("content", "").split()) for m in body.get("messages", []))
+        tokens = ANSWER.split(" ")[:body.get("max_tokens", 1024)]
+
+        async def events():
+            stats["requests"] += 1
+            stats["in_flight"] += 1
+            stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+            try:
+                await asyncio.sleep(first_token_ms / 1000)
+                for i, token in enumerate(tokens):
+                    chunk = {
+                        "id": "mock",
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": body.get("model", "mock"),
+                        "choices": [{"index": 0, "delta": {"content": token if i == 0 else " " + token}}],
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                    await asyncio.sleep(token_ms / 1000)
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                         "total_tokens": prompt_tokens + len(tokens)}
+                yield f"data: {json.dumps({'id': 'mock', 'choices': [], 'usage': usage})}\n\n"
+                yield "data: [DONE]\n\n"
+            finally:
+                stats["in_flight"] -= 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--first-token-ms", type=int, default=250)
+    parser.add_argument("--token-ms", type=int, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 529")
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args.first_token_ms, args.token_ms, args.error_rate), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
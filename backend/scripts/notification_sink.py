@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Local webhook and SMTP sink for exercising alert notifications
+
+Accepts alert digests on POST /hooks/{name} and mail on a plain SMTP port,
+prints each delivery, and reports counts and the peak number of concurrent
+deliveries per sink at /stats, so digest coalescing, retries and the
+per-host concurrency limit can be checked without real endpoints.
+
+Usage:
+    ./venv/bin/python scripts/notification_sink.py --http-port 8025 --smtp-port 2525 --error-rate 0.2
+    SMTP_HOST=127.0.0.1 SMTP_PORT=2525 SMTP_USE_TLS=false ./venv/bin/uvicorn app.main:app
+    # Alert rules then use notify_webhook=http://127.0.0.1:8025/hooks/ops
+    curl http://127.0.0.1:8025/stats
+"""
+import argparse
+import asyncio
+import random
+from email import message_from_bytes
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class Stats:
+    def __init__(self):
+        self.webhook_requests = 0
+        self.webhook_alerts = 0
+        self.webhook_failures = 0
+        self.emails = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def enter(self):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def create_app(stats: Stats, latency_ms: int, error_rate: float, error_status: int) -> FastAPI:
+    app = FastAPI(title="Notification sink")
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats.to_dict()
+
+    @app.post("/hooks/{name}")
+    async def webhook(name: str, request: Request):
+        payload = await request.json()
+        stats.enter()
+        try:
+            await asyncio.sleep(latency_ms / 1000)
+            if random.random() < error_rate:
+                stats.webhook_failures += 1
+                return JSONResponse({"error": "sink failure"}, status_code=error_status)
+            stats.webhook_requests += 1
+            stats.webhook_alerts += payload.get("count", 0)
+            print(f"webhook {name}: {payload.get('count', 0)} alerts")
+            for alert in payload.get("alerts", []):
+                print(f"  {alert.get('severity')} {alert.get('state')}: {alert.get('message')}")
+            return {"ok": True}
+        finally:
+            stats.in_flight -= 1
+
+    return app
+
+
+async def handle_smtp(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, stats: Stats, latency_ms: int):
+    """Just enough SMTP for smtplib: EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT"""
+    async def reply(line: str):
+        writer.write(f"{line}\r\n".encode())
+        await writer.drain()
+
+    await reply("220 notification-sink ESMTP")
+    recipients = []
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line.decode("utf-8", "replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                await reply("250-notification-sink")
+                await reply("250 8BITMIME")
+            elif verb in ("HELO", "NOOP"):
+                await reply("250 OK")
+            elif verb == "MAIL":
+                recipients = []
+                await reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command.split(":", 1)[1].strip().strip("<>"))
+                await reply("250 OK")
+            elif verb == "RSET":
+                recipients = []
+                await reply("250 OK")
+            elif verb == "DATA":
+                await reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data = await reader.readline()
+                    if not data or data == b".\r\n":
+                        break
+                    lines.append(data[1:] if data.startswith(b"..") else data)
+                stats.enter()
+                try:
+                    await asyncio.sleep(latency_ms / 1000)
+                    message = message_from_bytes(b"".join(lines))
+                    stats.emails += 1
+                    subject = " ".join(str(message["Subject"]).split())  # Unfold long headers
+                    print(f"email to {', '.join(recipients)}: {subject}")
+                finally:
+                    stats.in_flight -= 1
+                await reply("250 OK queued")
+            elif verb == "QUIT":
+                await reply("221 Bye")
+                break
+            else:
+                await reply("502 Command not implemented")
+    finally:
+        writer.close()
+
+
+async def serve(args):
+    stats = Stats()
+    smtp = await asyncio.start_server(
+        lambda reader, writer: handle_smtp(reader, writer, stats, args.latency_ms), args.host, args.smtp_port
+    )
+    print(f"SMTP sink on {args.host}:{args.smtp_port}, webhooks on http://{args.host}:{args.http_port}/hooks/<name>")
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(stats, args.latency_ms, args.error_rate, args.error_status),
+        host=args.host, port=args.http_port, log_level="warning",
+    ))
+    async with smtp:
+        await server.serve()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--http-port", type=int, default=8025)
+    parser.add_argument("--smtp-port", type=int, default=2525)
+    parser.add_argument("--latency-ms", type=int, default=50, help="Delay before answering each delivery")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of webhook requests that fail")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status for failed webhook requests")
+    args = parser.parse_args()
+
+    asyncio.run(serve(args))
+
+
+if __name__ == "__main__":
+    main()
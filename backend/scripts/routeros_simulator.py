@@ -0,0 +1,602 @@
+#!/usr/bin/env python3
+"""
+RouterOS API simulator for load and scale testing
+
+Hosts thousands of virtual MikroTik devices, one plaintext API listener per
+local port, all in one asyncio process. Each device answers the commands
+MikroTikService uses with realistic, evolving data: monotonic interface
+counters with a diurnal-style traffic curve, drifting CPU load, DHCP leases
+that renew and churn, a config export readable through /file/read, and
+/ip/neighbor entries that wire every group of --site-size devices into a
+router-and-switches tree.
+
+Network conditions are injected per reply: base latency plus uniform
+jitter, a loss rate that costs a TCP retransmission timeout, and slow logins
+on a fraction of devices.
+
+Usage:
+    ./venv/bin/python scripts/routeros_simulator.py --count 2000 --base-port 20000 \\
+        --latency-ms 40 --jitter-ms 20 --loss 0.01 --slow-login-rate 0.05
+
+    # Onboard them through the bulk endpoint, which needs one IP per device
+    ./venv/bin/python scripts/routeros_simulator.py --count 2000 --bind-range 127.20.0.0/16 --base-port 8728 \\
+        --devices-out /tmp/simulated_devices.csv --site-id 1
+    curl -X POST -H 'Content-Type: text/csv' --data-binary @/tmp/simulated_devices.csv \\
+        http://localhost:8000/api/v1/devices/bulk
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import ipaddress
+import math
+import os
+import random
+import resource
+import struct
+import time
+
+BOARDS = [
+    # (board-name, architecture, total memory, cpu count, ethernet ports)
+    ("RB5009UG+S+", "arm64", 1073741824, 4, 8),
+    ("CCR2004-16G-2S+", "arm64", 4294967296, 4, 16),
+    ("hEX S", "mmips", 268435456, 2, 5),
+    ("CRS328-24P-4S+", "arm", 536870912, 1, 24),
+    ("CRS310-8G+2S+", "arm", 268435456, 1, 8),
+]
+VERSIONS = ["7.20.4", "7.16.1", "7.15.3", "6.49.15"]
+HOSTNAMES = ["laptop", "iphone", "printer", "desktop", "tv", "android", "ipad", "nas", "camera", "voip"]
+
+
+def encode_word(word: bytes) -> bytes:
+    length = len(word)
+    if length < 0x80:
+        prefix = struct.pack("!B", length)
+    elif length < 0x4000:
+        prefix = struct.pack("!H", length | 0x8000)
+    elif length < 0x200000:
+        prefix = struct.pack("!I", length | 0xC00000)[1:]
+    else:
+        prefix = struct.pack("!I", length | 0xE0000000)
+    return prefix + word
+
+
+async def read_word(reader: asyncio.StreamReader) -> bytes:
+    first = (await reader.readexactly(1))[0]
+    if first < 0x80:
+        length = first
+    elif first < 0xC0:
+        length = ((first & 0x3F) << 8) | (await reader.readexactly(1))[0]
+    elif first < 0xE0:
+        rest = await reader.readexactly(2)
+        length = ((first & 0x1F) << 16) | (rest[0] << 8) | rest[1]
+    else:
+        rest = await reader.readexactly(3)
+        length = ((first & 0x0F) << 24) | (rest[0] << 16) | (rest[1] << 8) | rest[2]
+    return await reader.readexactly(length) if length else b""
+
+
+async def read_sentence(reader: asyncio.StreamReader) -> list:
+    words = []
+    while True:
+        word = await read_word(reader)
+        if not word:
+            return words
+        words.append(word.decode(errors="replace"))
+
+
+def format_duration(seconds: float) -> str:
+    """RouterOS duration, e.g. 1w2d3h4m5s"""
+    seconds = int(seconds)
+    result = ""
+    for unit, size in (("w", 604800), ("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            result += f"{seconds // size}{unit}"
+            seconds %= size
+    return result + f"{seconds}s" if seconds or not result else result
+
+
+def identity(index: int, site_size: int) -> str:
+    position = index % site_size
+    return f"{'rtr' if position == 0 else 'sw'}-{index // site_size:04d}-{position:02d}"
+
+
+def mac(device_index: int, interface_index: int) -> str:
+    return f"4C:5E:0C:{(device_index >> 8) & 0xFF:02X}:{device_index & 0xFF:02X}:{interface_index:02X}"
+
+
+class VirtualDevice:
+    """One simulated router or switch; all values derive from its index and the clock"""
+
+    __slots__ = (
+        "index", "host", "port", "identity", "board", "architecture", "total_memory", "cpu_count", "version",
+        "serial", "booted", "phase", "slow_login", "is_router", "interfaces", "site_root", "site_size", "uplink",
+        "downlinks", "lease_count", "files", "connections",
+    )
+
+    def __init__(self, index: int, host: str, port: int, site_size: int, lease_count: int, slow_login: bool, started: float):
+        rng = random.Random(index)
+        self.index = index
+        self.host = host
+        self.port = port
+        self.site_root = index - index % site_size
+        self.site_size = site_size
+        self.is_router = index == self.site_root
+        board = BOARDS[rng.randrange(2)] if self.is_router else BOARDS[2 + rng.randrange(3)]
+        self.board, self.architecture, self.total_memory, self.cpu_count, ports = board
+        self.identity = identity(index, site_size)
+        self.version = VERSIONS[rng.randrange(len(VERSIONS))]
+        self.serial = f"HF{index:08X}"
+        self.booted = started - rng.uniform(3600, 90 * 86400)
+        self.phase = rng.uniform(0, 2 * math.pi)
+        self.slow_login = slow_login
+        self.lease_count = lease_count if self.is_router else 0
+        self.files = {}
+        self.connections = 0
+
+        # Routers uplink on ether1 and feed the site's switches from ether2..;
+        # switches uplink to the router on ether1
+        router_ports = BOARDS[random.Random(self.site_root).randrange(2)][4]
+        self.uplink = None if self.is_router else (self.site_root, 2 + (index - self.site_root - 1) % (router_ports - 1))
+        self.downlinks = (
+            [(self.site_root + i, 2 + (i - 1) % (ports - 1), 1) for i in range(1, site_size)] if self.is_router else []
+        )
+        self.interfaces = []
+        for i in range(1, ports + 1):
+            self.interfaces.append({
+                "name": f"ether{i}",
+                "rate": rng.uniform(2e5, 5e7) if (i == 1 or self.is_router) else rng.uniform(1e4, 2e6),
+                "base_rx": rng.randrange(10 ** 9, 10 ** 11),
+                "base_tx": rng.randrange(10 ** 9, 10 ** 11),
+            })
+        self.interfaces.append({"name": "bridge", "rate": 0.0, "base_rx": 0, "base_tx": 0})
+
+    def _rate(self, rate: float, elapsed: float) -> float:
+        """Traffic in bits/s on a sine curve with a 1h period"""
+        return rate * (1 + 0.6 * math.sin(2 * math.pi * elapsed / 3600 + self.phase))
+
+    def _bytes(self, rate: float, elapsed: float) -> int:
+        """Integral of _rate in bytes: counters only ever go up"""
+        omega = 2 * math.pi / 3600
+        integral = elapsed - 0.6 / omega * (math.cos(omega * elapsed + self.phase) - math.cos(self.phase))
+        return int(rate * integral / 8)
+
+    def system_resource(self, now: float) -> list:
+        elapsed = now - self.booted
+        cpu = 5 + 30 * (0.5 + 0.5 * math.sin(elapsed / 300 + self.phase)) + random.uniform(-3, 3)
+        used = self.total_memory * (0.35 + 0.1 * math.sin(elapsed / 900 + self.phase))
+        return [{
+            "uptime": format_duration(elapsed),
+            "version": f"{self.version} (stable)",
+            "build-time": "2025-10-01 10:00:00",
+            "factory-software": "7.1",
+            "free-memory": str(int(self.total_memory - used)),
+            "total-memory": str(self.total_memory),
+            "cpu": "ARMv8" if self.architecture == "arm64" else "MIPS 1004Kc V2.15",
+            "cpu-count": str(self.cpu_count),
+            "cpu-frequency": "1400",
+            "cpu-load": str(max(0, min(100, int(cpu)))),
+            "free-hdd-space": "104595456",
+            "total-hdd-space": "134217728",
+            "architecture-name": self.architecture,
+            "board-name": self.board,
+            "platform": "MikroTik",
+        }]
+
+    def system_identity(self, now: float) -> list:
+        return [{"name": self.identity}]
+
+    def routerboard(self, now: float) -> list:
+        return [{
+            "routerboard": "true", "model": self.board, "serial-number": self.serial,
+            "firmware-type": "ipq6000", "current-firmware": self.version.split(" ")[0],
+        }]
+
+    def interface(self, now: float) -> list:
+        elapsed = now - self.booted
+        rows = []
+        for i, iface in enumerate(self.interfaces):
+            rx = iface["base_rx"] + self._bytes(iface["rate"], elapsed)
+            tx = iface["base_tx"] + self._bytes(iface["rate"] * 0.4, elapsed)
+            rows.append({
+                ".id": f"*{i + 1:X}",
+                "name": iface["name"],
+                "default-name": iface["name"] if iface["name"] != "bridge" else "",
+                "type": "ether" if iface["name"] != "bridge" else "bridge",
+                "mtu": "1500",
+                "actual-mtu": "1500",
+                "mac-address": mac(self.index, 0 if iface["name"] == "bridge" else i + 1),
+                "last-link-up-time": "2025-10-18 07:12:44",
+                "link-downs": "1",
+                "rx-byte": str(rx),
+                "tx-byte": str(tx),
+                "rx-packet": str(rx // 900),
+                "tx-packet": str(tx // 700),
+                "rx-drop": "0",
+                "tx-drop": "0",
+                "rx-error": str(rx // 10 ** 10),
+                "tx-error": "0",
+                "running": "true",
+                "disabled": "false",
+            })
+        return rows
+
+    def monitor_traffic(self, now: float, name: str) -> list:
+        elapsed = now - self.booted
+        for iface in self.interfaces:
+            if iface["name"] == name:
+                rx = self._rate(iface["rate"], elapsed)
+                tx = self._rate(iface["rate"] * 0.4, elapsed)
+                return [{
+                    "name": name,
+                    "rx-bits-per-second": str(int(rx)),
+                    "tx-bits-per-second": str(int(tx)),
+                    "rx-packets-per-second": str(int(rx / 7200)),
+                    "tx-packets-per-second": str(int(tx / 5600)),
+                }]
+        return None
+
+    def ip_address(self, now: float) -> list:
+        site = self.site_root
+        rows = [{
+            ".id": "*1",
+            "address": f"10.{(site >> 8) & 0xFF}.{site & 0xFF}.{1 + self.index - site}/24",
+            "network": f"10.{(site >> 8) & 0xFF}.{site & 0xFF}.0",
+            "interface": "bridge",
+            "actual-interface": "bridge",
+            "invalid": "false", "dynamic": "false", "disabled": "false",
+        }]
+        if self.is_router:
+            rows.append({
+                ".id": "*2",
+                "address": f"100.64.{(self.index >> 8) & 0xFF}.{self.index & 0xFF}/31",
+                "network": f"100.64.{(self.index >> 8) & 0xFF}.{self.index & 0xFE}",
+                "interface": "ether1",
+                "actual-interface": "ether1",
+                "invalid": "false", "dynamic": "true", "disabled": "false",
+            })
+            rows.append({
+                ".id": "*3",
+                "address": "192.168.88.1/24",
+                "network": "192.168.88.0",
+                "interface": "bridge",
+                "actual-interface": "bridge",
+                "invalid": "false", "dynamic": "false", "disabled": "false", "comment": "defconf",
+            })
+        return rows
+
+    def dhcp_lease(self, now: float) -> list:
+        """
+        Leases renew every 10 minutes; each 5-minute epoch replaces ~2% of
+        clients with new ones so lease sync sees a steady trickle of changes
+        """
+        epoch = int(now // 300)
+        site = self.site_root
+        rows = []
+        for slot in range(self.lease_count):
+            generation = epoch - (slot * 7919 + self.index) % 50
+            client = (slot, generation // 50)
+            rng = random.Random(hash((self.index,) + client))
+            mac_bytes = [0x02, rng.randrange(256), rng.randrange(256), rng.randrange(256), rng.randrange(256), slot & 0xFF]
+            expires = 600 - (now + rng.uniform(0, 600)) % 600
+            rows.append({
+                ".id": f"*{slot + 1:X}",
+                "address": f"10.{(site >> 8) & 0xFF}.{site & 0xFF}.{100 + slot % 150}" if slot < 150
+                else f"172.{16 + (site >> 16)}.{(site >> 8) & 0xFF}.{slot % 250}",
+                "mac-address": ":".join(f"{b:02X}" for b in mac_bytes),
+                "client-id": "1:" + ":".join(f"{b:02x}" for b in mac_bytes),
+                "server": "dhcp1",
+                "status": "bound" if rng.random() > 0.03 else "waiting",
+                "expires-after": format_duration(expires),
+                "last-seen": format_duration(600 - expires),
+                "host-name": f"{HOSTNAMES[rng.randrange(len(HOSTNAMES))]}-{rng.randrange(1000):03d}",
+                "dynamic": "true",
+                "disabled": "false",
+            })
+        return rows
+
+    def ip_neighbor(self, now: float) -> list:
+        rows = []
+        links = []
+        if self.uplink is not None:
+            links.append((self.uplink[0], "ether1", f"ether{self.uplink[1]}"))
+        for device_index, local_port, remote_port in self.downlinks:
+            links.append((device_index, f"ether{local_port}", f"ether{remote_port}"))
+        for i, (device_index, local, remote) in enumerate(links):
+            rows.append({
+                ".id": f"*{i + 1:X}",
+                "interface": f"{local},bridge",
+                "mac-address": mac(device_index, int(remote[5:])),
+                "identity": identity(device_index, self.site_size),
+                "platform": "MikroTik",
+                "version": "7.20.4 (stable)",
+                "interface-name": remote,
+                "address4": f"10.{(self.site_root >> 8) & 0xFF}.{self.site_root & 0xFF}.{1 + device_index - self.site_root}",
+                "discovered-by": "mndp,lldp",
+            })
+        return rows
+
+    def bridge_host(self, now: float) -> list:
+        rows = []
+        if self.uplink is not None:
+            rows.append({
+                ".id": "*1", "mac-address": mac(self.uplink[0], self.uplink[1]), "on-interface": "ether1",
+                "bridge": "bridge", "local": "false", "dynamic": "true", "invalid": "false",
+            })
+        for i, iface in enumerate(self.interfaces[:-1]):
+            rows.append({
+                ".id": f"*{i + 2:X}", "mac-address": mac(self.index, i + 1), "on-interface": iface["name"],
+                "bridge": "bridge", "local": "true", "dynamic": "false", "invalid": "false",
+            })
+        return rows
+
+    def export(self) -> str:
+        lines = [
+            f"# 2026-10-19 12:00:00 by RouterOS {self.version}",
+            f"# model = {self.board}",
+            f"# serial number = {self.serial}",
+            "/interface bridge",
+            "add admin-mac=" + mac(self.index, 0) + " auto-mac=no comment=defconf name=bridge",
+            "/interface bridge port",
+        ]
+        lines += [f"add bridge=bridge interface={iface['name']}" for iface in self.interfaces[1:-1]]
+        lines += ["/ip address"] + [
+            f"add address={row['address']} interface={row['interface']} network={row['network']}"
+            for row in self.ip_address(0) if row["dynamic"] == "false"
+        ]
+        lines += [
+            "/ip firewall filter",
+            "add action=accept chain=input comment=\"defconf: accept established,related,untracked\" connection-state=established,related,untracked",
+            "add action=drop chain=input comment=\"defconf: drop invalid\" connection-state=invalid",
+            "add action=accept chain=input comment=\"defconf: accept ICMP\" protocol=icmp",
+            "add action=drop chain=input comment=\"defconf: drop all not coming from LAN\" in-interface-list=!LAN",
+            "/system identity",
+            f"set name={self.identity}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class Simulator:
+    """Protocol handling and network condition injection shared by all devices"""
+
+    def __init__(self, args):
+        self.args = args
+        self.stats = {"connections": 0, "open": 0, "logins": 0, "failed_logins": 0, "commands": 0, "retransmits": 0}
+
+    async def delay(self):
+        """Latency + jitter, plus an RTO (doubling on consecutive losses) per lost segment"""
+        seconds = (self.args.latency_ms + random.uniform(-self.args.jitter_ms, self.args.jitter_ms)) / 1000
+        rto = self.args.rto_ms / 1000
+        while random.random() < self.args.loss:
+            self.stats["retransmits"] += 1
+            seconds += rto
+            rto *= 2
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    async def send(self, writer: asyncio.StreamWriter, sentences: list, tag: str):
+        await self.delay()
+        payload = bytearray()
+        for sentence in sentences:
+            if tag is not None:
+                sentence = sentence + [f".tag={tag}"]
+            for word in sentence:
+                payload += encode_word(word.encode())
+            payload += b"\x00"
+        writer.write(bytes(payload))
+        await writer.drain()
+
+    def execute(self, device: VirtualDevice, command: str, attributes: dict, queries: dict) -> list:
+        """Reply sentences for a command (without tags)"""
+        now = time.time()
+        handlers = {
+            "/system/resource/print": device.system_resource,
+            "/system/identity/print": device.system_identity,
+            "/system/routerboard/print": device.routerboard,
+            "/interface/print": device.interface,
+            "/ip/address/print": device.ip_address,
+            "/ip/dhcp-server/lease/print": device.dhcp_lease,
+            "/ip/neighbor/print": device.ip_neighbor,
+            "/interface/bridge/host/print": device.bridge_host,
+        }
+        if command in handlers:
+            rows = handlers[command](now)
+        elif command == "/interface/monitor-traffic":
+            rows = device.monitor_traffic(now, attributes.get("interface", ""))
+            if rows is None:
+                return [["!trap", "=message=no such item"], ["!done"]]
+        elif command == "/export":
+            name = attributes.get("file", "export")
+            device.files[f"{name}.rsc"] = device.export().encode()
+            return [["!done"]]
+        elif command == "/file/print":
+            rows = [
+                {".id": f"*{i + 1:X}", "name": name, "type": ".rsc file", "size": str(len(data))}
+                for i, (name, data) in enumerate(device.files.items())
+            ]
+        elif command == "/file/read":
+            data = device.files.get(attributes.get("file", ""))
+            if data is None:
+                return [["!trap", "=message=no such file"], ["!done"]]
+            offset = int(attributes.get("offset", 0))
+            size = int(attributes.get("chunk-size", 4096))
+            rows = [{"data": data[offset:offset + size].decode()}]
+        elif command == "/file/remove":
+            names = list(device.files)
+            index = int(attributes.get(".id", "*0")[1:], 16) - 1
+            if 0 <= index < len(names):
+                del device.files[names[index]]
+            return [["!done"]]
+        else:
+            return [["!trap", "=message=no such command prefix"], ["!done"]]
+
+        if queries:
+            rows = [row for row in rows if all(row.get(k) == v for k, v in queries.items())]
+        return [["!re"] + [f"={k}={v}" for k, v in row.items()] for row in rows] + [["!done"]]
+
+    async def login(self, device: VirtualDevice, attributes: dict, challenge: bytes) -> list:
+        if device.slow_login:
+            await asyncio.sleep(self.args.slow_login_ms / 1000)
+        if "name" not in attributes:
+            # Pre-6.43 challenge/response login, step one
+            return [["!done", f"=ret={challenge.hex()}"]]
+        if "response" in attributes:
+            expected = "00" + hashlib.md5(b"\x00" + self.args.password.encode() + challenge).hexdigest()
+            ok = attributes["name"] == self.args.username and attributes["response"] == expected
+        else:
+            ok = attributes["name"] == self.args.username and attributes.get("password") == self.args.password
+        if not ok:
+            self.stats["failed_logins"] += 1
+            return [["!trap", "=message=invalid user name or password (6)"], ["!done"]]
+        self.stats["logins"] += 1
+        return [["!done"]]
+
+    async def serve(self, device: VirtualDevice, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats["connections"] += 1
+        self.stats["open"] += 1
+        device.connections += 1
+        logged_in = False
+        challenge = os.urandom(16)
+        try:
+            while True:
+                words = await read_sentence(reader)
+                if not words:
+                    continue
+                command = words[0]
+                attributes, queries, tag = {}, {}, None
+                for word in words[1:]:
+                    if word.startswith(".tag="):
+                        tag = word[5:]
+                    elif word.startswith("="):
+                        key, _, value = word[1:].partition("=")
+                        attributes[key] = value
+                    elif word.startswith("?"):
+                        key, _, value = word[1:].partition("=")
+                        queries[key] = value
+                if command == "/quit":
+                    await self.send(writer, [["!fatal", "=message=session terminated on request"]], tag)
+                    return
+                if command == "/login":
+                    reply = await self.login(device, attributes, challenge)
+                    logged_in = reply[0] == ["!done"]
+                elif not logged_in:
+                    reply = [["!trap", "=message=not logged in"], ["!done"]]
+                else:
+                    self.stats["commands"] += 1
+                    reply = self.execute(device, command, attributes, queries)
+                await self.send(writer, reply, tag)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.stats["open"] -= 1
+            device.connections -= 1
+            writer.close()
+
+
+def endpoint(args, index: int) -> tuple:
+    """(host, port) of device N: one port each, or one loopback address each with --bind-range"""
+    if args.bind_range:
+        return str(ipaddress.ip_network(args.bind_range)[index + 1]), args.base_port
+    return args.host, args.base_port + index
+
+
+def raise_fd_limit(needed: int):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        if target < needed:
+            print(f"⚠️  File descriptor limit is {target}; raise `ulimit -n` for {needed} sockets")
+
+
+def write_devices(path: str, devices: list, args):
+    """CSV ready for POST /api/v1/devices/bulk (Content-Type: text/csv)"""
+    # The endpoint rejects repeated IPs, so ports alone cannot tell devices apart
+    if len({device.host for device in devices}) < len(devices):
+        raise ValueError("Devices share an IP address; use --bind-range to give each its own")
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "ip_address", "port", "username", "password", "device_type", "model", "site_id", "use_ssl"])
+        for device in devices:
+            writer.writerow([
+                device.identity, device.host, device.port, args.username, args.password,
+                "router" if device.is_router else "switch", device.board, args.site_id, "false",
+            ])
+
+
+async def main_async(args):
+    started = time.time()
+    rng = random.Random(args.seed)
+    devices = [
+        VirtualDevice(i, *endpoint(args, i), args.site_size, args.leases, rng.random() < args.slow_login_rate, started)
+        for i in range(args.count)
+    ]
+    simulator = Simulator(args)
+    raise_fd_limit(args.count + args.max_connections + 64)
+
+    servers = []
+    for device in devices:
+        async def handler(reader, writer, device=device):
+            await simulator.serve(device, reader, writer)
+        servers.append(await asyncio.start_server(handler, device.host, device.port, backlog=64))
+
+    if args.devices_out:
+        write_devices(args.devices_out, devices, args)
+        print(f"📝 Wrote {len(devices)} devices to {args.devices_out}")
+    print(
+        f"✅ {len(devices)} virtual devices on {devices[0].host}:{devices[0].port} .. {devices[-1].host}:{devices[-1].port} "
+        f"(latency {args.latency_ms}±{args.jitter_ms}ms, loss {args.loss:.1%}, "
+        f"{sum(d.slow_login for d in devices)} slow logins)"
+    )
+
+    last_commands = 0
+    while True:
+        await asyncio.sleep(args.stats_interval)
+        stats = simulator.stats
+        rate = (stats["commands"] - last_commands) / args.stats_interval
+        last_commands = stats["commands"]
+        print(
+            f"open={stats['open']} connections={stats['connections']} logins={stats['logins']} "
+            f"failed_logins={stats['failed_logins']} commands={stats['commands']} ({rate:.0f}/s) "
+            f"retransmits={stats['retransmits']}",
+            flush=True
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--base-port", type=int, default=20000, help="Device N listens on base-port + N")
+    parser.add_argument(
+        "--bind-range",
+        help="Give each device its own loopback address in this range (e.g. 127.20.0.0/16), all on --base-port; "
+             "needed wherever devices are deduplicated by IP, such as bulk onboarding"
+    )
+    parser.add_argument("--count", type=int, default=100, help="Number of virtual devices")
+    parser.add_argument("--site-size", type=int, default=8, help="Devices per simulated site (1 router + switches)")
+    parser.add_argument("--leases", type=int, default=200, help="DHCP leases per router")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="simulator")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Base delay per reply")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Uniform +/- jitter per reply")
+    parser.add_argument("--loss", type=float, default=0, help="Probability a reply segment is lost and retransmitted")
+    parser.add_argument("--rto-ms", type=float, default=200, help="Retransmission timeout charged per loss")
+    parser.add_argument("--slow-login-rate", type=float, default=0, help="Fraction of devices with slow logins")
+    parser.add_argument("--slow-login-ms", type=float, default=3000)
+    parser.add_argument("--max-connections", type=int, default=4096, help="Expected concurrent client connections")
+    parser.add_argument("--devices-out", help="Write a bulk-onboarding CSV of the virtual devices")
+    parser.add_argument("--site-id", type=int, default=1, help="site_id used in --devices-out")
+    parser.add_argument("--stats-interval", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    if args.devices_out and not args.bind_range and args.count > 1:
+        parser.error("--devices-out needs --bind-range: the bulk endpoint rejects devices that share an IP")
+
+    try:
+        asyncio.run(main_async(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()